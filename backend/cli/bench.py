@@ -0,0 +1,509 @@
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Скрипт запускается из cli/, модули backend лежат уровнем выше
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def measure(function, repeat: int) -> float:
+    """Медианное время вызова, мс"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def print_table(title: str, rows: list[tuple[str, float, int | None]]) -> None:
+    print(f"\n{title}")
+    baseline = rows[0][1]
+    for name, elapsed, size in rows:
+        size_text = f"{size / 1024:10.1f} KiB" if size is not None else ""
+        print(f"  {name:<38} {elapsed:10.2f} ms  x{baseline / elapsed:5.2f}{size_text}")
+
+
+def generate_allocation_payload(task_count: int, executor_count: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    skills = [f"skill_{i}" for i in range(200)]
+
+    def skill_list(count: int) -> list[dict]:
+        return [
+            {"name": name, "level": rng.randint(1, 10)}
+            for name in rng.sample(skills, count)
+        ]
+
+    return {
+        "tasks": [
+            {
+                "id": f"task_{i}",
+                "title": f"Task {i}",
+                "description": "Synthetic task " * 5,
+                "start_date": "2024-01-01T00:00:00",
+                "end_date": "2024-01-10T00:00:00",
+                "soft_skills": skill_list(rng.randint(1, 4)),
+                "hard_skills": skill_list(rng.randint(2, 8)),
+            }
+            for i in range(task_count)
+        ],
+        "executors": [
+            {
+                "id": f"executor_{i}",
+                "name": f"Executor {i}",
+                "soft_skills": skill_list(rng.randint(2, 6)),
+                "hard_skills": skill_list(rng.randint(4, 15)),
+            }
+            for i in range(executor_count)
+        ],
+    }
+
+
+def bench_serialization(args) -> None:
+    from src.schemas.requests import AllocationRequest
+    from src.serialization import dumps, dumps_line, msgpack, orjson
+
+    payload = generate_allocation_payload(args.tasks, args.executors)
+    body = json.dumps(payload).encode("utf-8")
+    print(
+        f"Payload: {args.tasks} tasks, {args.executors} executors, {len(body) / 1024:.1f} KiB JSON "
+        f"(orjson: {'yes' if orjson else 'no'}, msgpack: {'yes' if msgpack else 'no'})"
+    )
+
+    # Разбор запроса: так тело разбирает FastAPI для параметра-модели и так - parse_body
+    rows = [
+        ("json.loads + model_validate", measure(
+            lambda: AllocationRequest.model_validate(json.loads(body)), args.repeat
+        ), len(body)),
+        ("model_validate_json", measure(
+            lambda: AllocationRequest.model_validate_json(body), args.repeat
+        ), len(body)),
+    ]
+    if msgpack is not None:
+        packed = msgpack.packb(payload, use_bin_type=True)
+        rows.append(("msgpack.unpackb + model_validate", measure(
+            lambda: AllocationRequest.model_validate(msgpack.unpackb(packed, raw=False)), args.repeat
+        ), len(packed)))
+    print_table("Request parsing", rows)
+
+    # Ответ /match/allocate
+    response = {"allocation": {task["id"]: f"executor_{i % args.executors}" for i, task in enumerate(payload["tasks"])}}
+    rows = [
+        ("json.dumps", measure(
+            lambda: json.dumps(response, ensure_ascii=False).encode("utf-8"), args.repeat
+        ), len(json.dumps(response).encode("utf-8"))),
+        ("serialization.dumps", measure(lambda: dumps(response), args.repeat), len(dumps(response))),
+    ]
+    if msgpack is not None:
+        rows.append(("msgpack.packb", measure(
+            lambda: msgpack.packb(response, use_bin_type=True), args.repeat
+        ), len(msgpack.packb(response, use_bin_type=True))))
+    print_table("Allocation response", rows)
+
+    # Потоковый ответ анализатора: отдельная сериализация каждого элемента
+    items = [
+        {
+            "id": task["id"],
+            "title": task["title"],
+            "assessment": {
+                "soft": {skill["name"]: skill["level"] / 10 for skill in task["soft_skills"]},
+                "hard": {skill["name"]: skill["level"] / 10 for skill in task["hard_skills"]},
+            },
+        }
+        for task in payload["tasks"]
+    ]
+    rows = [
+        ("json.dumps per item", measure(
+            lambda: [json.dumps(item, ensure_ascii=False) for item in items], args.repeat
+        ), None),
+        ("serialization.dumps_line per item", measure(
+            lambda: [dumps_line(item) for item in items], args.repeat
+        ), None),
+    ]
+    print_table("Analyzer stream items", rows)
+
+
+SAMPLE_CONTEXT = "Веб-сервис распределения задач между сотрудниками: FastAPI, PostgreSQL, React."
+SAMPLE_TASKS = [
+    ("Настроить CI", "Собрать пайплайн GitHub Actions: линтеры, тесты, сборка Docker-образа."),
+    ("API отчетов", "Добавить REST-эндпоинт выгрузки отчетов в CSV с фильтрами по датам."),
+    ("Форма входа", "Сверстать форму авторизации на React с валидацией и обработкой ошибок."),
+    ("Индексы БД", "Найти медленные запросы в PostgreSQL и добавить недостающие индексы."),
+    ("Онбординг", "Провести встречи с новыми сотрудниками и подготовить материалы по проекту."),
+    ("Кэширование", "Добавить Redis-кэш для справочников и инвалидацию при изменениях."),
+]
+
+
+def run_llm_analysis(model_path: str, draft: str | None, draft_tokens: int | None, task_count: int) -> dict:
+    # llm_interface перенаправляет stdout/stderr в лог, отчет печатаем в исходные потоки
+    stdout, stderr = sys.stdout, sys.stderr
+    try:
+        from services.llm_interface import LlamaModelInterface
+        from services.llm_backends import LlamaCppBackend
+
+        llm = LlamaModelInterface(
+            LlamaCppBackend(model_path, draft_model=draft, draft_tokens=draft_tokens)
+        )
+        tasks = [
+            {"id": str(i), "title": title, "description": description}
+            for i, (title, description) in enumerate(
+                SAMPLE_TASKS[i % len(SAMPLE_TASKS)] for i in range(task_count)
+            )
+        ]
+        start = time.perf_counter()
+        results = list(llm.analyze_tasks(SAMPLE_CONTEXT, tasks))
+        elapsed = time.perf_counter() - start
+        return {"results": results, "elapsed": elapsed, "metrics": llm.metrics()}
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+def bench_llm(args) -> None:
+    # src.constants не импортируем: он сам загружает модель
+    model_path = args.model or str(
+        Path(__file__).parent.parent / "assets" / "models" / "Mistral-7B-Instruct-v0.3.Q4_K_S.gguf"
+    )
+    runs = [("baseline", None)]
+    runs += [(draft, draft) for draft in args.draft]
+
+    print(f"Model: {model_path}, {args.tasks} tasks")
+    for name, draft in runs:
+        run = run_llm_analysis(model_path, draft, args.draft_tokens, args.tasks)
+        throughput = run["metrics"]["throughput"]
+        speculative = run["metrics"]["speculative"]
+        line = (
+            f"  {name:<24} {run['elapsed']:8.2f} s  "
+            f"{throughput['completion_tokens']:6d} tokens  "
+            f"{throughput['tokens_per_second']:7.2f} tok/s"
+        )
+        if speculative is not None:
+            line += f"  acceptance {speculative['acceptance_rate']:.2%}"
+        parsed = sum("assessment" in result for result in run["results"])
+        line += f"  {parsed}/{args.tasks} valid JSON"
+        print(line)
+
+
+def percentile(values: list[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))] if values else 0.0
+
+
+def run_affinity_layout(args, model_path: str, layout) -> dict:
+    """Анализ задач моделью под фоновой нагрузкой распределения, как в работающем API"""
+    import threading
+    from src.cpu_affinity import pin_current_thread
+    from src.schemas.requests import AllocationRequest
+    from services.inference_tuning import InferenceSettings
+    from services.task_allocator import TaskAllocator
+
+    request = AllocationRequest.model_validate(generate_allocation_payload(args.alloc_tasks, args.alloc_executors))
+    allocator = TaskAllocator()
+    stop = threading.Event()
+    allocation_ms = []
+
+    def api_worker():
+        if layout.api:
+            pin_current_thread(layout.api)
+        while not stop.is_set():
+            start = time.perf_counter()
+            allocator.allocate_tasks(request.tasks, request.executors)
+            allocation_ms.append((time.perf_counter() - start) * 1000)
+
+    stdout, stderr = sys.stdout, sys.stderr
+    try:
+        from services.llm_interface import LlamaModelInterface
+        from services.llm_backends import LlamaCppBackend
+
+        settings = InferenceSettings(n_threads=args.threads, cpu_affinity=layout.inference)
+        llm = LlamaModelInterface(LlamaCppBackend(model_path, settings=settings, numa_node=layout.numa_node))
+        tasks = [
+            {"id": str(i), "title": title, "description": description}
+            for i, (title, description) in enumerate(
+                SAMPLE_TASKS[i % len(SAMPLE_TASKS)] for i in range(args.tasks)
+            )
+        ]
+
+        workers = [threading.Thread(target=api_worker, daemon=True) for _ in range(args.api_workers)]
+        for worker in workers:
+            worker.start()
+        task_seconds = []
+        start = time.perf_counter()
+        for _ in llm.analyze_tasks(SAMPLE_CONTEXT, tasks):
+            now = time.perf_counter()
+            task_seconds.append(now - start)
+            start = now
+        stop.set()
+        for worker in workers:
+            worker.join()
+        return {
+            "task_seconds": task_seconds,
+            "allocation_ms": allocation_ms,
+            "tokens_per_second": llm.metrics()["throughput"]["tokens_per_second"],
+        }
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+def bench_affinity(args) -> None:
+    from src.cpu_affinity import CpuLayout
+
+    model_path = args.model or str(
+        Path(__file__).parent.parent / "assets" / "models" / "Mistral-7B-Instruct-v0.3.Q4_K_S.gguf"
+    )
+    split = CpuLayout.from_config(args.llm_cpus, args.llm_numa_node, args.api_cpus)
+    if not split.inference:
+        raise SystemExit("Specify --llm-cpus or --llm-numa-node for the split layout")
+    # Одинаковое число потоков в обоих вариантах: сравнивается только размещение
+    args.threads = args.threads or len(split.inference)
+
+    print(f"Model: {model_path}, {args.tasks} tasks, {args.api_workers} allocation workers")
+    for line in split.report():
+        print(f"  {line}")
+    for name, layout in [("shared", CpuLayout()), ("split", split)]:
+        run = run_affinity_layout(args, model_path, layout)
+        print(
+            f"  {name:<8} analysis p50 {percentile(run['task_seconds'], 0.5):7.2f} s  "
+            f"p95 {percentile(run['task_seconds'], 0.95):7.2f} s  "
+            f"{run['tokens_per_second']:7.2f} tok/s  |  "
+            f"allocation p50 {percentile(run['allocation_ms'], 0.5):8.1f} ms  "
+            f"p95 {percentile(run['allocation_ms'], 0.95):8.1f} ms  ({len(run['allocation_ms'])} runs)"
+        )
+
+
+def generate_project_tasks(task_count: int, seed: int = 0) -> list[dict]:
+    """Задачи проекта с семействами почти одинаковых: CRUD-эндпоинты, формы, миграции"""
+    rng = random.Random(seed)
+    entities = ["users", "orders", "products", "invoices", "projects", "teams", "reports", "comments"]
+    templates = [
+        ("Implement {entity} endpoint", "Add REST endpoint for {entity} with pagination, filtering and validation."),
+        ("Add {entity} form", "Create React form for {entity} with client-side validation and error handling."),
+        ("Migrate {entity} table", "Write PostgreSQL migration for {entity} table and backfill existing data."),
+    ]
+    vocabulary = (
+        "cache queue worker schema index report export import search filter audit metrics "
+        "alert deploy backup restore payment billing email webhook token session upload "
+        "preview thumbnail locale timezone scheduler retry throttle analytics dashboard chart"
+    ).split()
+    tasks = []
+    for i in range(task_count):
+        if rng.random() < 0.3:
+            # Уникальные задачи: случайные сочетания слов
+            title = " ".join(rng.sample(vocabulary, 3)).capitalize()
+            description = " ".join(rng.sample(vocabulary, 12)) + "."
+        else:
+            title, description = rng.choice(templates)
+            entity = rng.choice(entities)
+            title, description = title.format(entity=entity), description.format(entity=entity)
+        tasks.append({"id": str(i), "title": title, "description": description})
+    return tasks
+
+
+def bench_dedup(args) -> None:
+    from services.near_duplicates import NearDuplicateDetector
+
+    tasks = generate_project_tasks(args.tasks)
+    texts = [f"{task['title']}\n{task['description']}" for task in tasks]
+    print(f"Project: {args.tasks} tasks")
+    for threshold in args.threshold:
+        detector = NearDuplicateDetector(threshold)
+        start = time.perf_counter()
+        clusters = detector.cluster(texts)
+        elapsed = (time.perf_counter() - start) * 1000
+        analyzed = sum(representative == position for position, (representative, _) in enumerate(clusters))
+        similarities = [similarity for position, (representative, similarity) in enumerate(clusters) if representative != position]
+        print(
+            f"  threshold {threshold:.2f}: {analyzed:5d} inferences instead of {len(tasks)} "
+            f"({1 - analyzed / len(tasks):.0%} saved), min similarity of reused "
+            f"{min(similarities) if similarities else 1.0:.2f}, detection {elapsed:.1f} ms"
+        )
+
+
+def allocation_result(allocation: dict) -> dict[str, str]:
+    return {task.id: executor_id for executor_id, tasks in allocation.items() for task in tasks}
+
+
+def bench_allocation_stress(args) -> None:
+    """Параллельные распределения на общем TaskAllocator должны давать те же назначения, что и последовательные"""
+    from concurrent.futures import ThreadPoolExecutor
+    from src.schemas.requests import AllocationRequest
+    from services.task_allocator import TaskAllocator
+
+    allocator = TaskAllocator()
+    # Разные проекты в каждом запросе: общее состояние между ними сразу проявилось бы в назначениях
+    requests = [
+        AllocationRequest.model_validate(generate_allocation_payload(args.tasks, args.executors, seed=seed))
+        for seed in range(args.requests)
+    ]
+
+    def allocate(request) -> dict[str, str]:
+        return allocation_result(allocator.allocate_tasks(request.tasks, request.executors))
+
+    print(
+        f"{args.requests} requests x {args.tasks} tasks x {args.executors} executors, "
+        f"{args.workers} workers, {args.rounds} rounds"
+    )
+    start = time.perf_counter()
+    expected = [allocate(request) for request in requests]
+    serial = time.perf_counter() - start
+    print(f"  serial      {serial * 1000:10.1f} ms")
+
+    mismatches = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for round_index in range(args.rounds):
+            start = time.perf_counter()
+            results = list(pool.map(allocate, requests))
+            elapsed = time.perf_counter() - start
+            differing = [i for i, (result, serial_result) in enumerate(zip(results, expected)) if result != serial_result]
+            mismatches += len(differing)
+            print(
+                f"  concurrent  {elapsed * 1000:10.1f} ms  round {round_index + 1}: "
+                f"{len(requests) - len(differing)}/{len(requests)} equal to serial"
+                + (f", differing requests {differing}" if differing else "")
+            )
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} concurrent allocations differ from serial runs")
+    print("  all concurrent allocations match serial runs")
+
+
+def bench_interactive(args) -> None:
+    """Интерактивный анализ должен завершаться, пока открыт поток пакетного анализа"""
+    import asyncio
+    import os
+    import tempfile
+
+    # Приложение с заглушкой модели: время генерации задается задержкой, модель не загружается
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["LLM_STUB_DELAY"] = str(args.delay)
+    os.environ.setdefault("JOBS_DB_PATH", str(Path(tempfile.mkdtemp()) / "jobs.db"))
+    stdout, stderr = sys.stdout, sys.stderr
+    try:
+        import httpx
+        from main import app
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+    tasks = [
+        {"id": str(i), "title": f"{title} {i}", "description": description, "deadline": "2030-01-01"}
+        for i, (title, description) in enumerate(
+            SAMPLE_TASKS[i % len(SAMPLE_TASKS)] for i in range(args.bulk_tasks)
+        )
+    ]
+    single = {
+        "id": "interactive",
+        "title": "Форма входа",
+        "description": "Сверстать форму авторизации на React.",
+        "project_description": SAMPLE_CONTEXT,
+    }
+
+    async def run() -> tuple[list[float], float, list[bool]]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            start = time.perf_counter()
+            bulk = asyncio.create_task(
+                client.post(
+                    "/analyze/tasks",
+                    json={"project_description": SAMPLE_CONTEXT, "task_list": tasks, "reuse_similar": False},
+                )
+            )
+            latencies, during_bulk = [], []
+            # Интерактивные запросы идут, пока модель занята пакетом
+            await asyncio.sleep(args.delay * 2)
+            for _ in range(args.interactive):
+                request_start = time.perf_counter()
+                response = await client.post("/analyze/task", json=single)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - request_start)
+                during_bulk.append(not bulk.done())
+            response = await bulk
+            response.raise_for_status()
+            return latencies, time.perf_counter() - start, during_bulk
+
+    latencies, bulk_elapsed, during_bulk = asyncio.run(run())
+    print(f"Stub model {args.delay * 1000:.0f} ms per request, bulk stream of {args.bulk_tasks} tasks")
+    print(f"  bulk stream        {bulk_elapsed:8.2f} s")
+    print(
+        f"  interactive        p50 {percentile(latencies, 0.5):6.2f} s  max {max(latencies):6.2f} s  "
+        f"({sum(during_bulk)}/{len(latencies)} finished while the bulk stream was open)"
+    )
+    if not all(during_bulk):
+        raise SystemExit("Interactive requests waited for the bulk stream to finish")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Task Allocation System benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serialization = subparsers.add_parser(
+        "serialization", help="Request parsing and response encoding"
+    )
+    serialization.add_argument("--tasks", type=int, default=5000)
+    serialization.add_argument("--executors", type=int, default=1000)
+    serialization.add_argument("--repeat", type=int, default=5)
+    serialization.set_defaults(handler=bench_serialization)
+
+    llm = subparsers.add_parser(
+        "llm", help="Task analysis throughput with and without speculative decoding"
+    )
+    llm.add_argument("--model", help="Main GGUF model (default: bundled model)")
+    llm.add_argument(
+        "--draft",
+        action="append",
+        default=[],
+        help='Draft to compare against baseline: "prompt_lookup" or a GGUF path; repeatable',
+    )
+    llm.add_argument("--draft-tokens", type=int, default=None)
+    llm.add_argument("--tasks", type=int, default=6)
+    llm.set_defaults(handler=bench_llm)
+
+    affinity = subparsers.add_parser(
+        "affinity", help="Analysis and allocation latency with shared vs split CPU sets"
+    )
+    affinity.add_argument("--model", help="Main GGUF model (default: bundled model)")
+    affinity.add_argument("--llm-cpus", help='CPUs for inference in the split layout, e.g. "16-31"')
+    affinity.add_argument("--llm-numa-node", type=int, help="NUMA node for inference in the split layout")
+    affinity.add_argument("--api-cpus", help="CPUs for allocation workers (default: the rest)")
+    affinity.add_argument("--threads", type=int, help="Inference threads (default: size of the split CPU set)")
+    affinity.add_argument("--tasks", type=int, default=6)
+    affinity.add_argument("--api-workers", type=int, default=2)
+    affinity.add_argument("--alloc-tasks", type=int, default=500)
+    affinity.add_argument("--alloc-executors", type=int, default=100)
+    affinity.set_defaults(handler=bench_affinity)
+
+    dedup = subparsers.add_parser(
+        "dedup", help="Inferences saved by near-duplicate task detection"
+    )
+    dedup.add_argument("--tasks", type=int, default=1000)
+    dedup.add_argument("--threshold", type=float, action="append", help="Repeatable (default: 0.7, 0.85, 0.95)")
+    dedup.set_defaults(handler=bench_dedup)
+
+    stress = subparsers.add_parser(
+        "allocation-stress", help="Concurrent allocations on a shared TaskAllocator vs serial runs"
+    )
+    stress.add_argument("--requests", type=int, default=16)
+    stress.add_argument("--workers", type=int, default=8)
+    stress.add_argument("--rounds", type=int, default=3)
+    stress.add_argument("--tasks", type=int, default=200)
+    stress.add_argument("--executors", type=int, default=50)
+    stress.set_defaults(handler=bench_allocation_stress)
+
+    interactive = subparsers.add_parser(
+        "interactive", help="Interactive analysis latency while a bulk /analyze/tasks stream is open"
+    )
+    interactive.add_argument("--bulk-tasks", type=int, default=30)
+    interactive.add_argument("--interactive", type=int, default=5)
+    interactive.add_argument("--delay", type=float, default=0.1, help="Stub model time per request, s")
+    interactive.set_defaults(handler=bench_interactive)
+
+    args = parser.parse_args()
+    if args.command == "dedup" and not args.threshold:
+        args.threshold = [0.7, 0.85, 0.95]
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -113,6 +113,7 @@ a = Analysis(
         'uvicorn.config',
         'uvicorn.server',
         'uvicorn.workers',
+        'llama_cpp.llama_speculative',
         'threading',
         'asyncio',
         'fastapi',
@@ -134,11 +135,20 @@ a = Analysis(
         'starlette.middleware.wsgi',
         'pydantic',
         'email_validator',
+        'orjson',
+        'msgpack',
         'routers.auth',
         'routers.matching',
         'routers.analyzer',
         'routers.builds',
+        'routers.jobs',
+        'sqlite3',
         'services.llm_interface',
+        'services.llm_backends',
+        'services.speculative',
+        'services.inference_tuning',
+        'src.cpu_affinity',
+        'requests',
         'src.pocketbase',
         'src.constants',
         'src.schemas',
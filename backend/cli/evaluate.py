@@ -0,0 +1,230 @@
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+# Скрипт запускается из cli/, модули backend лежат уровнем выше
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+DEFAULT_GOLD_PATH = backend_dir / "assets" / "eval" / "gold.json"
+DEFAULT_MODEL_PATH = backend_dir / "assets" / "models" / "Mistral-7B-Instruct-v0.3.Q4_K_S.gguf"
+DEFAULT_TUNING_PATH = backend_dir / "assets" / "tuning" / "inference.json"
+
+
+def percentile(values: list[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))] if values else 0.0
+
+
+def is_valid_assessment(assessment) -> bool:
+    """Ответ соответствует схеме: объекты soft и hard с числовыми оценками"""
+    if not isinstance(assessment, dict):
+        return False
+    for skill_type in ("soft", "hard"):
+        skills = assessment.get(skill_type)
+        if not isinstance(skills, dict):
+            return False
+        if not all(isinstance(level, (int, float)) for level in skills.values()):
+            return False
+    return True
+
+
+class SkillMatcher:
+    """Сравнение навыков после нормализации синонимов, как при распределении"""
+
+    def __init__(self):
+        from services.normalizer import SkillNormalizer
+
+        self.normalizer = SkillNormalizer()
+
+    def normalize(self, name: str) -> str:
+        name = self.normalizer.normalize_skill_name(name)
+        # "Problem Solving", "CI-CD" -> канонические problem_solving, ci_cd
+        underscored = re.sub(r"[\s\-]+", "_", name)
+        if name not in self.normalizer.synonyms and underscored in self.normalizer.synonyms:
+            return underscored
+        return name
+
+    def predicted(self, assessment: dict) -> set[str]:
+        return {
+            self.normalize(name)
+            for skill_type in ("soft", "hard")
+            for name in assessment.get(skill_type, {})
+        }
+
+    def expected(self, skills: list[str]) -> set[str]:
+        return {self.normalize(name) for name in skills}
+
+
+class Score:
+    def __init__(self):
+        self.true_positives = 0
+        self.false_positives = 0
+        self.false_negatives = 0
+        self.items = 0
+        self.valid = 0
+
+    def add(self, predicted: set[str] | None, expected: set[str]) -> None:
+        self.items += 1
+        if predicted is None:
+            # Невалидный ответ: все ожидаемые навыки пропущены
+            self.false_negatives += len(expected)
+            return
+        self.valid += 1
+        self.true_positives += len(predicted & expected)
+        self.false_positives += len(predicted - expected)
+        self.false_negatives += len(expected - predicted)
+
+    def to_dict(self) -> dict:
+        predicted = self.true_positives + self.false_positives
+        expected = self.true_positives + self.false_negatives
+        precision = self.true_positives / predicted if predicted else 0.0
+        recall = self.true_positives / expected if expected else 0.0
+        return {
+            "precision": precision,
+            "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+            "json_valid_rate": self.valid / self.items if self.items else 0.0,
+            "items": self.items,
+        }
+
+
+def evaluate(llm, gold: dict, matcher: SkillMatcher) -> dict:
+    tasks_score, resumes_score = Score(), Score()
+    latencies = []
+
+    tasks = [
+        {"id": task["id"], "title": task["title"], "description": task["description"]}
+        for task in gold["tasks"]
+    ]
+    expected = {task["id"]: matcher.expected(task["skills"]) for task in gold["tasks"]}
+    start = time.perf_counter()
+    # Каждая задача оценивается моделью: переиспользование оценок похожих задач отключено
+    for result in llm.analyze_tasks(gold["project_description"], tasks, reuse_similar=False):
+        now = time.perf_counter()
+        latencies.append(now - start)
+        start = now
+        assessment = result.get("assessment")
+        tasks_score.add(
+            matcher.predicted(assessment) if is_valid_assessment(assessment) else None,
+            expected[result["id"]],
+        )
+
+    for resume in gold["resumes"]:
+        start = time.perf_counter()
+        try:
+            assessment = llm.analyze_executor(resume["text"])
+        except Exception:
+            assessment = None
+        latencies.append(time.perf_counter() - start)
+        resumes_score.add(
+            matcher.predicted(assessment) if is_valid_assessment(assessment) else None,
+            matcher.expected(resume["skills"]),
+        )
+
+    metrics = llm.metrics()
+    return {
+        "tasks": tasks_score.to_dict(),
+        "resumes": resumes_score.to_dict(),
+        "tokens_per_second": metrics["throughput"]["tokens_per_second"],
+        "latency_p50_s": percentile(latencies, 0.5),
+        "latency_p95_s": percentile(latencies, 0.95),
+    }
+
+
+def load_prompts(path: str | None) -> tuple[str, dict[str, str] | None]:
+    """Версия промптов: JSON {"version": ..., "tasks": ..., "executor": ...}"""
+    if path is None:
+        return "builtin", None
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    prompts = {key: data[key] for key in ("tasks", "executor") if key in data}
+    return data.get("version", Path(path).stem), prompts
+
+
+def create_interface(args, model: str, prompts: dict[str, str] | None):
+    # llm_interface перенаправляет stdout/stderr в лог, отчет печатаем в исходные потоки
+    stdout, stderr = sys.stdout, sys.stderr
+    try:
+        from services.llm_interface import LlamaModelInterface
+        from services.llm_backends import create_backend
+        from services.inference_tuning import load_settings
+
+        backend = create_backend(
+            args.backend,
+            model_path=model,
+            draft_model=args.draft,
+            # Калибровка хоста применяется, только если она сделана для этой модели
+            settings=load_settings(DEFAULT_TUNING_PATH, model) if args.backend == "llama_cpp" else None,
+            server_url=args.server_url,
+            server_model=model,
+        )
+        return LlamaModelInterface(backend, prompts=prompts)
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline evaluation of skill extraction quality and latency"
+    )
+    parser.add_argument("--gold", default=str(DEFAULT_GOLD_PATH), help="Gold set JSON")
+    parser.add_argument(
+        "--model",
+        action="append",
+        default=[],
+        help="GGUF model (or server model name with --backend openai); repeatable",
+    )
+    parser.add_argument(
+        "--prompts",
+        action="append",
+        default=[],
+        help='Prompt version JSON {"version", "tasks", "executor"}; repeatable (default: built-in)',
+    )
+    parser.add_argument("--backend", default="llama_cpp", choices=["llama_cpp", "openai", "stub"])
+    parser.add_argument("--server-url", default="http://127.0.0.1:8080/v1")
+    parser.add_argument("--draft", help='Speculative draft: "prompt_lookup" or a GGUF path')
+    parser.add_argument("--output", help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    gold = json.loads(Path(args.gold).read_text(encoding="utf-8"))
+    matcher = SkillMatcher()
+    models = args.model or [str(DEFAULT_MODEL_PATH) if args.backend == "llama_cpp" else "local"]
+    prompt_versions = [load_prompts(path) for path in args.prompts] or [load_prompts(None)]
+
+    print(
+        f"Gold set v{gold.get('version', '?')}: {len(gold['tasks'])} tasks, {len(gold['resumes'])} resumes"
+    )
+    print(
+        f"  {'model':<40} {'prompts':<10} {'tasks P/R/F1':<17} {'resumes P/R/F1':<17} "
+        f"{'JSON':>5} {'tok/s':>7} {'p50 s':>7} {'p95 s':>7}"
+    )
+    report = []
+    for model in models:
+        for version, prompts in prompt_versions:
+            llm = create_interface(args, model, prompts)
+            result = evaluate(llm, gold, matcher)
+            report.append({"model": model, "prompts": version, **result})
+
+            tasks, resumes = result["tasks"], result["resumes"]
+            valid_rate = (
+                tasks["json_valid_rate"] * tasks["items"] + resumes["json_valid_rate"] * resumes["items"]
+            ) / (tasks["items"] + resumes["items"])
+            print(
+                f"  {Path(model).name[:40]:<40} {version[:10]:<10} "
+                f"{tasks['precision']:.2f}/{tasks['recall']:.2f}/{tasks['f1']:.2f}    "
+                f"{resumes['precision']:.2f}/{resumes['recall']:.2f}/{resumes['f1']:.2f}    "
+                f"{valid_rate:5.0%} {result['tokens_per_second']:7.1f} "
+                f"{result['latency_p50_s']:7.2f} {result['latency_p95_s']:7.2f}"
+            )
+            del llm
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
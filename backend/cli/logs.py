@@ -1,6 +1,38 @@
 import argparse
+import copy
+import json
+import os
+import re
+import time
+from collections import deque
 from pathlib import Path
 from datetime import datetime, timedelta
+from typing import Iterator
+
+# Совпадает с backupCount у RotatingFileHandler в src/logger.py
+BACKUP_COUNT = 5
+BLOCK_SIZE = 64 * 1024
+TIMESTAMP_LEN = 19
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+JSON_TS_PREFIX = b'{"ts": "'
+
+# Логи, которые отслеживаются в режиме --follow при --type all, даже если еще не созданы
+FOLLOW_DEFAULT_FILES = ["backend.log", "llm.log", "allocator.log"]
+# Интервал проверки ротации (и опроса, если watchfiles недоступен), секунды
+FOLLOW_POLL_INTERVAL = 1.0
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+# Текстовые форматы, которые пишут наши логгеры:
+#   "ts - name - LEVEL - [request_id] msg", "ts [LEVEL] [name] [request_id] msg" (llm),
+#   "ts - LEVEL - msg" (startup/build); в старых записях request_id нет
+TEXT_LINE_RE = re.compile(
+    r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\S*"
+    r"(?: - (?P<name>[\w.]+) - (?P<level>[A-Z]+) - "
+    r"| \[(?P<level2>[A-Z]+)\] \[(?P<name2>[\w.]+)\] "
+    r"| - (?P<level3>[A-Z]+) - )"
+    r"(?:\[(?P<request_id>[\w.:-]+)\] )?"
+)
 
 
 def get_log_file(log_type: str) -> Path:
@@ -25,7 +57,383 @@ def get_log_file(log_type: str) -> Path:
     return log_dir / log_files[log_type]
 
 
+def get_log_chain(log_path: Path) -> list[Path]:
+    """Лог и его ротированные копии (.5 ... .1) от самой старой к самой новой"""
+    backups = [
+        log_path.with_name(f"{log_path.name}.{index}")
+        for index in range(BACKUP_COUNT, 0, -1)
+    ]
+    return [path for path in backups + [log_path] if path.exists()]
+
+
+def line_timestamp(line: bytes) -> str | None:
+    # Метки времени сравниваются как строки: формат "YYYY-MM-DD HH:MM:SS"
+    # упорядочен лексикографически, поэтому strptime на каждой строке не нужен
+    if line.startswith(JSON_TS_PREFIX):
+        ts = line[len(JSON_TS_PREFIX):len(JSON_TS_PREFIX) + TIMESTAMP_LEN]
+    else:
+        ts = line[:TIMESTAMP_LEN]
+
+    if (
+        len(ts) == TIMESTAMP_LEN
+        and ts[4:5] == b"-"
+        and ts[10:11] == b" "
+        and ts[:4].isdigit()
+    ):
+        return ts.decode("ascii")
+    return None
+
+
+def is_record_start(line: str) -> bool:
+    """Первая строка записи; строки без заголовка (traceback) продолжают предыдущую"""
+    return line.startswith('{"') or TEXT_LINE_RE.match(line) is not None
+
+
+def parse_entry(line: str) -> dict:
+    if line.startswith("{"):
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            pass
+
+    match = TEXT_LINE_RE.match(line)
+    if not match:
+        return {}
+    entry = {
+        "logger": match["name"] or match["name2"],
+        "level": match["level"] or match["level2"] or match["level3"],
+    }
+    if match["request_id"]:
+        # "-" - запись вне HTTP-запроса
+        entry["request_id"] = None if match["request_id"] == "-" else match["request_id"]
+    return entry
+
+
+class LogFilter:
+    """Фильтр записей. Строки продолжения (traceback) получают решение своей записи,
+    поэтому строки одного файла передаются в matches по порядку.
+    """
+
+    def __init__(
+        self,
+        logger: str | None = None,
+        level: str | None = None,
+        request_id: str | None = None,
+    ):
+        self.logger = logger
+        self.min_level = LEVELS.get(level.upper(), 0) if level else 0
+        self.request_id = request_id
+        self.last_matched = False
+
+    def __bool__(self) -> bool:
+        return bool(self.logger or self.min_level or self.request_id)
+
+    def matches(self, line: str) -> bool:
+        if not self:
+            return True
+        if not is_record_start(line):
+            return self.last_matched
+
+        self.last_matched = self.record_matches(line)
+        return self.last_matched
+
+    def record_matches(self, line: str) -> bool:
+        # Быстрый отсев до разбора строки
+        if self.request_id and self.request_id not in line:
+            return False
+
+        entry = parse_entry(line)
+        if self.logger and not (entry.get("logger") or "").startswith(self.logger):
+            return False
+        if self.min_level and LEVELS.get(entry.get("level"), 0) < self.min_level:
+            return False
+        if self.request_id and entry.get("request_id", self.request_id) != self.request_id:
+            return False
+        return True
+
+
+def build_filter(args) -> LogFilter:
+    return LogFilter(
+        getattr(args, "logger", None),
+        getattr(args, "level", None),
+        getattr(args, "request_id", None),
+    )
+
+
+def read_reverse_lines(path: Path, block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """Строки файла с конца, блоками фиксированного размера"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b"\n")
+            # Первая строка блока может быть неполной - дочитаем ее со следующим блоком
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.rstrip(b"\r")
+
+        if remainder:
+            yield remainder.rstrip(b"\r")
+
+
+def _aligned_offset(f, offset: int) -> int:
+    # Начало первой строки, которая начинается не раньше offset
+    if offset == 0:
+        return 0
+    f.seek(offset - 1)
+    f.readline()
+    return f.tell()
+
+
+def find_since_offset(f, since: str) -> int:
+    """Бинарный поиск смещения первой строки с меткой времени >= since"""
+    f.seek(0, os.SEEK_END)
+    low, high = 0, f.tell()
+
+    while low < high:
+        mid = (low + high) // 2
+        f.seek(_aligned_offset(f, mid))
+
+        # Строки без метки времени (traceback и т.п.) пропускаем
+        ts = None
+        for line in f:
+            ts = line_timestamp(line)
+            if ts is not None:
+                break
+
+        if ts is None or ts >= since:
+            high = mid
+        else:
+            low = mid + 1
+
+    return _aligned_offset(f, low)
+
+
+def tail_lines(paths: list[Path], count: int, log_filter: LogFilter) -> list[str]:
+    result = []
+    # При чтении с конца строки продолжения идут раньше заголовка своей записи
+    continuation = []
+    for path in reversed(paths):
+        for raw_line in read_reverse_lines(path):
+            line = raw_line.decode("utf-8", errors="replace")
+            if log_filter and not is_record_start(line):
+                continuation.append(line)
+                continue
+
+            if log_filter.matches(line):
+                result.extend(continuation)
+                result.append(line)
+                if len(result) >= count:
+                    return result[:count][::-1]
+            continuation = []
+    return result[::-1]
+
+
+def iter_lines(
+    paths: list[Path], log_filter: LogFilter, since: str | None = None
+) -> Iterator[str]:
+    for path in paths:
+        with open(path, "rb") as f:
+            if since:
+                f.seek(find_since_offset(f, since))
+            for raw_line in f:
+                line = raw_line.rstrip(b"\r\n").decode("utf-8", errors="replace")
+                if line and log_filter.matches(line):
+                    yield line
+
+
+def query_log(log_path: Path, args) -> Iterator[str]:
+    paths = get_log_chain(log_path)
+    log_filter = build_filter(args)
+    since = None
+    if args.since:
+        since = (datetime.now() - timedelta(hours=args.since)).strftime(TIMESTAMP_FORMAT)
+
+    if args.tail and not since:
+        yield from tail_lines(paths, args.tail, log_filter)
+    elif args.tail:
+        yield from deque(iter_lines(paths, log_filter, since), maxlen=args.tail)
+    else:
+        yield from iter_lines(paths, log_filter, since)
+
+
+class FollowedFile:
+    """Отслеживаемый лог; файл открывается заново на каждое чтение.
+
+    Между чтениями дескриптор не держится: на Windows открытый файл не дает
+    RotatingFileHandler переименовать лог при ротации (PermissionError).
+    Ротация определяется по смене (st_dev, st_ino), хвост старого файла дочитывается
+    из первой ротированной копии. Если за один интервал опроса лог ротировался
+    несколько раз, записи промежуточных копий не выводятся.
+    """
+
+    def __init__(self, path: Path, from_end: bool = True):
+        self.path = path
+        self.file_id = None
+        self.offset = 0
+        self.buffer = b""
+        self.reset(from_end)
+
+    def reset(self, from_end: bool) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.file_id = None
+            self.offset = 0
+            return
+
+        self.file_id = (stat.st_dev, stat.st_ino)
+        self.offset = stat.st_size if from_end else 0
+
+    def __read(self, path: Path) -> bytes:
+        """Дописанное с прошлого чтения, если по пути лежит тот же файл"""
+        try:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                if (stat.st_dev, stat.st_ino) != self.file_id:
+                    # Ротация между os.stat и открытием - дочитаем при следующей проверке
+                    return b""
+                f.seek(self.offset)
+                data = f.read()
+        except FileNotFoundError:
+            return b""
+        self.offset += len(data)
+        return data
+
+    def __split(self, data: bytes) -> list[str]:
+        if not data:
+            return []
+
+        lines = (self.buffer + data).split(b"\n")
+        # Последняя строка может быть дописана не полностью
+        self.buffer = lines.pop()
+        return [
+            line.rstrip(b"\r").decode("utf-8", errors="replace")
+            for line in lines
+            if line
+        ]
+
+    def check_rotation(self) -> list[str]:
+        """Возвращает строки, дописанные в старый файл перед ротацией"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Файл уже переименован, а новый еще не создан
+            return []
+
+        if self.file_id is None:
+            self.reset(from_end=False)
+            return []
+
+        if (stat.st_dev, stat.st_ino) != self.file_id:
+            # RotatingFileHandler переименовал файл в .1: дочитываем его и переходим к новому
+            tail = self.__split(self.__read(self.path.with_name(f"{self.path.name}.1")))
+            if self.buffer:
+                tail.append(self.buffer.decode("utf-8", errors="replace"))
+                self.buffer = b""
+            self.file_id = (stat.st_dev, stat.st_ino)
+            self.offset = 0
+            return tail
+
+        if stat.st_size < self.offset:
+            # Файл усечен (например, clear_log_files при старте)
+            self.offset = 0
+            self.buffer = b""
+        return []
+
+    def read_new_lines(self) -> list[str]:
+        if self.file_id is None:
+            return []
+        return self.__split(self.__read(self.path))
+
+
+def wait_for_changes(paths: list[Path], poll_interval: float) -> Iterator[None]:
+    """Срабатывает при изменении отслеживаемых файлов или по таймауту"""
+    try:
+        from watchfiles import watch
+    except ImportError:
+        # Без watchfiles опрашиваем только os.stat и хвост файла, файлы целиком не читаются
+        while True:
+            time.sleep(poll_interval)
+            yield
+        return
+
+    names = {path.name for path in paths}
+    directories = {str(path.parent) for path in paths}
+    for _ in watch(
+        *directories,
+        watch_filter=lambda change, changed_path: Path(changed_path).name in names,
+        rust_timeout=int(poll_interval * 1000),
+        yield_on_timeout=True,
+        debounce=50,
+    ):
+        yield
+
+
+def follow_logs(
+    paths: list[Path],
+    log_filter: LogFilter,
+    poll_interval: float = FOLLOW_POLL_INTERVAL,
+) -> Iterator[str]:
+    # У каждого файла свой фильтр: строки traceback относятся к записи того же файла
+    followed = [(FollowedFile(path), copy.copy(log_filter)) for path in paths]
+    with_prefix = len(followed) > 1
+
+    for _ in wait_for_changes(paths, poll_interval):
+        for followed_file, file_filter in followed:
+            lines = followed_file.check_rotation()
+            lines.extend(followed_file.read_new_lines())
+            for line in lines:
+                if file_filter.matches(line):
+                    yield f"[{followed_file.path.name}] {line}" if with_prefix else line
+
+
+def get_follow_paths(log_type: str) -> list[Path]:
+    paths = []
+    for name in log_type.split(","):
+        log_path = get_log_file(name.strip())
+        if name.strip() == "all":
+            names = set(FOLLOW_DEFAULT_FILES)
+            names.update(path.name for path in log_path.glob("*.log"))
+            paths.extend(log_path / file_name for file_name in sorted(names))
+        else:
+            paths.append(log_path)
+    return paths
+
+
+def view_follow(args):
+    try:
+        paths = get_follow_paths(args.type)
+    except ValueError as e:
+        print(e)
+        return
+
+    log_filter = build_filter(args)
+
+    # Как tail -f: сначала последние N строк, затем новые записи
+    if args.tail:
+        for path in paths:
+            for line in tail_lines(get_log_chain(path), args.tail, log_filter):
+                print(f"[{path.name}] {line}" if len(paths) > 1 else line)
+
+    try:
+        for line in follow_logs(paths, log_filter):
+            print(line, flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
 def view_logs(args):
+    if getattr(args, "follow", False):
+        view_follow(args)
+        return
+
     try:
         log_path = get_log_file(args.type)
     except ValueError as e:
@@ -42,22 +450,8 @@ def view_logs(args):
         for log_file in sorted(log_files):
             print(f"\n=== {log_file.name} ===")
             try:
-                with open(log_file, "r", encoding="utf-8") as f:
-                    if args.tail:
-                        lines = f.readlines()
-                        for line in lines[-args.tail:]:
-                            print(line.strip())
-                    elif args.since:
-                        since_time = datetime.now() - timedelta(hours=args.since)
-                        for line in f:
-                            try:
-                                log_time = datetime.strptime(line[:19], "%Y-%m-%d %H:%M:%S")
-                                if log_time >= since_time:
-                                    print(line.strip())
-                            except ValueError:
-                                continue
-                    else:
-                        print(f.read())
+                for line in query_log(log_file, args):
+                    print(line)
             except Exception as e:
                 print(f"Error reading {log_file.name}: {e}")
     else:
@@ -67,36 +461,37 @@ def view_logs(args):
             return
 
         try:
-            with open(log_path, "r", encoding="utf-8") as f:
-                if args.tail:
-                    lines = f.readlines()
-                    for line in lines[-args.tail:]:
-                        print(line.strip())
-                elif args.since:
-                    since_time = datetime.now() - timedelta(hours=args.since)
-                    for line in f:
-                        try:
-                            log_time = datetime.strptime(line[:19], "%Y-%m-%d %H:%M:%S")
-                            if log_time >= since_time:
-                                print(line.strip())
-                        except ValueError:
-                            continue
-                else:
-                    print(f.read())
+            for line in query_log(log_path, args):
+                print(line)
         except Exception as e:
             print(f"Error reading logs: {e}")
 
 
+def add_query_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--tail", type=int, help="Show last N lines of log")
+    parser.add_argument("--since", type=int, help="Show logs for the last N hours")
+    parser.add_argument("--logger", type=str, help="Show only records of this logger")
+    parser.add_argument(
+        "--level", type=str, help="Show only records of this level and above"
+    )
+    parser.add_argument(
+        "--request-id", type=str, help="Show only records of this request"
+    )
+    parser.add_argument(
+        "-f", "--follow", action="store_true", help="Output appended records as the logs grow"
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(description="View application logs")
     parser.add_argument(
         "--type",
         type=str,
         default="all",
-        help="Type of logs to view (backend, llm, pocketbase, startup, allocator, matching, all)",
+        help="Type of logs to view (backend, llm, pocketbase, startup, allocator, matching, all). "
+        "With --follow several types can be given separated by commas",
     )
-    parser.add_argument("--tail", type=int, help="Show last N lines of log")
-    parser.add_argument("--since", type=int, help="Show logs for the last N hours")
+    add_query_arguments(parser)
 
     args = parser.parse_args()
     view_logs(args)
@@ -408,6 +408,70 @@ class ServiceManager:
             print(f"{superuser_url}\n")
 
 
+def get_tuning_path() -> Path:
+    return Path(
+        os.getenv("LLAMA_TUNING_PATH", base_dir / "assets" / "tuning" / "inference.json")
+    )
+
+
+def get_model_path() -> str:
+    return str(base_dir / "assets" / "models" / "Mistral-7B-Instruct-v0.3.Q4_K_S.gguf")
+
+
+def add_backend_to_path():
+    backend_dir = (
+        Path(sys.executable).parent / "_internal"
+        if getattr(sys, "frozen", False)
+        else Path(__file__).parent.parent
+    )
+    if str(backend_dir) not in sys.path:
+        sys.path.insert(0, str(backend_dir))
+
+
+def calibrate_inference(only_if_missing: bool = False) -> bool:
+    """Подбор n_threads, n_batch и привязки к процессорам для llama.cpp на этом хосте"""
+    try:
+        add_backend_to_path()
+        from services.inference_tuning import calibrate, load_settings, save_settings
+
+        model_path = get_model_path()
+        tuning_path = get_tuning_path()
+        if only_if_missing and load_settings(tuning_path, model_path) is not None:
+            logger.info(f"Inference settings already calibrated: {tuning_path}")
+            return True
+
+        logger.info("Calibrating inference settings, this may take several minutes...")
+        settings, trials = calibrate(model_path, report=logger.info)
+        save_settings(tuning_path, model_path, settings, trials)
+        logger.info(f"Inference settings saved to {tuning_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Error calibrating inference: {e}", exc_info=True)
+        return False
+
+
+def report_cpu_layout() -> bool:
+    """Выводит распределение процессоров между инференсом и API - так же его применит бэкенд"""
+    try:
+        add_backend_to_path()
+        from services.inference_tuning import load_settings
+        from src.cpu_affinity import CpuLayout
+
+        settings = load_settings(get_tuning_path(), get_model_path())
+        layout = CpuLayout.from_config(
+            llm_cpus=os.getenv("LLAMA_CPUS"),
+            llm_numa_node=int(os.getenv("LLAMA_NUMA_NODE")) if os.getenv("LLAMA_NUMA_NODE") else None,
+            api_cpus=os.getenv("API_CPUS"),
+            calibrated=settings.cpu_affinity if settings else None,
+        )
+        for line in layout.report():
+            logger.info(f"CPU layout: {line}")
+        return True
+    except Exception as e:
+        logger.error(f"Invalid CPU layout: {e}")
+        return False
+
+
 def install_dependencies():
     try:
         # Set environment variables for building llama-cpp-python
@@ -438,9 +502,48 @@ def main():
     )
     parser.add_argument("--tail", type=int, help="Show last N lines of log")
     parser.add_argument("--since", type=int, help="Show logs for the last N hours")
+    parser.add_argument("--logger", type=str, help="Show only records of this logger")
+    parser.add_argument(
+        "--level", type=str, help="Show only records of this level and above"
+    )
+    parser.add_argument(
+        "--request-id", type=str, help="Show only records of this request"
+    )
+    parser.add_argument(
+        "-f", "--follow", action="store_true", help="Output appended records as the logs grow"
+    )
+    parser.add_argument(
+        "--calibrate",
+        action="store_true",
+        help="Benchmark llama.cpp thread counts, batch sizes and CPU affinity, save the best and exit",
+    )
+    parser.add_argument(
+        "--llm-cpus", type=str, help='CPUs for inference threads, e.g. "16-31"'
+    )
+    parser.add_argument(
+        "--llm-numa-node", type=int, help="NUMA node for inference threads"
+    )
+    parser.add_argument(
+        "--api-cpus",
+        type=str,
+        help="CPUs for API and allocation workers (default: CPUs not used by inference)",
+    )
+    parser.add_argument(
+        "--calibrate-on-start",
+        action="store_true",
+        help="Calibrate inference before starting services if this host has no saved settings",
+    )
 
     args = parser.parse_args()
 
+    # Бэкенд запускается в этом же процессе и читает настройки из окружения
+    if args.llm_cpus:
+        os.environ["LLAMA_CPUS"] = args.llm_cpus
+    if args.llm_numa_node is not None:
+        os.environ["LLAMA_NUMA_NODE"] = str(args.llm_numa_node)
+    if args.api_cpus:
+        os.environ["API_CPUS"] = args.api_cpus
+
     if args.install:
         if not install_dependencies():
             return
@@ -451,6 +554,11 @@ def main():
         view_logs(args)
         return
 
+    if args.calibrate:
+        if check_and_download_model():
+            calibrate_inference()
+        return
+
     # Check and download PocketBase
     if not check_and_download_pocketbase():
         logger.error("Failed to prepare PocketBase, exiting...")
@@ -461,6 +569,12 @@ def main():
         logger.error("Failed to prepare LLM model, exiting...")
         return
 
+    if args.calibrate_on_start and not calibrate_inference(only_if_missing=True):
+        logger.warning("Calibration failed, using default inference settings")
+
+    if not report_cpu_layout():
+        return
+
     manager = ServiceManager()
     should_exit = False
 
@@ -1,10 +1,15 @@
 import logging
+import uuid
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from src.logger import setup_logging
+from src.logger import setup_logging, request_id_var
+from src.constants import PB, EXECUTOR_STORE, JOB_MANAGER, CPU_LAYOUT
+from src.cpu_affinity import pin_current_thread
+from src.serialization import add_body_schemas
 
-from routers import auth, matching, analyzer, builds
+from routers import auth, matching, analyzer, builds, jobs
 
 # Настраиваем логирование
 setup_logging()
@@ -12,7 +17,47 @@ setup_logging()
 # Получаем логгер для бэкенда
 logger = logging.getLogger("backend")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Цикл событий и создаваемые из него пулы потоков работают на процессорах API
+    if CPU_LAYOUT.api and not pin_current_thread(CPU_LAYOUT.api):
+        logger.warning("Could not pin API threads to the configured CPUs")
+    for line in CPU_LAYOUT.report():
+        logger.info(f"CPU layout: {line}")
+
+    # Один пул соединений с PocketBase на все время жизни приложения
+    await PB.start()
+    try:
+        await EXECUTOR_STORE.load()
+    except Exception as e:
+        # Профили догрузятся при первом запросе с executor_ids
+        logger.warning(f"Failed to load executor profiles: {e}")
+    # Незавершенные фоновые задания продолжаются после перезапуска
+    await JOB_MANAGER.start()
+    try:
+        yield
+    finally:
+        await JOB_MANAGER.stop()
+        # Несохраненные в снимок изменения профилей пишем до закрытия соединения
+        try:
+            await EXECUTOR_STORE.flush()
+        except Exception as e:
+            logger.warning(f"Failed to flush executor snapshot: {e}")
+        await PB.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def openapi() -> dict:
+    # Тела /match/allocate, /match/what-if и /jobs/allocation разбирает parse_body, их схемы добавляем сами
+    if app.openapi_schema is None:
+        add_body_schemas(FastAPI.openapi(app))
+    return app.openapi_schema
+
+
+app.openapi = openapi
 
 # Настройка CORS
 app.add_middleware(
@@ -28,6 +73,7 @@ app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(matching.router, prefix="/match", tags=["matching"])
 app.include_router(analyzer.router, prefix="/analyze", tags=["analyzer"])
 app.include_router(builds.router, prefix="/build", tags=["builds"])
+app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 
 @app.get("/")
 async def health_check():
@@ -42,9 +88,16 @@ async def health_check():
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    logger.info(f"Request: {request.method} {request.url}")
-    response = await call_next(request)
-    logger.info(f"Response: {request.method} {request.url} - Status: {response.status_code}")
-    return response
+    # Идентификатор запроса попадает в логи и позволяет фильтровать их в cli/logs.py
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:12]
+    token = request_id_var.set(request_id)
+    try:
+        logger.info(f"Request: {request.method} {request.url}")
+        response = await call_next(request)
+        logger.info(f"Response: {request.method} {request.url} - Status: {response.status_code}")
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        request_id_var.reset(token)
 
 
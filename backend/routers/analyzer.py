@@ -1,14 +1,30 @@
-import json
-from fastapi import APIRouter, HTTPException
+import asyncio
+import hashlib
+import logging
+from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from datetime import datetime
 
-from src.constants import LLAMA_INTERFACE
+from src.constants import LLAMA_INTERFACE, EXECUTOR_STORE, EXECUTOR_ANALYSIS_CONCURRENCY, ADMISSION
+from src.admission import LLM_ROUTES, estimate_prompt_tokens
+from src.serialization import dumps_line
+from services.executor_store import ExecutorProfileStore
+from services.inference_scheduler import INTERACTIVE, BULK
+from routers.auth import get_requester_id
 from src.schemas.responses import ResponseTemplate
-from src.schemas.requests import TasksData, ExecutorData, SingleTaskData, TaskAnalysisRequest, ExecutorAnalysisRequest
+from src.schemas.requests import (
+    TasksData,
+    ExecutorData,
+    ExecutorBatchData,
+    SingleTaskData,
+    TaskAnalysisRequest,
+    ExecutorAnalysisRequest,
+)
 
 
 router = APIRouter()
+logger = logging.getLogger("backend")
 
 
 @router.post(
@@ -34,24 +50,39 @@ router = APIRouter()
         ]
     ).create_response(),
 )
-async def analyze_tasks(data: TasksData):
-    try:
-        try:
-            json.dumps(data.model_dump(), ensure_ascii=False)
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Validation error: {str(e)}")
+async def analyze_tasks(data: TasksData, requester: str = Depends(get_requester_id)):
+    if data.reuse_similar and not LLAMA_INTERFACE.reuses_similar:
+        raise HTTPException(
+            status_code=400, detail="reuse_similar is disabled on this server (TASK_DUPLICATE_THRESHOLD=0)"
+        )
+    ADMISSION.admit(
+        LLM_ROUTES,
+        "/analyze/tasks",
+        requester,
+        estimate_prompt_tokens(
+            [task.title + task.description for task in data.task_list], data.project_description
+        ),
+    )
 
+    try:
         async def generate():
             try:
                 task_list = [task.model_dump() for task in data.task_list]
 
-                for result in LLAMA_INTERFACE.analyze_tasks(
-                    data.project_description, task_list
-                ):
-                    yield json.dumps(result, ensure_ascii=False)
+                results = LLAMA_INTERFACE.analyze_tasks(
+                    data.project_description,
+                    task_list,
+                    priority=BULK,
+                    user=requester,
+                    reuse_similar=data.reuse_similar,
+                )
+                # Генератор анализа блокирующий (модель и ожидание планировщика): каждый шаг - в пуле
+                # потоков, чтобы пакетный анализ не останавливал цикл событий и интерактивные запросы
+                async for result in iterate_in_threadpool(results):
+                    yield dumps_line(result)
             except Exception as e:
                 error_response = {"error": str(e), "status": "error"}
-                yield json.dumps(error_response, ensure_ascii=False)
+                yield dumps_line(error_response)
 
         return StreamingResponse(
             generate(),
@@ -84,9 +115,18 @@ async def analyze_tasks(data: TasksData):
         ]
     ).create_response(),
 )
-async def analyze_executor(data: ExecutorData):
+async def analyze_executor(data: ExecutorData, requester: str = Depends(get_requester_id)):
+    ADMISSION.admit(LLM_ROUTES, "/analyze/executor", requester, estimate_prompt_tokens([data.resume]))
+
     try:
-        result = LLAMA_INTERFACE.analyze_executor(data.resume)
+        # Анализ в пуле потоков: одинаковые одновременные запросы объединяются в LlamaModelInterface
+        result = await asyncio.to_thread(
+            LLAMA_INTERFACE.analyze_executor, data.resume, priority=INTERACTIVE, user=requester
+        )
+
+        # Сохраняем профиль, чтобы в /match/allocate можно было передавать только id исполнителя
+        await _store_profile(data, result)
+
         result["name"] = data.name
         result["id"] = data.id
 
@@ -96,6 +136,100 @@ async def analyze_executor(data: ExecutorData):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _resume_hash(resume: str) -> str:
+    # Резюме, отличающиеся только пробелами и переносами строк, считаются одинаковыми
+    return hashlib.sha256(" ".join(resume.split()).encode("utf-8")).hexdigest()
+
+
+async def _store_profile(executor: ExecutorData, assessment: dict) -> None:
+    try:
+        await EXECUTOR_STORE.save(
+            ExecutorProfileStore.from_assessment(executor.id, executor.name, assessment)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to store profile of executor {executor.id}: {e}")
+
+
+@router.post(
+    "/executors",
+    tags=["analyzer"],
+    responses=ResponseTemplate(
+        [
+            {
+                "code": 200,
+                "examples": {
+                    "Success": {
+                        "value": {
+                            "id": "executor_id",
+                            "name": "executor_name",
+                            "soft": {"skill1": "number", "skill2": "number"},
+                            "hard": {"skill3": "number", "skill4": "number"},
+                        },
+                    },
+                },
+            },
+        ]
+    ).create_response(),
+)
+async def analyze_executors(
+    data: ExecutorBatchData, requester: str = Depends(get_requester_id)
+):
+    """Пакетный анализ резюме.
+
+    Одинаковые резюме анализируются один раз, результаты возвращаются
+    NDJSON-строками в порядке готовности.
+    """
+    groups: dict[str, list[ExecutorData]] = {}
+    for executor in data.executors:
+        groups.setdefault(_resume_hash(executor.resume), []).append(executor)
+    logger.info(
+        f"Batch analysis of {len(data.executors)} executors with {len(groups)} unique resumes"
+    )
+    # Дубликаты к модели не попадают и не оплачиваются
+    ADMISSION.admit(
+        LLM_ROUTES,
+        "/analyze/executors",
+        requester,
+        estimate_prompt_tokens([executors[0].resume for executors in groups.values()]),
+    )
+
+    semaphore = asyncio.Semaphore(EXECUTOR_ANALYSIS_CONCURRENCY)
+
+    async def analyze(executors: list[ExecutorData]):
+        async with semaphore:
+            try:
+                assessment = await asyncio.to_thread(
+                    LLAMA_INTERFACE.analyze_executor,
+                    executors[0].resume,
+                    priority=BULK,
+                    user=requester,
+                )
+                return executors, assessment, None
+            except Exception as e:
+                return executors, None, str(e)
+
+    async def generate():
+        tasks = [asyncio.create_task(analyze(executors)) for executors in groups.values()]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                executors, assessment, error = await next_result
+                for executor in executors:
+                    if error is not None:
+                        yield dumps_line(
+                            {"id": executor.id, "name": executor.name, "error": error, "status": "error"}
+                        )
+                        continue
+
+                    await _store_profile(executor, assessment)
+                    yield dumps_line({**assessment, "name": executor.name, "id": executor.id})
+        finally:
+            # Клиент отключился - оставшиеся резюме не анализируем
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.post(
     "/task",
     tags=["analyzer"],
@@ -119,19 +253,24 @@ async def analyze_executor(data: ExecutorData):
         ]
     ).create_response(),
 )
-async def analyze_single_task(data: SingleTaskData):
-    try:
-        try:
-            json.dumps(data.model_dump(), ensure_ascii=False)
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Validation error: {str(e)}")
+async def analyze_single_task(data: SingleTaskData, requester: str = Depends(get_requester_id)):
+    ADMISSION.admit(
+        LLM_ROUTES,
+        "/analyze/task",
+        requester,
+        estimate_prompt_tokens([data.title + data.description], data.project_description),
+    )
 
+    try:
         # Создаем список из одной задачи
         task_list = [data.model_dump()]
 
         # Получаем результат анализа
-        result = next(
-            LLAMA_INTERFACE.analyze_tasks(data.project_description, task_list)
+        result = await asyncio.to_thread(
+            next,
+            LLAMA_INTERFACE.analyze_tasks(
+                data.project_description, task_list, priority=INTERACTIVE, user=requester
+            ),
         )
 
         return result
@@ -140,6 +279,12 @@ async def analyze_single_task(data: SingleTaskData):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/metrics", tags=["analyzer"])
+async def llm_metrics():
+    """Счетчики запросов к модели: выполненные и объединенные с одинаковыми"""
+    return LLAMA_INTERFACE.metrics()
+
+
 @router.post("/analyze/task")
 async def analyze_task(request: TaskAnalysisRequest):
     try:
@@ -1,27 +1,51 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from src.schemas.requests import UserLogin, UserCreate
+from src.schemas.requests import UserLogin, UserCreate, UserRoleUpdate
 from src.schemas.responses import ResponseTemplate
-from src.constants import PB, PocketbaseCollections
-import aiohttp
+from src.constants import PB, AUTH_CACHE, PocketbaseCollections
 
 router = APIRouter()
 security = HTTPBearer()
+# Для открытых маршрутов: токен необязателен
+optional_security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ):
+    token = credentials.credentials
+
+    # Горячий путь: токен уже проверен, обращения к PocketBase нет
+    user = AUTH_CACHE.get(token)
+    if user is not None:
+        return user
+
     try:
-        async with aiohttp.ClientSession() as client:
-            user = await PB.verify_auth(credentials.credentials, client)
-            return user
+        claims = AUTH_CACHE.decode(token)
+        # Подпись проверяет PocketBase: токен подписан ключом записи пользователя
+        user = await PB.verify_auth(token)
+        AUTH_CACHE.put(token, user, claims)
+        return user
     except Exception as e:
         raise HTTPException(
             status_code=401, detail="Invalid authentication credentials"
         )
 
 
+async def get_requester_id(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_security),
+) -> str:
+    """Кому засчитывать нагрузку: пользователю с действительным токеном, иначе адресу клиента"""
+    if credentials is not None:
+        try:
+            user = await get_current_user(credentials)
+            return f"user:{user['id']}"
+        except HTTPException:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
 @router.post(
     "/init",
     tags=["auth"],
@@ -48,41 +72,38 @@ async def get_current_user(
 )
 async def initialize_system():
     try:
-        async with aiohttp.ClientSession() as client:
-            users = await PB.fetch_records(PocketbaseCollections.USERS, client)
-            if users["items"]:
-                raise HTTPException(
-                    status_code=400, detail="System already initialized with super user"
-                )
-
-            admin_data = {
-                "email": "admin@example.com",
-                "password": "admin123",
-                "passwordConfirm": "admin123",
-                "name": "Admin",
-                "role": "admin",
-            }
-
-            result = await PB.create_record(
-                PocketbaseCollections.USERS, admin_data, client
+        users = await PB.fetch_records(PocketbaseCollections.USERS)
+        if users["items"]:
+            raise HTTPException(
+                status_code=400, detail="System already initialized with super user"
             )
 
-            auth_data = {
-                "email": admin_data["email"],
-                "password": admin_data["password"],
-            }
-
-            auth_result = await PB.authenticate(auth_data, client)
-
-            return {
-                "token": auth_result["token"],
-                "user": {
-                    "id": result["id"],
-                    "email": result["email"],
-                    "name": result["name"],
-                    "role": result["role"],
-                },
-            }
+        admin_data = {
+            "email": "admin@example.com",
+            "password": "admin123",
+            "passwordConfirm": "admin123",
+            "name": "Admin",
+            "role": "admin",
+        }
+
+        result = await PB.create_record(PocketbaseCollections.USERS, admin_data)
+
+        auth_data = {
+            "email": admin_data["email"],
+            "password": admin_data["password"],
+        }
+
+        auth_result = await PB.authenticate(auth_data)
+
+        return {
+            "token": auth_result["token"],
+            "user": {
+                "id": result["id"],
+                "email": result["email"],
+                "name": result["name"],
+                "role": result["role"],
+            },
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -118,33 +139,31 @@ async def register_user(
         raise HTTPException(status_code=403, detail="Only admins can create new users")
 
     try:
-        async with aiohttp.ClientSession() as client:
-            # Создаем пользователя
-            result = await PB.create_record(
-                PocketbaseCollections.USERS,
-                {
-                    "email": user_data.email,
-                    "password": user_data.password,
-                    "passwordConfirm": user_data.password,
-                    "name": user_data.name,
-                    "role": user_data.role,
-                },
-                client,
-            )
+        # Создаем пользователя
+        result = await PB.create_record(
+            PocketbaseCollections.USERS,
+            {
+                "email": user_data.email,
+                "password": user_data.password,
+                "passwordConfirm": user_data.password,
+                "name": user_data.name,
+                "role": user_data.role,
+            },
+        )
 
-            auth_data = {"email": user_data.email, "password": user_data.password}
+        auth_data = {"email": user_data.email, "password": user_data.password}
 
-            auth_result = await PB.authenticate(auth_data, client)
+        auth_result = await PB.authenticate(auth_data)
 
-            return {
-                "token": auth_result["token"],
-                "user": {
-                    "id": result["id"],
-                    "email": result["email"],
-                    "name": result["name"],
-                    "role": result["role"],
-                },
-            }
+        return {
+            "token": auth_result["token"],
+            "user": {
+                "id": result["id"],
+                "email": result["email"],
+                "name": result["name"],
+                "role": result["role"],
+            },
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -175,23 +194,50 @@ async def register_user(
 )
 async def login(user_data: UserLogin):
     try:
-        async with aiohttp.ClientSession() as client:
-            auth_result = await PB.authenticate(
-                {"email": user_data.email, "password": user_data.password}, client
-            )
+        auth_result = await PB.authenticate(
+            {"email": user_data.email, "password": user_data.password})
+
+        user = await PB.fetch_record(
+            PocketbaseCollections.USERS, auth_result["record"]["id"])
+
+        return {
+            "token": auth_result["token"],
+            "user": {
+                "id": user["id"],
+                "email": user["email"],
+                "name": user["name"],
+                "role": user["role"],
+            },
+        }
+    except Exception as e:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
 
-            user = await PB.fetch_record(
-                PocketbaseCollections.USERS, auth_result["record"]["id"], client
-            )
 
-            return {
-                "token": auth_result["token"],
-                "user": {
-                    "id": user["id"],
-                    "email": user["email"],
-                    "name": user["name"],
-                    "role": user["role"],
-                },
-            }
+@router.post("/logout", tags=["auth"])
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(get_current_user),
+):
+    # Отозвать можно только действительный токен, которым вызван выход
+    AUTH_CACHE.revoke(credentials.credentials)
+    return {"status": "ok"}
+
+
+@router.patch("/users/{user_id}/role", tags=["auth"])
+async def update_user_role(
+    user_id: str,
+    role_data: UserRoleUpdate,
+    current_user: dict = Depends(get_current_user),
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can change roles")
+
+    try:
+        user = await PB.update_record(
+            PocketbaseCollections.USERS, user_id, role=role_data.role
+        )
+        # Закэшированные записи пользователя содержат старую роль
+        AUTH_CACHE.invalidate_user(user_id)
+        return {"id": user["id"], "role": user["role"]}
     except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from fastapi import APIRouter, HTTPException, Query, Request, Depends
+from fastapi.responses import StreamingResponse
+from src.constants import EXECUTOR_STORE, JOB_MANAGER, ADMISSION, LLAMA_INTERFACE
+from src.admission import (
+    LLM_ROUTES,
+    ALLOCATION_ROUTES,
+    estimate_prompt_tokens,
+    estimate_allocation_cost,
+)
+from src.serialization import body_openapi, dumps, parse_body
+from services.job_manager import ALLOCATION, ANALYSIS, public_job
+from routers.auth import get_requester_id, get_current_user
+from src.schemas.requests import (
+    AllocationRequest,
+    TasksData,
+    JobResponse,
+    JobListResponse,
+    JobResultsResponse,
+)
+
+router = APIRouter()
+logger = logging.getLogger("backend")
+
+
+@router.post(
+    "/allocation",
+    response_model=JobResponse,
+    status_code=202,
+    openapi_extra=body_openapi(AllocationRequest),
+)
+async def submit_allocation_job(
+    request: Request,
+    requester: str = Depends(get_requester_id),
+    current_user: dict = Depends(get_current_user),
+):
+    """Фоновое распределение; тело - как у /match/allocate"""
+    data = await parse_body(request, AllocationRequest)
+    if not data.tasks or not (data.executors or data.executor_ids):
+        raise HTTPException(status_code=400, detail="Tasks and executors lists cannot be empty")
+    ADMISSION.admit(
+        ALLOCATION_ROUTES,
+        "/jobs/allocation",
+        requester,
+        estimate_allocation_cost(len(data.tasks), len(data.executors) + len(data.executor_ids)),
+    )
+
+    try:
+        # Профили по id раскрываем сразу: задание должно выполниться и после перезапуска
+        tasks, executors, missing = await EXECUTOR_STORE.resolve(
+            data.tasks, data.executors, data.executor_ids
+        )
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Unknown executor ids: {', '.join(missing)}")
+
+        payload = {
+            "tasks": [task.model_dump(mode="json") for task in tasks],
+            "executors": [executor.model_dump(mode="json") for executor in executors],
+            "time_budget_ms": data.time_budget_ms,
+        }
+        job = await JOB_MANAGER.submit(ALLOCATION, payload, total=len(tasks), owner=current_user["id"])
+        return public_job(job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error submitting allocation job: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/analysis", response_model=JobResponse, status_code=202)
+async def submit_analysis_job(
+    data: TasksData,
+    requester: str = Depends(get_requester_id),
+    current_user: dict = Depends(get_current_user),
+):
+    """Фоновый анализ задач; тело - как у /analyze/tasks"""
+    if not data.task_list:
+        raise HTTPException(status_code=400, detail="Task list cannot be empty")
+    if data.reuse_similar and not LLAMA_INTERFACE.reuses_similar:
+        raise HTTPException(
+            status_code=400, detail="reuse_similar is disabled on this server (TASK_DUPLICATE_THRESHOLD=0)"
+        )
+    ADMISSION.admit(
+        LLM_ROUTES,
+        "/jobs/analysis",
+        requester,
+        estimate_prompt_tokens(
+            [task.title + task.description for task in data.task_list], data.project_description
+        ),
+    )
+
+    try:
+        payload = {**data.model_dump(), "requester": requester}
+        job = await JOB_MANAGER.submit(ANALYSIS, payload, total=len(data.task_list), owner=current_user["id"])
+        return public_job(job)
+
+    except Exception as e:
+        logger.error(f"Error submitting analysis job: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("", response_model=JobListResponse)
+async def list_jobs(
+    limit: int = Query(default=50, ge=1, le=500),
+    current_user: dict = Depends(get_current_user),
+):
+    """Задания текущего пользователя; администратор видит все"""
+    owner = None if current_user["role"] == "admin" else current_user["id"]
+    jobs = await asyncio.to_thread(JOB_MANAGER.store.recent, limit, owner)
+    return {"jobs": [public_job(job) for job in jobs]}
+
+
+async def _get_job(job_id: str, user: dict) -> dict:
+    job = await asyncio.to_thread(JOB_MANAGER.store.get, job_id)
+    # Чужое задание неотличимо от несуществующего; администратору доступны все
+    if job is None or (user["role"] != "admin" and job["owner"] != user["id"]):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    return public_job(await _get_job(job_id, current_user))
+
+
+@router.get("/{job_id}/results", response_model=JobResultsResponse)
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(default=0, ge=0),
+    limit: int | None = Query(default=None, ge=1),
+    current_user: dict = Depends(get_current_user),
+):
+    """Готовые результаты; для анализа доступны и до завершения задания"""
+    job = await _get_job(job_id, current_user)
+    response = {"job": public_job(job)}
+    if job["kind"] == ANALYSIS:
+        response["items"] = await asyncio.to_thread(JOB_MANAGER.store.items, job_id, offset, limit)
+    elif job["result"] is not None:
+        response["allocation"] = job["result"]["allocation"]
+    return response
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Прогресс задания в формате Server-Sent Events"""
+    await _get_job(job_id, current_user)
+
+    async def generate():
+        async for event in JOB_MANAGER.subscribe(job_id):
+            yield b"data: " + dumps(event) + b"\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.post("/{job_id}/resume", response_model=JobResponse)
+async def resume_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Повторный запуск прерванного или завершившегося ошибкой задания.
+
+    Анализ продолжается с первой необработанной задачи.
+    """
+    await _get_job(job_id, current_user)
+    job = await JOB_MANAGER.resume(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return public_job(job)
@@ -1,8 +1,30 @@
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from src.logger import setup_logging
-from services.task_allocator import TaskAllocator
-from src.schemas.requests import AllocationRequest, AllocationResponse
+from src.constants import EXECUTOR_STORE, ADMISSION, TASK_ALLOCATOR
+from src.admission import ALLOCATION_ROUTES, estimate_allocation_cost
+from src.serialization import body_openapi, dumps_line, negotiate_response, parse_body
+from services.task_allocator import StreamingAllocation
+from services.recommender import Recommender
+from services.what_if import WhatIfEvaluator
+from routers.auth import get_requester_id
+from src.schemas.requests import (
+    AllocationRequest,
+    AllocationResponse,
+    TaskWithSkills,
+    ExecutorWithSkills,
+    AllocationStreamRecord,
+    TaskStreamRecord,
+    ExecutorStreamRecord,
+    ExecutorRecommendationRequest,
+    TaskRecommendationRequest,
+    RecommendationResponse,
+    WhatIfRequest,
+    WhatIfResponse,
+)
 
 # Настраиваем логирование
 setup_logging()
@@ -11,19 +33,61 @@ setup_logging()
 logger = logging.getLogger("matching_router")
 
 router = APIRouter()
-task_allocator = TaskAllocator()
+task_allocator = TASK_ALLOCATOR
+recommender = Recommender(task_allocator)
+what_if_evaluator = WhatIfEvaluator(task_allocator)
+
+stream_record_adapter = TypeAdapter(AllocationStreamRecord)
+
+# Сколько задач потока распределяется за один переход в пул потоков
+STREAM_BATCH_SIZE = 64
+
+@router.post("/allocate", response_model=AllocationResponse, openapi_extra=body_openapi(AllocationRequest))
+async def allocate_tasks(request: Request, requester: str = Depends(get_requester_id)):
+    """Тело - AllocationRequest в JSON или msgpack (Content-Type: application/x-msgpack).
+
+    Ответ в msgpack, если он указан в Accept.
+    """
+    data = await parse_body(request, AllocationRequest)
+    ADMISSION.admit(
+        ALLOCATION_ROUTES,
+        "/match/allocate",
+        requester,
+        estimate_allocation_cost(len(data.tasks), len(data.executors) + len(data.executor_ids)),
+    )
 
-@router.post("/allocate", response_model=AllocationResponse)
-async def allocate_tasks(data: AllocationRequest):
     try:
-        logger.info(f"Received allocation request for {len(data.tasks)} tasks and {len(data.executors)} executors")
+        logger.info(
+            f"Received allocation request for {len(data.tasks)} tasks, {len(data.executors)} executors "
+            f"and {len(data.executor_ids)} stored executors"
+        )
         
-        if not data.tasks or not data.executors:
+        if not data.tasks or not (data.executors or data.executor_ids):
             logger.warning("Empty tasks or executors list received")
             raise HTTPException(status_code=400, detail="Tasks and executors lists cannot be empty")
         
-        # Распределяем задачи
-        allocation = task_allocator.allocate_tasks(data.tasks, data.executors)
+        # Только сохраненные исполнители: оценки считаются прямо по массивам снимка профилей
+        skill_matrix = None
+        if data.executor_ids and not data.executors:
+            skill_matrix = await EXECUTOR_STORE.skill_matrix(data.executor_ids)
+        if skill_matrix is not None:
+            tasks = [EXECUTOR_STORE.normalize_task(task) for task in data.tasks]
+            executors = None
+        else:
+            tasks, executors, missing = await EXECUTOR_STORE.resolve(
+                data.tasks, data.executors, data.executor_ids
+            )
+            if missing:
+                raise HTTPException(status_code=404, detail=f"Unknown executor ids: {', '.join(missing)}")
+        
+        # Распределяем задачи в пуле потоков: состояние распределения не разделяется между запросами
+        allocation = await run_in_threadpool(
+            task_allocator.allocate_tasks,
+            tasks,
+            executors,
+            time_budget_ms=data.time_budget_ms,
+            skill_matrix=skill_matrix,
+        )
         
         # Преобразуем результат в формат, ожидаемый фронтендом
         result = {}
@@ -32,8 +96,223 @@ async def allocate_tasks(data: AllocationRequest):
                 result[task.id] = executor_id
         
         logger.info("Task allocation completed successfully")
-        return {"allocation": result}
+        return negotiate_response(request, {"allocation": result})
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during task allocation: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse для ответа, который пишется во время чтения тела запроса.
+
+    Стандартный StreamingResponse параллельно ждет http.disconnect через receive
+    и тем самым забирает у генератора фрагменты тела, поэтому здесь ответ
+    только отправляется.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def _iter_ndjson(request: Request):
+    """Строки NDJSON из тела запроса по мере поступления: (номер строки, строка)"""
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+@router.post("/allocate/stream")
+async def allocate_tasks_stream(request: Request, requester: str = Depends(get_requester_id)):
+    """Потоковое распределение.
+
+    Тело - NDJSON: сначала записи {"type": "executor", ...} или
+    {"type": "executor_id", "id": ...}, затем {"type": "task", ...}.
+    Ответ - NDJSON с назначениями {"type": "assignment", "task_id", "executor_id"}
+    в порядке поступления задач, ошибками разбора {"type": "error", "line", "error"}
+    и итоговой записью {"type": "summary", ...}.
+    """
+
+    async def generate():
+        executors: list[ExecutorWithSkills] = []
+        executor_ids: list[str] = []
+        allocation: StreamingAllocation | None = None
+        pending: list[TaskWithSkills] = []
+
+        async def start_allocation() -> StreamingAllocation:
+            nonlocal executors
+            if executor_ids:
+                stored_executors, missing = await EXECUTOR_STORE.get_many(executor_ids)
+                if missing:
+                    raise ValueError(f"Unknown executor ids: {', '.join(missing)}")
+                executors += stored_executors
+            if not executors:
+                raise ValueError("Executors must be sent before tasks")
+            logger.info(f"Started streaming allocation for {len(executors)} executors")
+            return StreamingAllocation(task_allocator, executors)
+
+        async def flush_pending():
+            # Ответ уже начат, поэтому при исчерпании лимита поток притормаживается, а не отклоняется
+            await ADMISSION.throttle(
+                ALLOCATION_ROUTES,
+                "/match/allocate/stream",
+                requester,
+                estimate_allocation_cost(len(pending), len(allocation.context.executors)),
+            )
+            # Пачка задач распределяется одним вызовом в пуле потоков
+            results = await run_in_threadpool(allocation.allocate, pending)
+            pending.clear()
+            return [
+                dumps_line({"type": "assignment", "task_id": task_id, "executor_id": executor_id})
+                for task_id, executor_id in results
+            ]
+
+        try:
+            async for line_number, line in _iter_ndjson(request):
+                try:
+                    record = stream_record_adapter.validate_json(line)
+                except ValidationError as e:
+                    # Некорректная строка не прерывает поток: сообщаем о ней и читаем дальше
+                    yield dumps_line({"type": "error", "line": line_number, "error": str(e)})
+                    continue
+
+                if isinstance(record, TaskStreamRecord):
+                    if allocation is None:
+                        allocation = await start_allocation()
+                    # Навыки нормализуются так же, как в сохраненных профилях и в /allocate
+                    pending.append(EXECUTOR_STORE.normalize_task(record))
+                elif allocation is not None:
+                    raise ValueError("Executors must be sent before tasks")
+                elif isinstance(record, ExecutorStreamRecord):
+                    executors.append(EXECUTOR_STORE.normalize_executor(record))
+                else:
+                    executor_ids.append(record.id)
+
+                # Назначения отдаем, как только набралась пачка задач
+                if len(pending) >= STREAM_BATCH_SIZE:
+                    for result_line in await flush_pending():
+                        yield result_line
+
+            if allocation is None:
+                raise ValueError("No tasks received")
+            if pending:
+                for result_line in await flush_pending():
+                    yield result_line
+
+            yield dumps_line({"type": "summary", **allocation.finish()})
+
+        except Exception as e:
+            logger.error(f"Error during streaming allocation: {str(e)}", exc_info=True)
+            yield dumps_line({"type": "error", "error": str(e)})
+
+    return DuplexStreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.post("/recommend/executors", response_model=RecommendationResponse)
+async def recommend_executors(
+    data: ExecutorRecommendationRequest, requester: str = Depends(get_requester_id)
+):
+    """Без executors в запросе исполнители подбираются из хранилища профилей"""
+    try:
+        if not data.executors:
+            await EXECUTOR_STORE.ensure_loaded()
+        ADMISSION.admit(
+            ALLOCATION_ROUTES,
+            "/match/recommend/executors",
+            requester,
+            estimate_allocation_cost(1, len(data.executors) or len(EXECUTOR_STORE)),
+        )
+
+        # Построение индекса для большого списка исполнителей не должно блокировать event loop
+        if data.executors:
+            recommendations = await run_in_threadpool(
+                recommender.top_executors,
+                EXECUTOR_STORE.normalize_task(data.task),
+                [EXECUTOR_STORE.normalize_executor(executor) for executor in data.executors],
+                data.k,
+            )
+        else:
+            # Сохраненные профили нормализованы, к тем же названиям приводим навыки задачи
+            recommendations = await run_in_threadpool(
+                recommender.top_stored_executors,
+                EXECUTOR_STORE.normalize_task(data.task),
+                EXECUTOR_STORE,
+                data.k,
+            )
+        return {"recommendations": recommendations}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during executor recommendation: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/recommend/tasks", response_model=RecommendationResponse)
+async def recommend_tasks(data: TaskRecommendationRequest, requester: str = Depends(get_requester_id)):
+    if not data.tasks:
+        raise HTTPException(status_code=400, detail="Tasks list cannot be empty")
+    ADMISSION.admit(
+        ALLOCATION_ROUTES,
+        "/match/recommend/tasks",
+        requester,
+        estimate_allocation_cost(len(data.tasks), 1),
+    )
+
+    try:
+        recommendations = await run_in_threadpool(
+            recommender.top_tasks,
+            EXECUTOR_STORE.normalize_executor(data.executor),
+            [EXECUTOR_STORE.normalize_task(task) for task in data.tasks],
+            data.k,
+        )
+        return {"recommendations": recommendations}
+
+    except Exception as e:
+        logger.error(f"Error during task recommendation: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/what-if", response_model=WhatIfResponse, openapi_extra=body_openapi(WhatIfRequest))
+async def evaluate_weights(request: Request, requester: str = Depends(get_requester_id)):
+    """Тело и ответ - как у /allocate: JSON или msgpack"""
+    data = await parse_body(request, WhatIfRequest)
+    ADMISSION.admit(
+        ALLOCATION_ROUTES,
+        "/match/what-if",
+        requester,
+        # Каждая конфигурация - отдельное распределение
+        estimate_allocation_cost(len(data.tasks), len(data.executors)) * max(1, len(data.configurations)),
+    )
+
+    if not data.tasks or not data.executors:
+        raise HTTPException(status_code=400, detail="Tasks and executors lists cannot be empty")
+
+    try:
+        logger.info(
+            f"Received what-if request for {len(data.configurations)} configurations, "
+            f"{len(data.tasks)} tasks and {len(data.executors)} executors"
+        )
+        results = await run_in_threadpool(
+            what_if_evaluator.evaluate,
+            [EXECUTOR_STORE.normalize_task(task) for task in data.tasks],
+            [EXECUTOR_STORE.normalize_executor(executor) for executor in data.executors],
+            [configuration.model_dump() for configuration in data.configurations],
+        )
+        return negotiate_response(request, {"results": results})
+
+    except Exception as e:
+        logger.error(f"Error during what-if evaluation: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
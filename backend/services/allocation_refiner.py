@@ -0,0 +1,144 @@
+import random
+import time
+import numpy as np
+
+
+class LocalSearchRefiner:
+    """Anytime-улучшение жадного распределения перестановками задач.
+
+    Работает по заранее посчитанной матрице статических оценок (навыки + опыт) T x E
+    и на каждом шаге пробует перенести задачу к другому исполнителю или обменять
+    две задачи между исполнителями. Принимаются только улучшающие ходы, поэтому
+    текущее решение всегда лучшее из найденных и поиск можно прервать в любой момент.
+
+    Целевая функция - сумма оценок соответствия по назначенным задачам, где вклад
+    загрузки исполнителя с c задачами равен load_weight * L(c),
+    L(c) = sum(max(0, 1 - k / max_tasks) for k < c) - ровно то, что набрала бы
+    жадная стратегия, назначая задачи этому исполнителю по одной.
+    """
+
+    # Как часто проверять дедлайн, итераций
+    DEADLINE_CHECK_INTERVAL = 64
+    IMPROVEMENT_EPS = 1e-12
+
+    def __init__(
+        self,
+        static_scores: np.ndarray,
+        load_weight: float,
+        max_tasks: int,
+        min_fit_score: float,
+        seed: int = 0,
+    ):
+        self.static_scores = static_scores
+        self.load_weight = load_weight
+        self.max_tasks = max_tasks
+        self.min_fit_score = min_fit_score
+        self.rng = random.Random(seed)
+
+        task_count = len(static_scores)
+        self.load_value = [0.0]
+        for k in range(task_count + 1):
+            self.load_value.append(self.load_value[-1] + self._marginal_load(k))
+
+    def _marginal_load(self, count: int) -> float:
+        # Оценка загрузки для задачи, которая станет (count + 1)-й у исполнителя
+        return max(0.0, 1.0 - count / self.max_tasks)
+
+    def _is_feasible(self, task: int, executor: int, count_before: int) -> bool:
+        score = self.static_scores.item(task, executor)
+        return score + self.load_weight * self._marginal_load(count_before) >= self.min_fit_score
+
+    def objective(self, assignment: list[int | None], counts: list[int]) -> float:
+        static = sum(
+            self.static_scores.item(task, executor)
+            for task, executor in enumerate(assignment)
+            if executor is not None
+        )
+        return static + self.load_weight * sum(self.load_value[c] for c in counts)
+
+    def refine(
+        self, assignment: list[int | None], executor_count: int, deadline: float
+    ) -> tuple[list[int | None], dict]:
+        assignment = list(assignment)
+        task_count = len(assignment)
+        counts = [0] * executor_count
+        for executor in assignment:
+            if executor is not None:
+                counts[executor] += 1
+
+        initial_objective = self.objective(assignment, counts)
+        stats = {"iterations": 0, "moves": 0, "swaps": 0}
+        if task_count == 0 or executor_count < 2:
+            stats.update(initial_objective=initial_objective, final_objective=initial_objective)
+            return assignment, stats
+
+        # item возвращает float без промежуточной строки и скаляра numpy
+        score = self.static_scores.item
+        load_value = self.load_value
+        load_weight = self.load_weight
+        # Останавливаемся раньше дедлайна, если улучшений давно нет
+        stall_limit = max(1000, 20 * task_count)
+        stall = 0
+
+        while stall < stall_limit:
+            stats["iterations"] += 1
+            if (
+                stats["iterations"] % self.DEADLINE_CHECK_INTERVAL == 0
+                and time.perf_counter() >= deadline
+            ):
+                break
+            stall += 1
+
+            task = self.rng.randrange(task_count)
+            source = assignment[task]
+
+            if source is None or self.rng.random() < 0.5:
+                # Перенос задачи (или назначение нераспределенной) к другому исполнителю
+                target = self.rng.randrange(executor_count)
+                if target == source or not self._is_feasible(task, target, counts[target]):
+                    continue
+
+                delta = score(task, target) + load_weight * (
+                    load_value[counts[target] + 1] - load_value[counts[target]]
+                )
+                if source is not None:
+                    delta -= score(task, source) + load_weight * (
+                        load_value[counts[source]] - load_value[counts[source] - 1]
+                    )
+                if delta <= self.IMPROVEMENT_EPS:
+                    continue
+
+                if source is not None:
+                    counts[source] -= 1
+                counts[target] += 1
+                assignment[task] = target
+                stats["moves"] += 1
+                stall = 0
+            else:
+                # Обмен задачами между двумя исполнителями, загрузка не меняется
+                other = self.rng.randrange(task_count)
+                target = assignment[other]
+                if target is None or target == source:
+                    continue
+                if not (
+                    self._is_feasible(task, target, counts[target] - 1)
+                    and self._is_feasible(other, source, counts[source] - 1)
+                ):
+                    continue
+
+                delta = (
+                    score(task, target) + score(other, source)
+                    - score(task, source) - score(other, target)
+                )
+                if delta <= self.IMPROVEMENT_EPS:
+                    continue
+
+                assignment[task], assignment[other] = target, source
+                stats["swaps"] += 1
+                stall = 0
+
+        stats.update(
+            initial_objective=initial_objective,
+            final_objective=self.objective(assignment, counts),
+        )
+        return assignment, stats
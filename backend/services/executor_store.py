@@ -0,0 +1,301 @@
+import asyncio
+import logging
+from pathlib import Path
+from src.pocketbase import Pocketbase
+from src.schemas.requests import ExecutorWithSkills, TaskWithSkills, SkillLevel
+from services.normalizer import SkillNormalizer
+from services.skill_snapshot import SkillSnapshot, SnapshotSkillMatrix
+
+logger = logging.getLogger("backend")
+
+# Размер страницы при загрузке коллекции из PocketBase
+FETCH_PAGE_SIZE = 500
+# Сколько измененных профилей копится в памяти до записи новой версии снимка
+SNAPSHOT_MERGE_THRESHOLD = 100
+
+
+def _filter_value(value: str) -> str:
+    # Экранирование строки для выражения filter PocketBase
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class ExecutorProfileStore:
+    """Профили исполнителей из коллекции PocketBase с локальным индексом.
+
+    Записи коллекции: executor_id (внешний id исполнителя), name,
+    soft_skills и hard_skills (JSON-массивы {"name", "level"}).
+    Хранятся уже нормализованные профили, поэтому запросы на распределение
+    могут передавать только id исполнителей. Если задан snapshot_dir, основная
+    часть профилей читается из отображенного в память SkillSnapshot, а в
+    словаре остаются только изменения, еще не записанные в снимок.
+    """
+
+    def __init__(
+        self,
+        pb: Pocketbase,
+        collection_name: str = "executors",
+        snapshot_dir: Path | None = None,
+        merge_threshold: int = SNAPSHOT_MERGE_THRESHOLD,
+    ):
+        self.__pb = pb
+        self.__collection_name = collection_name
+        self.__normalizer = SkillNormalizer()
+        self.__snapshot_dir = snapshot_dir
+        self.__snapshot: SkillSnapshot | None = None
+        self.__merge_threshold = merge_threshold
+        self.__profiles: dict[str, ExecutorWithSkills] = {}
+        # executor_id -> id записи в PocketBase
+        self.__record_ids: dict[str, str] = {}
+        self.__loaded = False
+        self.__lock = asyncio.Lock()
+        # Растет при каждом изменении набора профилей: ключ кэшей, построенных по всему хранилищу
+        self.generation = 0
+
+    def __len__(self) -> int:
+        snapshot_count = 0
+        if self.__snapshot is not None:
+            snapshot_count = len(self.__snapshot) + sum(
+                1 for executor_id in self.__profiles if executor_id not in self.__snapshot
+            )
+        return snapshot_count or len(self.__profiles)
+
+    def executors(self) -> list[ExecutorWithSkills]:
+        """Все профили хранилища; изменения, еще не записанные в снимок, заменяют его строки"""
+        # Копия словаря: профили могут меняться в цикле событий, пока список собирается в пуле потоков
+        profiles = dict(self.__profiles)
+        snapshot = self.__snapshot
+        executors = list(profiles.values())
+        if snapshot is not None:
+            executors += [
+                snapshot.executor(position)
+                for position, executor_id in enumerate(snapshot.ids)
+                if executor_id not in profiles
+            ]
+        return executors
+
+    def get(self, executor_id: str) -> ExecutorWithSkills | None:
+        executor = self.__profiles.get(executor_id)
+        if executor is None and self.__snapshot is not None:
+            executor = self.__snapshot.get(executor_id)
+        return executor
+
+    def __record_id(self, executor_id: str) -> str | None:
+        record_id = self.__record_ids.get(executor_id)
+        if record_id is None and self.__snapshot is not None:
+            record_id = self.__snapshot.record_id(executor_id)
+        return record_id
+
+    def normalize_skills(self, skills: list[SkillLevel]) -> list[SkillLevel]:
+        # Синонимы сводятся к одному навыку с максимальным уровнем
+        levels: dict[str, int] = {}
+        for skill in skills:
+            name = self.__normalizer.normalize_skill_name(skill.name)
+            levels[name] = max(levels.get(name, 0), skill.level)
+        return [SkillLevel(name=name, level=level) for name, level in levels.items()]
+
+    def normalize_executor(self, executor: ExecutorWithSkills) -> ExecutorWithSkills:
+        return ExecutorWithSkills(
+            id=executor.id,
+            name=executor.name,
+            soft_skills=self.normalize_skills(executor.soft_skills),
+            hard_skills=self.normalize_skills(executor.hard_skills),
+        )
+
+    def normalize_task(self, task: TaskWithSkills) -> TaskWithSkills:
+        return task.model_copy(
+            update={
+                "soft_skills": self.normalize_skills(task.soft_skills),
+                "hard_skills": self.normalize_skills(task.hard_skills),
+            }
+        )
+
+    def __parse_record(self, record: dict) -> ExecutorWithSkills:
+        return self.normalize_executor(
+            ExecutorWithSkills(
+                id=record["executor_id"],
+                name=record.get("name", ""),
+                soft_skills=record.get("soft_skills") or [],
+                hard_skills=record.get("hard_skills") or [],
+            )
+        )
+
+    def __index_record(self, record: dict) -> None:
+        executor = self.__parse_record(record)
+        self.__profiles[executor.id] = executor
+        self.__record_ids[executor.id] = record["id"]
+        self.generation += 1
+
+    async def __fetch_all(self, **api_params) -> list[dict]:
+        records = []
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            response = await self.__pb.fetch_records(
+                self.__collection_name, page=page, perPage=FETCH_PAGE_SIZE, **api_params
+            )
+            records.extend(response.get("items", []))
+            total_pages = response.get("totalPages", 0)
+            page += 1
+        return records
+
+    async def load(self) -> None:
+        async with self.__lock:
+            if self.__snapshot_dir is None:
+                for record in await self.__fetch_all():
+                    self.__index_record(record)
+                self.__loaded = True
+                self.generation += 1
+                logger.info(f"Loaded {len(self.__profiles)} executor profiles")
+                return
+
+            snapshot = await asyncio.to_thread(SkillSnapshot.open, self.__snapshot_dir)
+            if snapshot is None:
+                records = await self.__fetch_all(sort="updated")
+            else:
+                # Догружаем только записи, измененные после сборки снимка
+                records = await self.__fetch_all(
+                    sort="updated", filter=f"updated>{_filter_value(snapshot.synced_until)}"
+                )
+
+            profiles = [(self.__parse_record(record), record["id"]) for record in records]
+            synced_until = max((record.get("updated", "") for record in records), default="")
+
+            if snapshot is None:
+                snapshot = await asyncio.to_thread(
+                    SkillSnapshot.build, self.__snapshot_dir, profiles, synced_until
+                )
+            elif profiles:
+                snapshot = await asyncio.to_thread(snapshot.merge, profiles, synced_until)
+
+            self.__snapshot = snapshot
+            self.__profiles, self.__record_ids = {}, {}
+            self.__loaded = True
+            self.generation += 1
+            logger.info(
+                f"Loaded {len(snapshot)} executor profiles from snapshot {snapshot.version} "
+                f"({len(profiles)} updated from PocketBase)"
+            )
+
+    async def flush(self) -> None:
+        """Запись накопленных изменений в новую версию снимка"""
+        async with self.__lock:
+            if self.__snapshot is None or not self.__profiles:
+                return
+
+            profiles = [
+                (executor, self.__record_ids.get(executor.id) or self.__snapshot.record_id(executor.id))
+                for executor in self.__profiles.values()
+            ]
+            # Состав профилей не меняется, поэтому generation остается прежним
+            self.__snapshot = await asyncio.to_thread(self.__snapshot.merge, profiles)
+            self.__profiles, self.__record_ids = {}, {}
+
+    async def ensure_loaded(self) -> None:
+        if not self.__loaded:
+            await self.load()
+
+    async def get_many(self, executor_ids: list[str]) -> tuple[list[ExecutorWithSkills], list[str]]:
+        """Возвращает найденные профили и список отсутствующих id"""
+        await self.ensure_loaded()
+
+        found = {executor_id: self.get(executor_id) for executor_id in executor_ids}
+        missing = [executor_id for executor_id, executor in found.items() if executor is None]
+        if missing:
+            # Профили могли появиться в PocketBase в обход этого процесса
+            for executor_id in missing:
+                response = await self.__pb.fetch_records(
+                    self.__collection_name,
+                    filter=f"executor_id={_filter_value(executor_id)}",
+                    perPage=1,
+                )
+                for record in response.get("items", []):
+                    self.__index_record(record)
+                    found[executor_id] = self.__profiles.get(executor_id)
+            missing = [executor_id for executor_id in missing if found[executor_id] is None]
+
+        return [found[executor_id] for executor_id in executor_ids if found[executor_id] is not None], missing
+
+    async def resolve(
+        self,
+        tasks: list[TaskWithSkills],
+        executors: list[ExecutorWithSkills],
+        executor_ids: list[str],
+    ) -> tuple[list[TaskWithSkills], list[ExecutorWithSkills], list[str]]:
+        """Добавляет к исполнителям запроса сохраненные профили по id.
+
+        Возвращает задачи, исполнителей и список отсутствующих id. Навыки задач и
+        исполнителей из запроса нормализуются всегда, как и сохраненные профили:
+        один и тот же исполнитель оценивается одинаково, переданный списком навыков или по id.
+        """
+        tasks = [self.normalize_task(task) for task in tasks]
+        executors = [self.normalize_executor(executor) for executor in executors]
+        if not executor_ids:
+            return tasks, executors, []
+
+        stored_executors, missing = await self.get_many(executor_ids)
+        return tasks, executors + stored_executors, missing
+
+    async def skill_matrix(self, executor_ids: list[str]) -> SnapshotSkillMatrix | None:
+        """Матрица навыков исполнителей прямо из массивов снимка, без сборки профилей.
+
+        None - если часть исполнителей есть только в памяти (изменения после снимка)
+        или не найдена; тогда профили берутся через get_many.
+        """
+        await self.ensure_loaded()
+        snapshot = self.__snapshot
+        if snapshot is None or len(set(executor_ids)) != len(executor_ids):
+            return None
+        positions = []
+        for executor_id in executor_ids:
+            position = snapshot.positions.get(executor_id)
+            if position is None or executor_id in self.__profiles:
+                return None
+            positions.append(position)
+        # Столбцовый индекс снимка при первом обращении строится в пуле потоков
+        return await asyncio.to_thread(SnapshotSkillMatrix, snapshot, positions)
+
+    async def save(self, executor: ExecutorWithSkills) -> ExecutorWithSkills:
+        executor = self.normalize_executor(executor)
+        data = {
+            "executor_id": executor.id,
+            "name": executor.name,
+            "soft_skills": [skill.model_dump() for skill in executor.soft_skills],
+            "hard_skills": [skill.model_dump() for skill in executor.hard_skills],
+        }
+
+        record_id = self.__record_id(executor.id)
+        if record_id is None:
+            response = await self.__pb.fetch_records(
+                self.__collection_name, filter=f"executor_id={_filter_value(executor.id)}", perPage=1
+            )
+            items = response.get("items", [])
+            record_id = items[0]["id"] if items else None
+
+        if record_id is None:
+            record = await self.__pb.create_record(self.__collection_name, data)
+        else:
+            record = await self.__pb.update_record(self.__collection_name, record_id, **data)
+
+        self.__profiles[executor.id] = executor
+        self.__record_ids[executor.id] = record.get("id", record_id)
+        self.generation += 1
+
+        if self.__snapshot is not None and len(self.__profiles) >= self.__merge_threshold:
+            await self.flush()
+        return executor
+
+    @staticmethod
+    def from_assessment(executor_id: str, name: str, assessment: dict) -> ExecutorWithSkills:
+        """Профиль из ответа LLM: значимость 0.1-0.9 переводится в уровень 1-10"""
+        def to_levels(skills: dict) -> list[SkillLevel]:
+            return [
+                SkillLevel(name=skill_name, level=min(10, max(1, round(value * 10))))
+                for skill_name, value in (skills or {}).items()
+                if isinstance(value, (int, float))
+            ]
+
+        return ExecutorWithSkills(
+            id=executor_id,
+            name=name,
+            soft_skills=to_levels(assessment.get("soft")),
+            hard_skills=to_levels(assessment.get("hard")),
+        )
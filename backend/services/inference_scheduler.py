@@ -0,0 +1,123 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+
+# Классы приоритета: меньше - раньше
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Сколько последних ожиданий учитывается в метриках
+WAIT_SAMPLES = 1000
+# Порог, после которого из учета удаляются пользователи без накопленного обслуживания
+USAGE_PRUNE_SIZE = 1000
+
+
+class SlotRequest:
+    """Место в очереди планировщика; приоритет можно повысить, пока слот не выдан"""
+
+    def __init__(self, priority: int = INTERACTIVE, user: str = "anonymous"):
+        self.priority = priority
+        self.user = user
+
+
+class InferenceScheduler:
+    """Очередь запросов к модели с приоритетами и справедливым разделением.
+
+    Слот модели отдается сначала интерактивным запросам, затем пакетным.
+    Внутри класса очередь упорядочена по виртуальному времени пользователя
+    (start-time fair queuing): пользователь, уже занявший модель надолго,
+    пропускает вперед остальных. Пакетный анализ запрашивает слот на каждую
+    задачу отдельно, поэтому интерактивный запрос вытесняет поток между задачами.
+    """
+
+    def __init__(self, slots: int = 1):
+        self.__condition = threading.Condition()
+        self.__free = slots
+        self.__queue: list[tuple[int, float, int, object]] = []
+        self.__sequence = itertools.count()
+        # Виртуальное время: метка последнего запроса, получившего слот
+        self.__virtual_time = 0.0
+        # Пользователь -> виртуальное время окончания его последнего запроса
+        self.__finish_tags: dict[str, float] = {}
+        self.__waits = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITY_NAMES}
+        self.__served = {priority: 0 for priority in PRIORITY_NAMES}
+
+    @contextmanager
+    def slot(
+        self,
+        priority: int = INTERACTIVE,
+        user: str = "anonymous",
+        request: SlotRequest | None = None,
+    ) -> Iterator[None]:
+        """Занимает слот модели; request передается, если приоритет может быть повышен в ожидании"""
+        if request is None:
+            request = SlotRequest(priority, user)
+        user = request.user
+        enqueued = time.monotonic()
+
+        with self.__condition:
+            tag = max(self.__finish_tags.get(user, 0.0), self.__virtual_time)
+            heapq.heappush(self.__queue, (request.priority, tag, next(self.__sequence), request))
+            while not (self.__free > 0 and self.__queue[0][3] is request):
+                self.__condition.wait()
+            heapq.heappop(self.__queue)
+            # Приоритет мог быть повышен, пока запрос ждал
+            priority = request.priority
+            self.__free -= 1
+            self.__virtual_time = tag
+            self.__waits[priority].append(time.monotonic() - enqueued)
+            self.__served[priority] += 1
+            # Следующий в очереди может занять другой свободный слот
+            self.__condition.notify_all()
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__free += 1
+                self.__finish_tags[user] = tag + (time.monotonic() - started)
+                if len(self.__finish_tags) > USAGE_PRUNE_SIZE:
+                    self.__finish_tags = {
+                        name: finish
+                        for name, finish in self.__finish_tags.items()
+                        if finish > self.__virtual_time
+                    }
+                self.__condition.notify_all()
+
+    def promote(self, request: SlotRequest, priority: int) -> None:
+        """Повышает приоритет ожидающего запроса; выданный слот не меняется"""
+        with self.__condition:
+            if priority >= request.priority:
+                return
+            request.priority = priority
+            # Запрос, еще не вставший в очередь, встанет в нее с новым приоритетом
+            if any(queued is request for *_, queued in self.__queue):
+                self.__queue = [
+                    (request.priority if queued is request else queued_priority, tag, sequence, queued)
+                    for queued_priority, tag, sequence, queued in self.__queue
+                ]
+                heapq.heapify(self.__queue)
+                self.__condition.notify_all()
+
+    def metrics(self) -> dict:
+        with self.__condition:
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, *_ in self.__queue:
+                queued[PRIORITY_NAMES[priority]] += 1
+
+            classes = {}
+            for priority, name in PRIORITY_NAMES.items():
+                waits = sorted(self.__waits[priority])
+                classes[name] = {
+                    "served": self.__served[priority],
+                    "queued": queued[name],
+                    "wait_p50_ms": waits[len(waits) // 2] * 1000 if waits else 0.0,
+                    "wait_p95_ms": waits[int(len(waits) * 0.95)] * 1000 if waits else 0.0,
+                }
+            return classes
@@ -0,0 +1,230 @@
+import json
+import logging
+import gc
+import os
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from src.cpu_affinity import available_cpus, physical_core_cpus, pin_current_thread, format_cpu_list
+
+logger = logging.getLogger("llm_interface")
+
+# Типичный запрос анализа: системный промпт с задачей и JSON-ответ, токены
+WORKLOAD_PROMPT_TOKENS = 768
+WORKLOAD_DECODE_TOKENS = 128
+BATCH_SIZES = [128, 256, 512, 1024]
+
+SAMPLE_TEXT = (
+    "Проанализируй описание задачи в контексте проекта и определи ключевые навыки. "
+    "Analyze the task description and list the required soft and hard skills as JSON. "
+)
+
+
+class InferenceSettings:
+    """Параметры llama.cpp: потоки генерации и обработки промпта, размер батча, процессоры"""
+
+    def __init__(
+        self,
+        n_threads: int = 6,
+        n_threads_batch: int | None = None,
+        n_batch: int = 512,
+        cpu_affinity: list[int] | None = None,
+    ):
+        self.n_threads = n_threads
+        self.n_threads_batch = n_threads_batch or n_threads
+        self.n_batch = n_batch
+        self.cpu_affinity = cpu_affinity
+
+    def to_dict(self) -> dict:
+        return {
+            "n_threads": self.n_threads,
+            "n_threads_batch": self.n_threads_batch,
+            "n_batch": self.n_batch,
+            "cpu_affinity": self.cpu_affinity,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "InferenceSettings":
+        return cls(
+            n_threads=data["n_threads"],
+            n_threads_batch=data.get("n_threads_batch"),
+            n_batch=data["n_batch"],
+            cpu_affinity=data.get("cpu_affinity"),
+        )
+
+    def __str__(self) -> str:
+        cpus = format_cpu_list(self.cpu_affinity) if self.cpu_affinity else "all"
+        return (
+            f"n_threads={self.n_threads}, n_threads_batch={self.n_threads_batch}, "
+            f"n_batch={self.n_batch}, cpus={cpus}"
+        )
+
+
+def host_signature() -> dict:
+    return {"host": platform.node(), "cpus": os.cpu_count()}
+
+
+def load_settings(path: Path, model_path: str) -> InferenceSettings | None:
+    """Сохраненная калибровка, если она сделана на этом хосте для этой модели"""
+    if not path.exists():
+        return None
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("signature") != host_signature() or data.get("model") != Path(model_path).name:
+            logger.warning(f"Inference calibration {path} was made for another host or model, ignoring")
+            return None
+        settings = InferenceSettings.from_dict(data["settings"])
+        logger.info(f"Using calibrated inference settings: {settings}")
+        return settings
+    except Exception as e:
+        logger.error(f"Error reading inference calibration {path}: {str(e)}")
+        return None
+
+
+def save_settings(path: Path, model_path: str, settings: InferenceSettings, trials: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "signature": host_signature(),
+        "model": Path(model_path).name,
+        "calibrated_at": datetime.now().isoformat(timespec="seconds"),
+        "settings": settings.to_dict(),
+        "trials": trials,
+    }
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def run_trial(model_path: str, settings: InferenceSettings, prompt_tokens: int, decode_tokens: int) -> dict:
+    """Скорость обработки промпта и генерации, токенов в секунду"""
+    from llama_cpp import Llama
+
+    llm = Llama(
+        model_path=model_path,
+        n_ctx=prompt_tokens + decode_tokens + 64,
+        n_threads=settings.n_threads,
+        n_threads_batch=settings.n_threads_batch,
+        n_batch=settings.n_batch,
+        use_mmap=True,
+        verbose=False,
+    )
+    tokens = llm.tokenize(SAMPLE_TEXT.encode())
+    prompt = (tokens * (prompt_tokens // len(tokens) + 1))[:prompt_tokens]
+
+    # Прогрев: веса подгружаются с диска при первом обращении
+    llm.eval(prompt[:32])
+    llm.reset()
+
+    start = time.perf_counter()
+    llm.eval(prompt)
+    prompt_seconds = time.perf_counter() - start
+
+    # generate переиспользует уже вычисленный промпт и считает только новые токены
+    start = time.perf_counter()
+    generated = 0
+    for _ in llm.generate(prompt, top_k=1, temp=0.0):
+        generated += 1
+        if generated >= decode_tokens:
+            break
+    decode_seconds = time.perf_counter() - start
+
+    del llm
+    gc.collect()
+    return {
+        "prompt_tokens_per_second": prompt_tokens / prompt_seconds,
+        "decode_tokens_per_second": generated / decode_seconds,
+    }
+
+
+def _request_seconds(prompt_rate: float, decode_rate: float, prompt_tokens: int, decode_tokens: int) -> float:
+    return prompt_tokens / prompt_rate + decode_tokens / decode_rate
+
+
+def candidate_affinities() -> dict[str, list[int] | None]:
+    candidates = {"all": None}
+    physical = physical_core_cpus()
+    if physical and len(physical) < len(available_cpus()):
+        candidates["physical cores"] = physical
+    return candidates
+
+
+def candidate_thread_counts(cpu_count: int) -> list[int]:
+    counts = {max(1, cpu_count * share // 4) for share in (1, 2, 3, 4)}
+    counts.add(min(6, cpu_count))
+    return sorted(counts)
+
+
+def calibrate(
+    model_path: str,
+    thread_counts: list[int] | None = None,
+    batch_sizes: list[int] | None = None,
+    prompt_tokens: int = WORKLOAD_PROMPT_TOKENS,
+    decode_tokens: int = WORKLOAD_DECODE_TOKENS,
+    report=print,
+) -> tuple[InferenceSettings, list[dict]]:
+    """Подбор параметров по времени типичного запроса.
+
+    Сначала для каждого набора процессоров перебираются числа потоков при
+    n_batch=512: по скорости генерации выбирается n_threads, по скорости
+    обработки промпта - n_threads_batch. Затем для лучшего набора
+    перебираются размеры батча.
+    """
+    trials = []
+
+    def measure(settings: InferenceSettings, stage: str) -> dict:
+        # Каждый замер - в новом потоке с нужной привязкой: рабочие потоки llama.cpp
+        # (и пул OpenMP) создаются из него заново и наследуют ее
+        initializer = (lambda: pin_current_thread(settings.cpu_affinity)) if settings.cpu_affinity else None
+        with ThreadPoolExecutor(max_workers=1, initializer=initializer) as executor:
+            result = executor.submit(run_trial, model_path, settings, prompt_tokens, decode_tokens).result()
+        trial = {"stage": stage, **settings.to_dict(), **result}
+        trials.append(trial)
+        report(
+            f"  {stage:<16} {str(settings):<64} "
+            f"prompt {result['prompt_tokens_per_second']:8.1f} tok/s  "
+            f"decode {result['decode_tokens_per_second']:6.1f} tok/s"
+        )
+        return result
+
+    best = None
+    best_seconds = None
+    prompt_rate = decode_rate = 0.0
+    for name, cpus in candidate_affinities().items():
+        cpu_count = len(cpus) if cpus else len(available_cpus())
+        # Число потоков больше числа процессоров набора ограничивается им
+        counts = sorted({
+            min(max(1, count), max(1, cpu_count))
+            for count in (thread_counts or candidate_thread_counts(cpu_count))
+        })
+        results = {
+            count: measure(InferenceSettings(count, count, 512, cpus), f"threads/{name}")
+            for count in counts
+        }
+        n_threads = max(results, key=lambda count: results[count]["decode_tokens_per_second"])
+        n_threads_batch = max(results, key=lambda count: results[count]["prompt_tokens_per_second"])
+        seconds = _request_seconds(
+            results[n_threads_batch]["prompt_tokens_per_second"],
+            results[n_threads]["decode_tokens_per_second"],
+            prompt_tokens,
+            decode_tokens,
+        )
+        if best_seconds is None or seconds < best_seconds:
+            best, best_seconds = InferenceSettings(n_threads, n_threads_batch, 512, cpus), seconds
+            prompt_rate = results[n_threads_batch]["prompt_tokens_per_second"]
+            decode_rate = results[n_threads]["decode_tokens_per_second"]
+
+    if best is None:
+        raise ValueError("Calibration measured no settings: no CPU set or thread count to try")
+
+    for n_batch in batch_sizes or BATCH_SIZES:
+        if n_batch == best.n_batch:
+            continue
+        settings = InferenceSettings(best.n_threads, best.n_threads_batch, n_batch, best.cpu_affinity)
+        result = measure(settings, "batch")
+        # Батч влияет только на обработку промпта
+        if result["prompt_tokens_per_second"] > prompt_rate:
+            best, prompt_rate = settings, result["prompt_tokens_per_second"]
+            best_seconds = _request_seconds(prompt_rate, decode_rate, prompt_tokens, decode_tokens)
+
+    report(f"Best: {best} (~{best_seconds:.2f} s per {prompt_tokens}+{decode_tokens} token request)")
+    return best, trials
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+from typing import AsyncIterator
+from src.schemas.requests import TaskWithSkills, ExecutorWithSkills
+from services.job_store import JobStore, QUEUED, RUNNING, COMPLETED, FAILED, FINISHED_STATUSES
+from services.task_allocator import TaskAllocator
+from services.inference_scheduler import BULK
+
+logger = logging.getLogger("backend")
+
+# Типы заданий
+ALLOCATION = "allocation"
+ANALYSIS = "analysis"
+
+
+def public_job(job: dict) -> dict:
+    """Состояние задания без входных данных"""
+    return {
+        "id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "total": job["total"],
+        "completed": job["completed"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+class JobManager:
+    """Фоновые задания распределения и анализа задач.
+
+    Задания выполняются в asyncio-задачах, тяжелая работа - в пуле потоков.
+    Состояние и частичные результаты хранятся в JobStore, поэтому при старте
+    сервера незавершенные задания запускаются снова, а анализ продолжается
+    с первой необработанной задачи.
+    """
+
+    def __init__(self, store: JobStore, llm, allocator: TaskAllocator):
+        self.store = store
+        self.llm = llm
+        self.allocator = allocator
+        self.__running: dict[str, asyncio.Task] = {}
+        self.__subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    async def start(self) -> None:
+        jobs = await asyncio.to_thread(self.store.unfinished)
+        for job in jobs:
+            logger.info(f"Resuming {job['kind']} job {job['id']} ({job['completed']}/{job['total']})")
+            self.__launch(job["id"])
+
+    async def stop(self) -> None:
+        # Статус остается running: после перезапуска задание будет продолжено
+        tasks = list(self.__running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(self, kind: str, payload: dict, total: int, owner: str | None = None) -> dict:
+        job = await asyncio.to_thread(self.store.create, kind, payload, total, owner)
+        logger.info(f"Submitted {kind} job {job['id']} with {total} items")
+        self.__launch(job["id"])
+        return job
+
+    async def resume(self, job_id: str) -> dict | None:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None:
+            return None
+        # Между проверкой и запуском нет await: повторный resume уже видит задание в __running.
+        # Статус running выставляет само задание при старте
+        if job["status"] != COMPLETED and job_id not in self.__running:
+            self.__launch(job_id)
+            job = {**job, "status": QUEUED, "error": None}
+        return job
+
+    def is_running(self, job_id: str) -> bool:
+        return job_id in self.__running
+
+    def __launch(self, job_id: str) -> None:
+        task = asyncio.create_task(self.__run(job_id))
+        self.__running[job_id] = task
+        task.add_done_callback(lambda _: self.__running.pop(job_id, None))
+
+    def __publish(self, job: dict, **extra) -> None:
+        event = {**public_job(job), **extra}
+        for queue in self.__subscribers.get(job["id"], ()):
+            queue.put_nowait(event)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[dict]:
+        """События прогресса задания до его завершения"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self.__subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None:
+                return
+            yield public_job(job)
+            if job["status"] in FINISHED_STATUSES and job_id not in self.__running:
+                return
+
+            while True:
+                event = await queue.get()
+                yield event
+                if event["status"] in FINISHED_STATUSES:
+                    return
+        finally:
+            subscribers = self.__subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self.__subscribers[job_id]
+
+    async def __run(self, job_id: str) -> None:
+        await asyncio.to_thread(self.store.set_status, job_id, RUNNING)
+        job = await asyncio.to_thread(self.store.get, job_id)
+        self.__publish(job)
+
+        try:
+            if job["kind"] == ALLOCATION:
+                await self.__run_allocation(job)
+            elif job["kind"] == ANALYSIS:
+                await self.__run_analysis(job)
+            else:
+                raise ValueError(f"Unknown job kind: {job['kind']}")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            await asyncio.to_thread(self.store.set_status, job_id, FAILED, str(e))
+
+        job = await asyncio.to_thread(self.store.get, job_id)
+        logger.info(f"Job {job_id} finished with status {job['status']}")
+        self.__publish(job)
+
+    async def __run_allocation(self, job: dict) -> None:
+        payload = job["payload"]
+        tasks = [TaskWithSkills.model_validate(task) for task in payload["tasks"]]
+        executors = [ExecutorWithSkills.model_validate(executor) for executor in payload["executors"]]
+
+        allocation = await asyncio.to_thread(
+            self.allocator.allocate_tasks,
+            tasks,
+            executors,
+            time_budget_ms=payload.get("time_budget_ms"),
+        )
+        result = {
+            task.id: executor_id
+            for executor_id, executor_tasks in allocation.items()
+            for task in executor_tasks
+        }
+        await asyncio.to_thread(self.store.set_result, job["id"], {"allocation": result})
+
+    async def __run_analysis(self, job: dict) -> None:
+        payload = job["payload"]
+        done = await asyncio.to_thread(self.store.done_positions, job["id"])
+        pending = [
+            (position, task)
+            for position, task in enumerate(payload["task_list"])
+            if position not in done
+        ]
+        if done:
+            logger.info(f"Job {job['id']}: skipping {len(done)} already analyzed tasks")
+        completed = len(done)
+
+        results = self.llm.analyze_tasks(
+            payload["project_description"],
+            [task for _, task in pending],
+            priority=BULK,
+            user=payload.get("requester", "jobs"),
+            reuse_similar=payload.get("reuse_similar", False),
+        )
+        for position, _ in pending:
+            # Генератор анализа блокирующий: каждая задача считается в пуле потоков
+            result = await asyncio.to_thread(next, results, None)
+            if result is None:
+                break
+            completed = await asyncio.to_thread(self.store.add_item, job["id"], position, result)
+            self.__publish(
+                {**job, "status": RUNNING, "completed": completed}, position=position, item=result
+            )
+
+        if completed < job["total"]:
+            # Анализ оборвался или часть задач завершилась ошибкой:
+            # resume повторит только необработанные и ошибочные задачи
+            await asyncio.to_thread(
+                self.store.set_status,
+                job["id"],
+                FAILED,
+                f"Analysis failed for {job['total'] - completed} of {job['total']} tasks",
+            )
+            return
+        await asyncio.to_thread(self.store.set_status, job["id"], COMPLETED)
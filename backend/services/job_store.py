@@ -0,0 +1,162 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# Статусы заданий
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+FINISHED_STATUSES = (COMPLETED, FAILED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    failed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, position)
+);
+"""
+
+
+class JobStore:
+    """Состояние фоновых заданий в локальной SQLite.
+
+    Для заданий анализа каждый обработанный элемент пишется в job_items сразу
+    после получения, поэтому прерванное задание продолжается с первого
+    необработанного элемента. Элементы с ошибкой хранятся, но не считаются
+    обработанными: при продолжении они анализируются снова.
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Соединение используется из пула потоков, доступ сериализуется блокировкой
+        self.__connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.__connection.row_factory = sqlite3.Row
+        self.__lock = threading.Lock()
+        with self.__lock:
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute("PRAGMA foreign_keys=ON")
+            self.__connection.executescript(SCHEMA)
+            # Базы, созданные до появления владельца заданий
+            columns = {row["name"] for row in self.__connection.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                self.__connection.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            item_columns = {row["name"] for row in self.__connection.execute("PRAGMA table_info(job_items)")}
+            if "failed" not in item_columns:
+                self.__connection.execute(
+                    "ALTER TABLE job_items ADD COLUMN failed INTEGER NOT NULL DEFAULT 0"
+                )
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+    @staticmethod
+    def __to_dict(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def create(self, kind: str, payload: dict, total: int, owner: str | None = None) -> dict:
+        """owner - id пользователя, создавшего задание"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT INTO jobs (id, kind, owner, status, payload, total, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, owner, QUEUED, json.dumps(payload, ensure_ascii=False), total, now, now),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> dict | None:
+        with self.__lock:
+            row = self.__connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self.__to_dict(row) if row is not None else None
+
+    def recent(self, limit: int = 50, owner: str | None = None) -> list[dict]:
+        """Последние задания; owner - только задания этого пользователя"""
+        with self.__lock:
+            if owner is None:
+                rows = self.__connection.execute(
+                    "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+                ).fetchall()
+            else:
+                rows = self.__connection.execute(
+                    "SELECT * FROM jobs WHERE owner = ? ORDER BY created_at DESC LIMIT ?", (owner, limit)
+                ).fetchall()
+        return [self.__to_dict(row) for row in rows]
+
+    def unfinished(self) -> list[dict]:
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT * FROM jobs WHERE status NOT IN (?, ?) ORDER BY created_at",
+                FINISHED_STATUSES,
+            ).fetchall()
+        return [self.__to_dict(row) for row in rows]
+
+    def set_status(self, job_id: str, status: str, error: str | None = None) -> None:
+        with self.__lock:
+            self.__connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id),
+            )
+
+    def set_result(self, job_id: str, result) -> None:
+        with self.__lock:
+            self.__connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, completed = total, updated_at = ? WHERE id = ?",
+                (COMPLETED, json.dumps(result, ensure_ascii=False), time.time(), job_id),
+            )
+
+    def add_item(self, job_id: str, position: int, result: dict) -> int:
+        """Сохраняет результат элемента и возвращает число успешно обработанных элементов"""
+        with self.__lock:
+            with self.__connection:
+                self.__connection.execute("BEGIN")
+                self.__connection.execute(
+                    "INSERT OR REPLACE INTO job_items (job_id, position, result, failed) VALUES (?, ?, ?, ?)",
+                    (job_id, position, json.dumps(result, ensure_ascii=False), "error" in result),
+                )
+                completed = self.__connection.execute(
+                    "SELECT COUNT(*) FROM job_items WHERE job_id = ? AND failed = 0", (job_id,)
+                ).fetchone()[0]
+                self.__connection.execute(
+                    "UPDATE jobs SET completed = ?, updated_at = ? WHERE id = ?",
+                    (completed, time.time(), job_id),
+                )
+        return completed
+
+    def items(self, job_id: str, offset: int = 0, limit: int | None = None) -> list[dict]:
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT result FROM job_items WHERE job_id = ? ORDER BY position LIMIT ? OFFSET ?",
+                (job_id, -1 if limit is None else limit, offset),
+            ).fetchall()
+        return [json.loads(row["result"]) for row in rows]
+
+    def done_positions(self, job_id: str) -> set[int]:
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT position FROM job_items WHERE job_id = ? AND failed = 0", (job_id,)
+            ).fetchall()
+        return {row["position"] for row in rows}
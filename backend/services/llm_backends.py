@@ -0,0 +1,271 @@
+import abc
+import hashlib
+import json
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.admission import estimate_tokens
+from src.cpu_affinity import pin_current_thread
+from services.inference_tuning import InferenceSettings
+
+logger = logging.getLogger("llm_interface")
+
+# Типы бэкендов
+LLAMA_CPP = "llama_cpp"
+OPENAI_SERVER = "openai"
+STUB = "stub"
+
+
+class LLMBackend(abc.ABC):
+    """Генерация ответа модели.
+
+    complete принимает сообщения чата и возвращает ответ в формате OpenAI
+    chat completion (choices, usage). slots - сколько запросов бэкенд
+    обрабатывает одновременно, столько слотов выдает планировщик.
+    """
+
+    name = "base"
+    slots = 1
+
+    @abc.abstractmethod
+    def complete(self, messages: list[dict[str, str]], max_tokens: int, response_format: dict) -> dict:
+        ...
+
+    def count_tokens(self, text: str) -> int:
+        return estimate_tokens(text)
+
+    def metrics(self) -> dict:
+        return {}
+
+
+class LlamaCppBackend(LLMBackend):
+    """Модель llama.cpp в процессе API.
+
+    При заданной привязке к процессорам все вызовы модели выполняются в одном
+    выделенном потоке: рабочие потоки llama.cpp создаются из него и наследуют привязку.
+    """
+
+    name = LLAMA_CPP
+
+    def __init__(
+        self,
+        model_path: str,
+        draft_model: str | None = None,
+        draft_tokens: int | None = None,
+        settings: InferenceSettings | None = None,
+        numa_node: int | None = None,
+    ):
+        settings = settings or InferenceSettings()
+        self.settings = settings
+        self.numa_node = numa_node
+        self.__executor = None
+        if settings.cpu_affinity:
+            self.__executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="llama",
+                initializer=self.__pin,
+                initargs=(settings.cpu_affinity,),
+            )
+        self.__run(self.__load, model_path, draft_model, draft_tokens)
+
+    @staticmethod
+    def __pin(cpus: list[int]) -> None:
+        if not pin_current_thread(cpus):
+            logger.warning(f"Could not pin inference to CPUs {cpus}, running unpinned")
+
+    def __run(self, function, *args):
+        if self.__executor is None:
+            return function(*args)
+        return self.__executor.submit(function, *args).result()
+
+    def __load(self, model_path: str, draft_model: str | None, draft_tokens: int | None) -> None:
+        # llama_cpp нужен только этому бэкенду
+        from llama_cpp import Llama
+        from services.speculative import create_draft_model
+
+        # Спекулятивное декодирование: "prompt_lookup" или путь к маленькой GGUF-модели.
+        # Ответы - короткий JSON с повторяющимися ключами, черновики принимаются часто
+        self.__draft_model = create_draft_model(draft_model, draft_tokens)
+        if self.__draft_model is not None:
+            logger.info(f"Speculative decoding enabled with draft {draft_model}")
+
+        numa = False
+        if self.numa_node is not None:
+            from llama_cpp import GGML_NUMA_STRATEGY_ISOLATE
+
+            # Потоки и память llama.cpp - на узле, к процессорам которого привязан поток
+            numa = GGML_NUMA_STRATEGY_ISOLATE
+
+        self.__llm = Llama(
+            model_path=model_path,
+            numa=numa,
+            n_ctx=8192,
+            n_threads=self.settings.n_threads,
+            n_threads_batch=self.settings.n_threads_batch,
+            n_batch=self.settings.n_batch,
+            use_mmap=True,
+            use_mlock=False,
+            logit_bias=None,
+            temperature=0.6,
+            top_p=0.98,
+            stop=["</s>"],
+            chat_format="chatml",
+            draft_model=self.__draft_model,
+            verbose=False,
+        )
+        logger.info(f"Loaded {model_path} with {self.settings}")
+
+    def complete(self, messages: list[dict[str, str]], max_tokens: int, response_format: dict) -> dict:
+        return self.__run(
+            lambda: self.__llm.create_chat_completion(
+                max_tokens=max_tokens,
+                messages=messages,
+                response_format=response_format,
+            )
+        )
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.__llm.tokenize(text.encode()))
+
+    def metrics(self) -> dict:
+        return {
+            "speculative": self.__draft_model.metrics() if self.__draft_model is not None else None
+        }
+
+
+class OpenAIServerBackend(LLMBackend):
+    """OpenAI-совместимый сервер: llama.cpp server, vLLM и т.п.
+
+    Модель живет в отдельном процессе или на другом хосте, API не держит ее в памяти.
+    """
+
+    name = OPENAI_SERVER
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str = "local",
+        api_key: str | None = None,
+        slots: int = 1,
+        timeout: float = 300,
+    ):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.slots = slots
+        self.timeout = timeout
+
+        # Соединения переиспользуются, пул - по числу одновременных запросов
+        self.__session = requests.Session()
+        self.__session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=slots))
+        self.__session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=slots))
+        if api_key:
+            self.__session.headers["Authorization"] = f"Bearer {api_key}"
+        logger.info(f"Using OpenAI-compatible server {self.base_url} with {slots} slots")
+
+    def complete(self, messages: list[dict[str, str]], max_tokens: int, response_format: dict) -> dict:
+        response = self.__session.post(
+            f"{self.base_url}/chat/completions",
+            json={
+                "model": self.model,
+                "messages": messages,
+                "max_tokens": max_tokens,
+                "temperature": 0.6,
+                "top_p": 0.98,
+                "response_format": response_format,
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+class StubBackend(LLMBackend):
+    """Детерминированный ответ без модели - для разработки и нагрузочных тестов API.
+
+    Навыки берутся из ключевых слов последнего сообщения, оценки - из его хэша,
+    поэтому одинаковый запрос всегда дает одинаковый ответ.
+    """
+
+    name = STUB
+
+    HARD_SKILLS = {
+        "python": "Python",
+        "fastapi": "FastAPI",
+        "sql": "SQL",
+        "postgres": "PostgreSQL",
+        "react": "React",
+        "docker": "Docker",
+        "redis": "Redis",
+        "git": "Git",
+        "ci": "CI/CD",
+        "api": "REST API",
+        "test": "Testing",
+    }
+    SOFT_SKILLS = {
+        "встреч": "Communication",
+        "команд": "Teamwork",
+        "руковод": "Leadership",
+        "mentor": "Mentoring",
+        "клиент": "Communication",
+    }
+
+    def __init__(self, delay: float = 0.0):
+        # Имитация времени генерации на один запрос, с
+        self.delay = delay
+
+    def complete(self, messages: list[dict[str, str]], max_tokens: int, response_format: dict) -> dict:
+        text = messages[-1]["content"]
+        words = re.findall(r"\w+", text.lower())
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+
+        def assess(keywords: dict[str, str]) -> dict[str, float]:
+            skills = sorted({skill for key, skill in keywords.items() if any(word.startswith(key) for word in words)})
+            return {skill: round(0.1 + (digest[i % len(digest)] % 9) / 10, 1) for i, skill in enumerate(skills)}
+
+        content = json.dumps({"soft": assess(self.SOFT_SKILLS), "hard": assess(self.HARD_SKILLS)})
+        if self.delay:
+            time.sleep(self.delay)
+
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        completion_tokens = estimate_tokens(content)
+        return {
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+
+def create_backend(
+    kind: str,
+    model_path: str,
+    draft_model: str | None = None,
+    draft_tokens: int | None = None,
+    settings: InferenceSettings | None = None,
+    numa_node: int | None = None,
+    server_url: str = "http://127.0.0.1:8080/v1",
+    server_model: str = "local",
+    api_key: str | None = None,
+    slots: int = 1,
+    timeout: float = 300,
+    stub_delay: float = 0.0,
+) -> LLMBackend:
+    if kind == LLAMA_CPP:
+        return LlamaCppBackend(
+            model_path,
+            draft_model=draft_model,
+            draft_tokens=draft_tokens,
+            settings=settings,
+            numa_node=numa_node,
+        )
+    if kind == OPENAI_SERVER:
+        return OpenAIServerBackend(server_url, model=server_model, api_key=api_key, slots=slots, timeout=timeout)
+    if kind == STUB:
+        return StubBackend(delay=stub_delay)
+    raise ValueError(f"Unknown LLM backend: {kind}")
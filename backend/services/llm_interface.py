@@ -1,39 +1,42 @@
+import hashlib
 import json
 import logging
 from typing import Iterator
-from llama_cpp import Llama
 import sys
+import threading
 import time
-from pathlib import Path
 from src.schemas.requests import TaskWithSkills, ExecutorWithSkills
 from src.logger import setup_logging
+from services.single_flight import SingleFlight
+from services.inference_scheduler import InferenceScheduler, SlotRequest, INTERACTIVE, BULK
+from services.llm_backends import LLMBackend
+from services.near_duplicates import NearDuplicateDetector
 
 # Настраиваем логирование
 setup_logging()
 
-# Получаем логгер для llm_interface
+# Получаем логгер для llm_interface (llm.log, обработчик из setup_logging)
 logger = logging.getLogger("llm_interface")
 
-log_dir = Path(__file__).parent.parent / "logs"
-log_dir.mkdir(exist_ok=True)
 
-llm_log_file = log_dir / "llm.log"
-
-# Настраиваем логирование
-log_formatter = logging.Formatter(
-    "%(asctime)s [%(levelname)s] [%(name)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
-)
-
-logger.setLevel(logging.INFO)
-logger.propagate = False
-
-# Очищаем существующие обработчики
-logger.handlers = []
-
-# Добавляем новый обработчик файла
-file_handler = logging.FileHandler(llm_log_file, encoding="utf-8", mode="a")
-file_handler.setFormatter(log_formatter)
-logger.addHandler(file_handler)
+# Ответ модели - JSON с оценками soft и hard навыков
+ASSESSMENT_RESPONSE_FORMAT = {
+    "type": "json_object",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "soft": {
+                "type": "object",
+                "additionalProperties": {"type": "number"},
+            },
+            "hard": {
+                "type": "object",
+                "additionalProperties": {"type": "number"},
+            },
+        },
+        "required": ["soft", "hard"],
+    },
+}
 
 
 class StreamToLogger:
@@ -64,21 +67,102 @@ sys.stderr = StreamToLogger(logger, logging.ERROR)
 
 
 class LlamaModelInterface:
-    def __init__(self, model_path: str):
-        self.__llm = Llama(
-            model_path=model_path,
-            n_ctx=8192,
-            n_threads=6,
-            n_batch=512,
-            use_mmap=True,
-            use_mlock=False,
-            logit_bias=None,
-            temperature=0.6,
-            top_p=0.98,
-            stop=["</s>"],
-            chat_format="chatml",
-            verbose=False,
+    def __init__(
+        self,
+        backend: LLMBackend,
+        duplicate_threshold: float = 0.0,
+        prompts: dict[str, str] | None = None,
+    ):
+        self.__backend = backend
+        # Системные промпты вместо встроенных ("tasks", "executor") - для сравнения версий промптов
+        self.__prompts = prompts or {}
+        # Порог сходства задач, при котором оценка переиспользуется; 0 - не искать похожие
+        self.__duplicates = (
+            NearDuplicateDetector(duplicate_threshold) if duplicate_threshold > 0 else None
+        )
+        # Контекст llama.cpp не потокобезопасен: запросы получают слот у планировщика,
+        # слотов столько, сколько запросов бэкенд обрабатывает одновременно
+        self.__scheduler = InferenceScheduler(slots=backend.slots)
+        self.__single_flight = SingleFlight()
+        self.__stats_lock = threading.Lock()
+        self.__completion_tokens = 0
+        self.__generation_seconds = 0.0
+        self.__analyzed_tasks = 0
+        self.__reused_tasks = 0
+
+    @staticmethod
+    def __prompt_key(messages: list[dict[str, str]], max_tokens: int) -> str:
+        # Пробелы и переносы строк на результат не влияют
+        normalized = [(message["role"], " ".join(message["content"].split())) for message in messages]
+        return hashlib.sha256(
+            json.dumps([max_tokens, normalized], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+    def __complete(
+        self,
+        messages: list[dict[str, str]],
+        max_tokens: int,
+        priority: int = INTERACTIVE,
+        user: str = "anonymous",
+    ) -> dict:
+        """Запрос к модели; одинаковые одновременные запросы выполняются один раз.
+
+        Присоединившийся запрос поднимает ожидающего ведущего до своего приоритета:
+        интерактивный запрос не ждет в очереди пакетного анализа.
+        """
+        request = SlotRequest(priority, user)
+
+        def run() -> dict:
+            with self.__scheduler.slot(request=request):
+                started = time.perf_counter()
+                response = self.__backend.complete(messages, max_tokens, ASSESSMENT_RESPONSE_FORMAT)
+                elapsed = time.perf_counter() - started
+
+            with self.__stats_lock:
+                self.__completion_tokens += response.get("usage", {}).get("completion_tokens", 0)
+                self.__generation_seconds += elapsed
+            return response
+
+        response, coalesced = self.__single_flight.do(
+            self.__prompt_key(messages, max_tokens),
+            run,
+            state=request,
+            on_join=lambda leader: self.__scheduler.promote(leader, priority),
         )
+        if coalesced:
+            logger.info("Reused response of an identical in-flight request")
+        return response
+
+    @property
+    def reuses_similar(self) -> bool:
+        """Доступно ли переиспользование оценок похожих задач (задан порог сходства)"""
+        return self.__duplicates is not None
+
+    def metrics(self) -> dict:
+        with self.__stats_lock:
+            throughput = {
+                "completion_tokens": self.__completion_tokens,
+                "generation_seconds": self.__generation_seconds,
+                "tokens_per_second": (
+                    self.__completion_tokens / self.__generation_seconds
+                    if self.__generation_seconds
+                    else 0.0
+                ),
+            }
+            tasks = self.__analyzed_tasks + self.__reused_tasks
+            near_duplicates = {
+                "analyzed_tasks": self.__analyzed_tasks,
+                "reused_tasks": self.__reused_tasks,
+                "saved_share": self.__reused_tasks / tasks if tasks else 0.0,
+            }
+        return {
+            "backend": self.__backend.name,
+            "requests": self.__single_flight.metrics(),
+            "scheduler": self.__scheduler.metrics(),
+            "throughput": throughput,
+            "near_duplicates": near_duplicates,
+            **self.__backend.metrics(),
+        }
 
     def __build_tasks_prompt(self, context: str) -> list[dict[str, str]]:
         system_prompt = """\
@@ -125,7 +209,7 @@ class LlamaModelInterface:
             """
 
         return [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": self.__prompts.get("tasks", system_prompt)},
             {"role": "user", "content": f"Контекст проекта:\n{context}"},
         ]
 
@@ -171,102 +255,140 @@ class LlamaModelInterface:
                 - Будь строг в оценках - не завышай их без явных доказательств в тексте.
             """
 
-        return [{"role": "system", "content": system_prompt}]
+        return [{"role": "system", "content": self.__prompts.get("executor", system_prompt)}]
 
-    def analyze_tasks(
-        self, context: str, tasks: list[dict[str, str]]
-    ) -> Iterator[dict]:
-        start_time = time.time()
-        message_base = self.__build_tasks_prompt(context)
-        logger.info(f"Start analyzing {len(tasks)} tasks")
+    def __analyze_task(
+        self, message_base: list[dict[str, str]], task: dict[str, str], priority: int, user: str
+    ) -> dict:
+        task_start_time = time.time()
+        logging.info(f'Processing task #{task["id"]}')
 
-        context_tokens = self.__llm.tokenize(context.encode())
-        logger.info(f"Context size: {len(context_tokens)} tokens")
+        messages = message_base.copy()
+        messages.append(
+            {
+                "role": "user",
+                "content": f'Задача: {task["title"]}\nОписание задачи: {task["description"]}',
+            }
+        )
 
-        for task in tasks:
-            task_start_time = time.time()
-            logging.info(f'Processing task #{task["id"]}')
-
-            messages = message_base.copy()
-            messages.append(
-                {
-                    "role": "user",
-                    "content": f'Задача: {task["title"]}\nОписание задачи: {task["description"]}',
-                }
+        try:
+            # Слот запрашивается на каждую задачу, поэтому интерактивные запросы не ждут весь поток
+            response = self.__complete(messages, max_tokens=1536, priority=priority, user=user)
+
+            usage = response.get("usage", {})
+            logger.info(
+                f"prompt_tokens={usage.get('prompt_tokens', 'N/A')}, "
+                f"completion_tokens={usage.get('completion_tokens', 'N/A')}, "
+                f"total_tokens={usage.get('total_tokens', 'N/A')}"
             )
 
+            content = response["choices"][0]["message"]["content"]
+
             try:
-                response = self.__llm.create_chat_completion(
-                    max_tokens=1536,
-                    messages=messages,
-                    response_format={
-                        "type": "json_object",
-                        "schema": {
-                            "type": "object",
-                            "properties": {
-                                "soft": {
-                                    "type": "object",
-                                    "additionalProperties": {"type": "number"},
-                                },
-                                "hard": {
-                                    "type": "object",
-                                    "additionalProperties": {"type": "number"},
-                                },
-                            },
-                            "required": ["soft", "hard"],
-                        },
-                    },
+                parsed = json.loads(content)
+                task_time = time.time() - task_start_time
+                logger.info(
+                    f"Task #{task['id']} processed successfully in {task_time:.2f} seconds"
                 )
+                return {
+                    "id": task["id"],
+                    "title": task["title"],
+                    "assessment": parsed,
+                }
 
-                usage = response.get("usage", {})
-                logger.info(
-                    f"prompt_tokens={usage.get('prompt_tokens', 'N/A')}, "
-                    f"completion_tokens={usage.get('completion_tokens', 'N/A')}, "
-                    f"total_tokens={usage.get('total_tokens', 'N/A')}"
+            except json.JSONDecodeError as e:
+                logger.error(
+                    f"Parsing JSON error for task  #{task['id']}: {str(e)}"
                 )
+                return {
+                    "id": task["id"],
+                    "title": task["title"],
+                    "error": "Invalid JSON output",
+                    "raw_output": content,
+                }
 
-                content = response["choices"][0]["message"]["content"]
+        except Exception as e:
+            logger.error(
+                f"Exception occurred while processing task #{task['id']}: {str(e)}",
+                exc_info=True,
+            )
+            return {
+                "id": task["id"],
+                "title": task["title"],
+                "error": f"Exception occurred: {str(e)}",
+            }
 
-                try:
-                    parsed = json.loads(content)
-                    task_time = time.time() - task_start_time
-                    logger.info(
-                        f"Task #{task['id']} processed successfully in {task_time:.2f} seconds"
-                    )
-                    yield {
-                        "id": task["id"],
-                        "title": task["title"],
-                        "assessment": parsed,
-                    }
+    def analyze_tasks(
+        self,
+        context: str,
+        tasks: list[dict[str, str]],
+        priority: int = BULK,
+        user: str = "anonymous",
+        reuse_similar: bool = False,
+    ) -> Iterator[dict]:
+        """Анализ задач проекта; результаты - по одному на задачу в исходном порядке.
+
+        С reuse_similar почти одинаковые задачи не анализируются повторно: они получают
+        оценку первой похожей задачи с полями duplicate_of и similarity.
+        """
+        if reuse_similar and self.__duplicates is None:
+            raise ValueError("Similar task reuse is disabled on this server (TASK_DUPLICATE_THRESHOLD=0)")
 
-                except json.JSONDecodeError as e:
-                    logger.error(
-                        f"Parsing JSON error for task  #{task['id']}: {str(e)}"
+        start_time = time.time()
+        message_base = self.__build_tasks_prompt(context)
+        logger.info(f"Start analyzing {len(tasks)} tasks")
+
+        logger.info(f"Context size: {self.__backend.count_tokens(context)} tokens")
+
+        clusters = None
+        if reuse_similar and self.__duplicates is not None and len(tasks) > 1:
+            clusters = self.__duplicates.cluster(
+                [f'{task["title"]}\n{task["description"]}' for task in tasks]
+            )
+        assessments = {}
+        reused = 0
+
+        for position, task in enumerate(tasks):
+            if clusters is not None:
+                representative, similarity = clusters[position]
+                # Если анализ представителя не удался, задача анализируется сама
+                if representative != position and representative in assessments:
+                    reused += 1
+                    with self.__stats_lock:
+                        self.__reused_tasks += 1
+                    logger.info(
+                        f"Task #{task['id']} reuses assessment of #{tasks[representative]['id']} "
+                        f"(similarity {similarity:.2f})"
                     )
                     yield {
                         "id": task["id"],
                         "title": task["title"],
-                        "error": "Invalid JSON output",
-                        "raw_output": content,
+                        "assessment": assessments[representative],
+                        "duplicate_of": tasks[representative]["id"],
+                        "similarity": round(similarity, 3),
                     }
+                    continue
 
-            except Exception as e:
-                logger.error(
-                    f"Exception occurred while processing task #{task['id']}: {str(e)}",
-                    exc_info=True,
-                )
-                yield {
-                    "id": task["id"],
-                    "title": task["title"],
-                    "error": f"Exception occurred: {str(e)}",
-                }
+            result = self.__analyze_task(message_base, task, priority, user)
+            with self.__stats_lock:
+                self.__analyzed_tasks += 1
+            if clusters is not None and "assessment" in result:
+                assessments[position] = result["assessment"]
+            yield result
 
+        if reused:
+            logger.info(
+                f"Near-duplicate tasks: {reused} of {len(tasks)} reused assessments, "
+                f"{reused / len(tasks):.0%} of inferences saved"
+            )
         total_time = time.time() - start_time
         logger.info(
             f"End of task analysis. Total execution time: {total_time:.2f} seconds"
         )
 
-    def analyze_executor(self, resume_text: str) -> dict:
+    def analyze_executor(
+        self, resume_text: str, priority: int = INTERACTIVE, user: str = "anonymous"
+    ) -> dict:
         start_time = time.time()
         logger.info("Starting executor skills analysis")
 
@@ -274,27 +396,7 @@ class LlamaModelInterface:
         messages.append({"role": "user", "content": resume_text})
 
         try:
-            response = self.__llm.create_chat_completion(
-                max_tokens=2048,
-                messages=messages,
-                response_format={
-                    "type": "json_object",
-                    "schema": {
-                        "type": "object",
-                        "properties": {
-                            "soft": {
-                                "type": "object",
-                                "additionalProperties": {"type": "number"},
-                            },
-                            "hard": {
-                                "type": "object",
-                                "additionalProperties": {"type": "number"},
-                            },
-                        },
-                        "required": ["soft", "hard"],
-                    },
-                },
-            )
+            response = self.__complete(messages, max_tokens=2048, priority=priority, user=user)
 
             usage = response.get("usage", {})
             logger.info(
@@ -0,0 +1,35 @@
+class LoadTracker:
+    """Загрузка исполнителей в рамках одного распределения.
+
+    Ключ исполнителя - (число назначенных задач, суммарная трудоемкость, исходная позиция),
+    поэтому порядок совпадает со стабильной сортировкой по загрузке. Чтение загрузки и ключа
+    для выбора менее загруженного среди равных по оценке и назначение задачи - O(1).
+    """
+
+    def __init__(self, executor_ids: list[str]):
+        self.__order: dict[str, int] = {
+            executor_id: position for position, executor_id in enumerate(executor_ids)
+        }
+        self.__task_counts: dict[str, int] = dict.fromkeys(self.__order, 0)
+        self.__efforts: dict[str, float] = dict.fromkeys(self.__order, 0.0)
+
+    def __len__(self) -> int:
+        return len(self.__order)
+
+    def task_count(self, executor_id: str) -> int:
+        return self.__task_counts.get(executor_id, 0)
+
+    def effort(self, executor_id: str) -> float:
+        return self.__efforts.get(executor_id, 0.0)
+
+    def sort_key(self, executor_id: str) -> tuple[int, float, int]:
+        """Ключ порядка исполнителей: меньше - менее загружен"""
+        return (
+            self.__task_counts[executor_id],
+            self.__efforts[executor_id],
+            self.__order[executor_id],
+        )
+
+    def assign(self, executor_id: str, effort: float = 0.0) -> None:
+        self.__task_counts[executor_id] += 1
+        self.__efforts[executor_id] += effort
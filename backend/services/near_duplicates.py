@@ -0,0 +1,91 @@
+import hashlib
+import re
+import numpy as np
+
+# Простое число для универсального хэширования 32-битных хэшей
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def shingles(text: str, size: int = 5) -> set[str]:
+    """Символьные k-граммы нормализованного текста: устойчивы к коротким текстам и окончаниям слов"""
+    text = normalize(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class NearDuplicateDetector:
+    """Поиск почти одинаковых задач по MinHash и LSH.
+
+    Задачи перебираются по порядку: задача присоединяется к кластеру более
+    ранней задачи-представителя, если оценка сходства Жаккара с ним не ниже
+    порога, иначе сама становится представителем. Сравнение только с
+    представителем не дает кластеру расползтись по цепочке похожих задач.
+    Кандидаты в представители берутся из корзин LSH, а не перебором всех пар.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, bands: int = 32, shingle_size: int = 5):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # Фиксированное зерно: одинаковые тексты дают одинаковые подписи между запусками
+        rng = np.random.default_rng(1)
+        self.a = rng.integers(1, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        items = shingles(text, self.shingle_size)
+        if not items:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=4).digest(), "little") for item in items],
+            dtype=np.uint64,
+        )
+        # a и хэш меньше 2^32, произведение помещается в uint64
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """Оценка сходства Жаккара - доля совпавших минимумов"""
+        return float(np.mean(first == second))
+
+    def cluster(self, texts: list[str]) -> list[tuple[int, float]]:
+        """Для каждого текста - индекс представителя его кластера и сходство с ним"""
+        signatures = [self.signature(text) for text in texts]
+        buckets: dict[tuple[int, bytes], list[int]] = {}
+        result = []
+
+        for position, signature in enumerate(signatures):
+            band_keys = [
+                (band, signature[band * self.rows : (band + 1) * self.rows].tobytes())
+                for band in range(self.bands)
+            ]
+            candidates = {
+                representative
+                for key in band_keys
+                for representative in buckets.get(key, ())
+            }
+
+            best, best_similarity = position, 0.0
+            for representative in candidates:
+                score = self.similarity(signature, signatures[representative])
+                if score >= self.threshold and score > best_similarity:
+                    best, best_similarity = representative, score
+
+            result.append((best, best_similarity if best != position else 1.0))
+            if best == position:
+                for key in band_keys:
+                    buckets.setdefault(key, []).append(position)
+
+        return result
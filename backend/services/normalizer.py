@@ -1,31 +1,22 @@
 import logging
-from pathlib import Path
 from src.schemas.requests import SkillLevel
 from assets.skills.synonyms import SKILL_SYNONYMS
+from src.logger import setup_logging
 
-# Настройка логирования
-log_dir = Path(__file__).parent.parent / "logs"
-log_dir.mkdir(exist_ok=True)
+# Настраиваем логирование
+setup_logging()
 
+# Пишет в allocator.log через обработчик из setup_logging
 logger = logging.getLogger("normalizer")
-logger.setLevel(logging.INFO)
-logger.propagate = False
-
-# Очищаем существующие обработчики
-logger.handlers = []
-
-# Добавляем новый обработчик файла
-file_handler = logging.FileHandler(log_dir / "allocator.log", encoding="utf-8", mode="a")
-file_handler.setLevel(logging.INFO)
-
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-
-logger.addHandler(file_handler)
 
 class SkillNormalizer:
     def __init__(self):
         self.synonyms = SKILL_SYNONYMS
+        # Обратный индекс синоним -> каноническое название, чтобы не перебирать словарь на каждый навык
+        self.canonical_names = {}
+        for normalized_name, synonyms in self.synonyms.items():
+            for synonym in synonyms:
+                self.canonical_names.setdefault(synonym, normalized_name)
 
     def normalize_skill_name(self, skill_name: str) -> str:
         skill_name = skill_name.lower().strip()
@@ -35,11 +26,7 @@ class SkillNormalizer:
             return skill_name
             
         # Ищем среди синонимов
-        for normalized_name, synonyms in self.synonyms.items():
-            if skill_name in synonyms:
-                return normalized_name
-                
-        return skill_name
+        return self.canonical_names.get(skill_name, skill_name)
 
     def normalize_skills(self, skills: list[SkillLevel]) -> list[SkillLevel]:
         normalized_skills = []
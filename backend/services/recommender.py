@@ -0,0 +1,51 @@
+import heapq
+import threading
+from src.schemas.requests import TaskWithSkills, ExecutorWithSkills
+from services.task_allocator import TaskAllocator, SKILL_WEIGHT, EXPERIENCE_WEIGHT
+from services.skill_index import ExecutorSkillIndex
+from services.executor_store import ExecutorProfileStore
+
+
+class Recommender:
+    """Top-K рекомендации на основе оценок TaskAllocator"""
+
+    def __init__(self, allocator: TaskAllocator):
+        self.allocator = allocator
+        # Индекс всего хранилища профилей и generation хранилища, для которого он построен
+        self.__store_index: tuple[int, ExecutorSkillIndex] | None = None
+        self.__lock = threading.Lock()
+
+    def store_index(self, store: ExecutorProfileStore) -> ExecutorSkillIndex:
+        """Индекс хранилища перестраивается, только когда меняется его generation"""
+        with self.__lock:
+            generation = store.generation
+            if self.__store_index is not None and self.__store_index[0] == generation:
+                return self.__store_index[1]
+
+            index = ExecutorSkillIndex(store.executors())
+            self.__store_index = (generation, index)
+            return index
+
+    def top_executors(
+        self, task: TaskWithSkills, executors: list[ExecutorWithSkills], k: int
+    ) -> list[dict]:
+        # Список из запроса индексируется заново: построение индекса стоит столько же, сколько сверка с кэшем
+        return ExecutorSkillIndex(executors).top_executors(task, k)
+
+    def top_stored_executors(self, task: TaskWithSkills, store: ExecutorProfileStore, k: int) -> list[dict]:
+        return self.store_index(store).top_executors(task, k)
+
+    def top_tasks(
+        self, executor: ExecutorWithSkills, tasks: list[TaskWithSkills], k: int
+    ) -> list[dict]:
+        def score(task: TaskWithSkills) -> dict:
+            skill_score = self.allocator._calculate_skill_match(task, executor)
+            experience_score = self.allocator._calculate_experience_match(task, executor)
+            return {
+                "id": task.id,
+                "score": skill_score * SKILL_WEIGHT + experience_score * EXPERIENCE_WEIGHT,
+                "skill_score": skill_score,
+                "experience_score": experience_score,
+            }
+
+        return heapq.nlargest(k, map(score, tasks), key=lambda item: item["score"])
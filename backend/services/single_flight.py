@@ -0,0 +1,79 @@
+import threading
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+        # Данные ведущего вызова, доступные присоединившимся (например, его место в очереди)
+        self.state = None
+
+
+class SingleFlight:
+    """Объединение одинаковых одновременных вызовов.
+
+    Пока вызов с ключом выполняется, остальные вызовы с тем же ключом
+    не запускают функцию, а ждут и получают тот же результат (или ошибку).
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls: dict[str, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(
+        self,
+        key: str,
+        function: Callable[[], T],
+        state=None,
+        on_join: Callable[[object], None] | None = None,
+    ) -> tuple[T, bool]:
+        """Результат и признак того, что он получен от чужого вызова.
+
+        state сохраняется у ведущего вызова; присоединившийся вызов перед ожиданием
+        передает его в on_join.
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                call.state = state
+                self.__calls[key] = call
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            if on_join is not None:
+                on_join(call.state)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
+
+    def metrics(self) -> dict:
+        with self.__lock:
+            return {
+                "in_flight": len(self.__calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+            }
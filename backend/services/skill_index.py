@@ -0,0 +1,144 @@
+import heapq
+from bisect import bisect_left
+from src.schemas.requests import TaskWithSkills, ExecutorWithSkills
+from services.task_allocator import SKILL_WEIGHT, EXPERIENCE_WEIGHT
+
+
+class ExecutorSkillIndex:
+    """Инвертированный индекс навыков исполнителей для выбора top-K под задачу.
+
+    Оценка совпадает со статической частью TaskAllocator._calculate_fit_score
+    (навыки и опыт), но считается только для исполнителей с общими с задачей
+    навыками. Остальные исполнители отличаются лишь оценкой опыта и добираются
+    из отсортированного по среднему уровню списка бинарным поиском.
+    """
+
+    def __init__(self, executors: list[ExecutorWithSkills]):
+        self.executors = list(executors)
+        # навык -> [(индекс исполнителя, максимальный уровень)]
+        self.soft: dict[str, list[tuple[int, int]]] = {}
+        self.hard: dict[str, list[tuple[int, int]]] = {}
+        self.avg_levels: list[float | None] = []
+
+        for position, executor in enumerate(self.executors):
+            self.__add_skills(self.soft, position, executor.soft_skills)
+            self.__add_skills(self.hard, position, executor.hard_skills)
+
+            levels = [skill.level for skill in executor.soft_skills + executor.hard_skills]
+            self.avg_levels.append(sum(levels) / len(levels) if levels else None)
+
+        self.sorted_levels = sorted(
+            (level, position)
+            for position, level in enumerate(self.avg_levels)
+            if level is not None
+        )
+        self.no_skills = [
+            position for position, level in enumerate(self.avg_levels) if level is None
+        ]
+
+    def __len__(self) -> int:
+        return len(self.executors)
+
+    @staticmethod
+    def __add_skills(index: dict, position: int, skills) -> None:
+        levels: dict[str, int] = {}
+        for skill in skills:
+            levels[skill.name] = max(levels.get(skill.name, 0), skill.level)
+        for name, level in levels.items():
+            index.setdefault(name, []).append((position, level))
+
+    @staticmethod
+    def __category_scores(index: dict, task_skills) -> dict[int, float]:
+        # Та же формула, что в _calculate_skill_match: среднее по навыкам задачи
+        scores: dict[int, float] = {}
+        if not task_skills:
+            return scores
+        for task_skill in task_skills:
+            for position, level in index.get(task_skill.name, ()):
+                match = min(task_skill.level, level) / task_skill.level
+                scores[position] = scores.get(position, 0.0) + match
+        return {position: score / len(task_skills) for position, score in scores.items()}
+
+    def _experience_score(self, position: int, task_level: float | None) -> float:
+        executor_level = self.avg_levels[position]
+        if executor_level is None:
+            return 0.5
+        if task_level is None:
+            return 1.0
+        return max(0.0, 1.0 - abs(executor_level - task_level) / 10)
+
+    def _closest_by_level(self, task_level: float | None):
+        """Исполнители по убыванию оценки опыта (без учета навыков)"""
+        if task_level is None:
+            # Без требований опыт равен 1.0 для всех, у кого есть навыки
+            for _, position in self.sorted_levels:
+                yield position
+            yield from self.no_skills
+            return
+
+        right = bisect_left(self.sorted_levels, (task_level, -1))
+        left = right - 1
+        fallback_score = 0.5
+        while left >= 0 or right < len(self.sorted_levels):
+            left_distance = task_level - self.sorted_levels[left][0] if left >= 0 else None
+            right_distance = (
+                self.sorted_levels[right][0] - task_level
+                if right < len(self.sorted_levels)
+                else None
+            )
+            if right_distance is None or (
+                left_distance is not None and left_distance <= right_distance
+            ):
+                distance, position = left_distance, self.sorted_levels[left][1]
+                left -= 1
+            else:
+                distance, position = right_distance, self.sorted_levels[right][1]
+                right += 1
+
+            # Исполнители без навыков получают фиксированную оценку 0.5
+            if self.no_skills and max(0.0, 1.0 - distance / 10) < fallback_score:
+                yield from self.no_skills
+                fallback_score = -1.0
+            yield position
+
+        if fallback_score >= 0:
+            yield from self.no_skills
+
+    def top_executors(self, task: TaskWithSkills, k: int) -> list[dict]:
+        task_levels = [skill.level for skill in task.soft_skills + task.hard_skills]
+        task_level = sum(task_levels) / len(task_levels) if task_levels else None
+
+        soft_scores = self.__category_scores(self.soft, task.soft_skills)
+        hard_scores = self.__category_scores(self.hard, task.hard_skills)
+
+        candidates = []
+        for position in soft_scores.keys() | hard_scores.keys():
+            soft = soft_scores.get(position, 0.0)
+            hard = hard_scores.get(position, 0.0)
+            if task.soft_skills and task.hard_skills:
+                skill_score = 0.4 * soft + 0.6 * hard
+            else:
+                skill_score = soft if task.soft_skills else hard
+            candidates.append(self.__candidate(position, skill_score, task_level))
+
+        # Без общих навыков skill_score = 0, и лучшие из них - ближайшие по уровню опыта
+        matched = soft_scores.keys() | hard_scores.keys()
+        filled = 0
+        for position in self._closest_by_level(task_level):
+            if filled >= k:
+                break
+            if position in matched:
+                continue
+            candidates.append(self.__candidate(position, 0.0, task_level))
+            filled += 1
+
+        return heapq.nlargest(k, candidates, key=lambda item: item["score"])
+
+    def __candidate(self, position: int, skill_score: float, task_level: float | None) -> dict:
+        experience_score = self._experience_score(position, task_level)
+        return {
+            "id": self.executors[position].id,
+            "score": skill_score * SKILL_WEIGHT + experience_score * EXPERIENCE_WEIGHT,
+            "skill_score": skill_score,
+            "experience_score": experience_score,
+        }
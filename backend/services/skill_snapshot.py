@@ -0,0 +1,315 @@
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+import numpy as np
+from src.schemas.requests import ExecutorWithSkills, SkillLevel
+
+MANIFEST_NAME = "manifest.json"
+CATEGORIES = ("soft", "hard")
+
+
+class SkillSnapshot:
+    """Снимок нормализованной матрицы навыков исполнителей на диске.
+
+    Для каждой категории навыков (soft/hard) хранится CSR-матрица
+    "исполнитель x навык": indptr, indices (номер навыка в словаре) и levels.
+    Массивы открываются через np.load(mmap_mode="r"), поэтому воркеры делят
+    одни и те же страницы файла и не разбирают JSON профилей при старте.
+    Таблица id и словарь навыков лежат рядом в meta-файле версии, а manifest.json
+    атомарно указывает на текущую версию.
+    """
+
+    def __init__(self, directory: Path, manifest: dict, meta: dict, arrays: dict[str, np.ndarray]):
+        self.directory = directory
+        self.version = manifest["version"]
+        # Метка updated последней учтенной записи PocketBase
+        self.synced_until = manifest.get("synced_until", "")
+        self.ids: list[str] = meta["ids"]
+        self.names: list[str] = meta["names"]
+        self.record_ids: list[str] = meta["record_ids"]
+        self.vocabulary: list[str] = meta["vocabulary"]
+        self.arrays = arrays
+        self.positions = {executor_id: position for position, executor_id in enumerate(self.ids)}
+        # Столбцовый индекс для оценки по навыкам задачи, строится при первой оценке
+        self.__columns: dict | None = None
+        self.__columns_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, executor_id: str) -> bool:
+        return executor_id in self.positions
+
+    @classmethod
+    def open(cls, directory: Path) -> "SkillSnapshot | None":
+        manifest_path = directory / MANIFEST_NAME
+        if not manifest_path.exists():
+            return None
+
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        version = manifest["version"]
+        meta = json.loads((directory / f"meta.{version}.json").read_text(encoding="utf-8"))
+        arrays = {
+            f"{category}_{part}": np.load(directory / f"{category}_{part}.{version}.npy", mmap_mode="r")
+            for category in CATEGORIES
+            for part in ("indptr", "indices", "levels")
+        }
+        return cls(directory, manifest, meta, arrays)
+
+    def executor(self, position: int) -> ExecutorWithSkills:
+        skills = {}
+        for category in CATEGORIES:
+            indptr = self.arrays[f"{category}_indptr"]
+            start, end = int(indptr[position]), int(indptr[position + 1])
+            indices = self.arrays[f"{category}_indices"][start:end]
+            levels = self.arrays[f"{category}_levels"][start:end]
+            skills[category] = [
+                SkillLevel(name=self.vocabulary[index], level=int(level))
+                for index, level in zip(indices, levels)
+            ]
+
+        return ExecutorWithSkills(
+            id=self.ids[position],
+            name=self.names[position],
+            soft_skills=skills["soft"],
+            hard_skills=skills["hard"],
+        )
+
+    def get(self, executor_id: str) -> ExecutorWithSkills | None:
+        position = self.positions.get(executor_id)
+        return None if position is None else self.executor(position)
+
+    def columns(self) -> dict:
+        """Транспонированные CSR-массивы (навык -> строки исполнителей и уровни) и сумма уровней по строкам.
+
+        Строятся один раз на версию снимка из отображенных массивов, профили при этом не собираются.
+        """
+        with self.__columns_lock:
+            if self.__columns is not None:
+                return self.__columns
+
+            columns = {
+                "vocabulary": {name: index for index, name in enumerate(self.vocabulary)},
+                "level_sums": np.zeros(len(self.ids), dtype=np.float64),
+                "level_counts": np.zeros(len(self.ids), dtype=np.int64),
+            }
+            for category in CATEGORIES:
+                indptr = self.arrays[f"{category}_indptr"]
+                indices = self.arrays[f"{category}_indices"]
+                levels = self.arrays[f"{category}_levels"]
+                lengths = np.diff(indptr)
+                entry_rows = np.repeat(np.arange(len(lengths)), lengths)
+
+                order = np.argsort(indices, kind="stable")
+                columns[category] = (
+                    np.concatenate(
+                        [np.zeros(1, dtype=np.int64),
+                         np.cumsum(np.bincount(indices, minlength=len(self.vocabulary)), dtype=np.int64)]
+                    ),
+                    entry_rows[order],
+                    np.asarray(levels[order], dtype=np.int64),
+                )
+                columns["level_sums"] += np.bincount(entry_rows, weights=levels, minlength=len(self.ids))
+                columns["level_counts"] += lengths
+            self.__columns = columns
+            return columns
+
+    def record_id(self, executor_id: str) -> str | None:
+        position = self.positions.get(executor_id)
+        return None if position is None else self.record_ids[position]
+
+    @classmethod
+    def build(
+        cls,
+        directory: Path,
+        profiles: list[tuple[ExecutorWithSkills, str]],
+        synced_until: str = "",
+    ) -> "SkillSnapshot":
+        """Полная сборка снимка из пар (нормализованный профиль, id записи PocketBase)"""
+        empty = {
+            "ids": [], "names": [], "record_ids": [], "vocabulary": [],
+        }
+        empty_arrays = {}
+        for category in CATEGORIES:
+            empty_arrays[f"{category}_indptr"] = np.zeros(1, dtype=np.int64)
+            empty_arrays[f"{category}_indices"] = np.zeros(0, dtype=np.int32)
+            empty_arrays[f"{category}_levels"] = np.zeros(0, dtype=np.int8)
+        base = cls(directory, {"version": "", "synced_until": synced_until}, empty, empty_arrays)
+        return base.merge(profiles, synced_until)
+
+    def merge(
+        self,
+        profiles: list[tuple[ExecutorWithSkills, str]],
+        synced_until: str | None = None,
+    ) -> "SkillSnapshot":
+        """Новая версия снимка с измененными профилями.
+
+        Неизмененные строки копируются срезами массивов без разбора профилей,
+        измененные и новые исполнители дописываются в конец.
+        """
+        changed = {executor.id: (executor, record_id) for executor, record_id in profiles}
+        keep_rows = np.array(
+            [executor_id not in changed for executor_id in self.ids], dtype=bool
+        )
+
+        vocabulary = list(self.vocabulary)
+        vocabulary_index = {name: index for index, name in enumerate(vocabulary)}
+
+        arrays = {}
+        for category in CATEGORIES:
+            indptr = np.asarray(self.arrays[f"{category}_indptr"])
+            lengths = np.diff(indptr)
+            # Строка каждого ненулевого элемента - чтобы отфильтровать элементы удаляемых строк
+            entry_rows = np.repeat(np.arange(len(lengths)), lengths)
+            keep_entries = keep_rows[entry_rows] if len(entry_rows) else np.zeros(0, dtype=bool)
+
+            new_indices, new_levels, new_lengths = [], [], []
+            for executor, _ in changed.values():
+                skills = executor.soft_skills if category == "soft" else executor.hard_skills
+                for skill in skills:
+                    if skill.name not in vocabulary_index:
+                        vocabulary_index[skill.name] = len(vocabulary)
+                        vocabulary.append(skill.name)
+                    new_indices.append(vocabulary_index[skill.name])
+                    new_levels.append(skill.level)
+                new_lengths.append(len(skills))
+
+            all_lengths = np.concatenate(
+                [lengths[keep_rows], np.array(new_lengths, dtype=np.int64)]
+            )
+            arrays[f"{category}_indptr"] = np.concatenate(
+                [np.zeros(1, dtype=np.int64), np.cumsum(all_lengths, dtype=np.int64)]
+            )
+            arrays[f"{category}_indices"] = np.concatenate(
+                [np.asarray(self.arrays[f"{category}_indices"])[keep_entries],
+                 np.array(new_indices, dtype=np.int32)]
+            )
+            arrays[f"{category}_levels"] = np.concatenate(
+                [np.asarray(self.arrays[f"{category}_levels"])[keep_entries],
+                 np.array(new_levels, dtype=np.int8)]
+            )
+
+        kept = np.flatnonzero(keep_rows)
+        meta = {
+            "ids": [self.ids[i] for i in kept] + [executor.id for executor, _ in changed.values()],
+            "names": [self.names[i] for i in kept] + [executor.name for executor, _ in changed.values()],
+            "record_ids": [self.record_ids[i] for i in kept] + [record_id for _, record_id in changed.values()],
+            "vocabulary": vocabulary,
+        }
+        manifest = {
+            "version": uuid.uuid4().hex[:12],
+            "synced_until": self.synced_until if synced_until is None else max(self.synced_until, synced_until),
+        }
+        return self.__write(self.directory, manifest, meta, arrays)
+
+    @classmethod
+    def __write(cls, directory: Path, manifest: dict, meta: dict, arrays: dict) -> "SkillSnapshot":
+        directory.mkdir(parents=True, exist_ok=True)
+        version = manifest["version"]
+
+        (directory / f"meta.{version}.json").write_text(
+            json.dumps(meta, ensure_ascii=False), encoding="utf-8"
+        )
+        for name, array in arrays.items():
+            np.save(directory / f"{name}.{version}.npy", array)
+
+        # Подмена manifest атомарна: читатели видят либо старую, либо новую версию целиком
+        temp_manifest = directory / f"{MANIFEST_NAME}.{version}.tmp"
+        temp_manifest.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(temp_manifest, directory / MANIFEST_NAME)
+
+        snapshot = cls.open(directory)
+        snapshot.cleanup()
+        return snapshot
+
+    def cleanup(self, keep: int = 2) -> None:
+        """Удаление старых версий; предыдущая остается для воркеров, которые еще ее читают"""
+        versions = {}
+        for path in self.directory.glob("meta.*.json"):
+            versions[path.name.split(".")[1]] = path.stat().st_mtime
+
+        for version in sorted(versions, key=versions.get, reverse=True)[keep:]:
+            if version == self.version:
+                continue
+            for path in self.directory.glob(f"*.{version}.*"):
+                try:
+                    path.unlink()
+                except OSError:
+                    # Файл может быть отображен в память другим процессом (Windows)
+                    pass
+
+
+class SnapshotExecutor:
+    """Исполнитель из снимка для результата распределения: навыки читаются из массивов снимка"""
+
+    __slots__ = ("id", "name", "position")
+
+    def __init__(self, executor_id: str, name: str, position: int):
+        self.id = executor_id
+        self.name = name
+        self.position = position
+
+
+class SnapshotSkillMatrix:
+    """Оценки навыков и опыта исполнителей снимка сразу для всех исполнителей запроса.
+
+    Формулы совпадают с TaskAllocator._calculate_skill_match и
+    _calculate_experience_match, но считаются по столбцам CSR-массивов снимка:
+    для навыка задачи обходятся только исполнители, у которых он есть.
+    """
+
+    def __init__(self, snapshot: SkillSnapshot, positions: list[int]):
+        self.snapshot = snapshot
+        self.executors = [
+            SnapshotExecutor(snapshot.ids[position], snapshot.names[position], position)
+            for position in positions
+        ]
+        self.columns = snapshot.columns()
+        # Строка снимка -> индекс исполнителя в запросе, -1 - исполнитель не участвует
+        self.selection = np.full(len(snapshot), -1, dtype=np.int64)
+        self.selection[np.asarray(positions, dtype=np.int64)] = np.arange(len(positions))
+
+        counts = self.columns["level_counts"][positions]
+        sums = self.columns["level_sums"][positions]
+        self.has_skills = counts > 0
+        self.average_levels = np.divide(sums, counts, out=np.zeros(len(positions)), where=self.has_skills)
+
+    def __len__(self) -> int:
+        return len(self.executors)
+
+    def __category_scores(self, category: str, task_skills: list[SkillLevel]) -> np.ndarray:
+        indptr, rows, levels = self.columns[category]
+        scores = np.zeros(len(self.executors))
+        for task_skill in task_skills:
+            column = self.columns["vocabulary"].get(task_skill.name)
+            if column is None:
+                continue
+            start, end = indptr[column], indptr[column + 1]
+            selected = self.selection[rows[start:end]]
+            mask = selected >= 0
+            # В нормализованном профиле навык встречается один раз, поэтому максимум по навыкам не нужен
+            scores[selected[mask]] += np.minimum(task_skill.level, levels[start:end][mask]) / task_skill.level
+        return scores / len(task_skills)
+
+    def skill_scores(self, task) -> np.ndarray:
+        if task.soft_skills and task.hard_skills:
+            return (
+                0.4 * self.__category_scores("soft", task.soft_skills)
+                + 0.6 * self.__category_scores("hard", task.hard_skills)
+            )
+        if task.soft_skills:
+            return self.__category_scores("soft", task.soft_skills)
+        if task.hard_skills:
+            return self.__category_scores("hard", task.hard_skills)
+        return np.zeros(len(self.executors))
+
+    def experience_scores(self, task) -> np.ndarray:
+        task_levels = [skill.level for skill in task.soft_skills + task.hard_skills]
+        if not task_levels:
+            # Без требований подходят все, у исполнителей без навыков - базовый уровень
+            return np.where(self.has_skills, 1.0, 0.5)
+        task_level = sum(task_levels) / len(task_levels)
+        scores = np.maximum(0.0, 1.0 - np.abs(self.average_levels - task_level) / 10)
+        return np.where(self.has_skills, scores, 0.5)
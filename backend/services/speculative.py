@@ -0,0 +1,95 @@
+import threading
+import numpy as np
+from llama_cpp import Llama
+from llama_cpp.llama_speculative import LlamaDraftModel, LlamaPromptLookupDecoding
+
+PROMPT_LOOKUP = "prompt_lookup"
+# Длина черновика по умолчанию: поиск по промпту дешев, черновая модель - нет
+DEFAULT_PROMPT_LOOKUP_TOKENS = 10
+DEFAULT_DRAFT_MODEL_TOKENS = 4
+
+
+class GGUFDraftModel(LlamaDraftModel):
+    """Черновик от маленькой GGUF-модели с тем же словарем, что у основной.
+
+    Llama.generate переиспользует KV-кэш по общему префиксу, поэтому на каждом
+    шаге черновая модель досчитывает только новые токены.
+    """
+
+    def __init__(self, model_path: str, num_pred_tokens: int, n_ctx: int = 8192, n_threads: int = 2):
+        self.num_pred_tokens = num_pred_tokens
+        self.llm = Llama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            n_threads=n_threads,
+            n_batch=512,
+            use_mmap=True,
+            verbose=False,
+        )
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs) -> np.ndarray:
+        draft = []
+        for token in self.llm.generate(input_ids.tolist(), top_k=1, temp=0.0, reset=True):
+            draft.append(token)
+            if len(draft) >= self.num_pred_tokens:
+                break
+        return np.array(draft, dtype=np.intc)
+
+
+class TrackedDraftModel(LlamaDraftModel):
+    """Обертка черновика, считающая долю принятых токенов.
+
+    При следующем вызове в продолжении последовательности видно, какие токены
+    основная модель приняла: это совпадающий с прошлым черновиком префикс.
+    """
+
+    def __init__(self, draft_model: LlamaDraftModel):
+        self.draft_model = draft_model
+        self.drafted = 0
+        self.accepted = 0
+        self.__last_input: np.ndarray | None = None
+        self.__last_draft: np.ndarray | None = None
+        self.__lock = threading.Lock()
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs) -> np.ndarray:
+        with self.__lock:
+            last_input, last_draft = self.__last_input, self.__last_draft
+            if (
+                last_draft is not None
+                and len(input_ids) > len(last_input)
+                and np.array_equal(input_ids[: len(last_input)], last_input)
+            ):
+                new_tokens = input_ids[len(last_input):]
+                for drafted, actual in zip(last_draft, new_tokens):
+                    if drafted != actual:
+                        break
+                    self.accepted += 1
+
+        draft = self.draft_model(input_ids, **kwargs)
+
+        with self.__lock:
+            self.drafted += len(draft)
+            self.__last_input = np.array(input_ids, copy=True)
+            self.__last_draft = draft
+        return draft
+
+    def metrics(self) -> dict:
+        with self.__lock:
+            return {
+                "drafted_tokens": self.drafted,
+                "accepted_tokens": self.accepted,
+                "acceptance_rate": self.accepted / self.drafted if self.drafted else 0.0,
+            }
+
+
+def create_draft_model(spec: str | None, num_pred_tokens: int | None = None) -> TrackedDraftModel | None:
+    """Черновик по настройке: None, "prompt_lookup" или путь к GGUF-модели"""
+    if not spec or spec.lower() == "none":
+        return None
+    if spec == PROMPT_LOOKUP:
+        draft_model = LlamaPromptLookupDecoding(
+            num_pred_tokens=num_pred_tokens or DEFAULT_PROMPT_LOOKUP_TOKENS
+        )
+    else:
+        draft_model = GGUFDraftModel(spec, num_pred_tokens or DEFAULT_DRAFT_MODEL_TOKENS)
+    return TrackedDraftModel(draft_model)
@@ -1,43 +1,124 @@
 import logging
 import os
+import time
+import numpy as np
 import traceback
 from datetime import datetime
-from pathlib import Path
 from src.schemas.requests import TaskWithSkills, ExecutorWithSkills, SkillLevel
 from services.normalizer import SkillNormalizer
+from services.load_tracker import LoadTracker
+from services.allocation_refiner import LocalSearchRefiner
 from typing import List, Dict, Any
 from src.logger import setup_logging
 
 # Настраиваем логирование
 setup_logging()
 
-# Получаем логгер для task_allocator
+# Получаем логгер для task_allocator (allocator.log, обработчик из setup_logging)
 logger = logging.getLogger("task_allocator")
 
-# Настройка логирования
-log_dir = Path(__file__).parent.parent / "logs"
-log_dir.mkdir(exist_ok=True)
+# Сколько id нераспределенных задач попадает в итоговую запись лога
+SUMMARY_UNASSIGNED_LIMIT = 20
 
-logger.setLevel(logging.INFO)
-logger.propagate = False
+# Базовые веса для разных факторов
+SKILL_WEIGHT = 0.5
+LOAD_WEIGHT = 0.3
+EXPERIENCE_WEIGHT = 0.2
+# Минимальный порог соответствия
+MIN_FIT_SCORE = 0.3
+# Число задач, при котором оценка по нагрузке становится нулевой
+MAX_TASKS_PER_EXECUTOR = 5
 
-# Очищаем существующие обработчики
-logger.handlers = []
 
-# Добавляем новый обработчик файла
-file_handler = logging.FileHandler(log_dir / "allocator.log", encoding="utf-8", mode="a")
-file_handler.setLevel(logging.INFO)
+class AllocationContext:
+    """Состояние одного распределения.
 
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
+    Создается на каждый вызов allocate_tasks и не разделяется между вызовами,
+    поэтому один TaskAllocator можно использовать из нескольких потоков.
+    """
+
+    def __init__(self, tasks: List[TaskWithSkills], executors: List[ExecutorWithSkills],
+                 keep_allocation: bool = True, skill_matrix=None):
+        self.tasks = tuple(tasks)
+        self.executors = tuple(executors)
+        # При потоковом распределении задачи не сохраняются, чтобы память не росла с их числом
+        self.keep_allocation = keep_allocation
+        self.allocation: Dict[str, List[TaskWithSkills]] = {executor.id: [] for executor in executors}
+        self.unassigned: list[str] = []
+        # Загрузка учитывает назначения, сделанные в этом же распределении
+        self.load_tracker = LoadTracker([executor.id for executor in executors])
+        self.executor_index = {executor.id: i for i, executor in enumerate(executors)}
+        # Матрица статических оценок (навыки + опыт) T x E для фазы улучшения, строки - индексы задач
+        self.static_scores: np.ndarray | None = None
+        # Индекс исполнителя для каждой задачи по ее позиции - начальное решение фазы улучшения
+        self.assignment: list[int | None] | None = None
+        # SnapshotSkillMatrix: оценки считаются по массивам снимка для всех исполнителей сразу
+        self.skill_matrix = skill_matrix
+        if skill_matrix is not None:
+            self.task_counts = np.zeros(len(executors), dtype=np.int64)
+
+    def enable_refinement(self) -> None:
+        self.static_scores = np.empty((len(self.tasks), len(self.executors)))
+        self.assignment = [None] * len(self.tasks)
+
+    def assign(self, task: TaskWithSkills, executor: ExecutorWithSkills, effort: float,
+               task_index: int | None = None) -> None:
+        if self.keep_allocation:
+            self.allocation[executor.id].append(task)
+        if self.assignment is not None:
+            self.assignment[task_index] = self.executor_index[executor.id]
+        self.load_tracker.assign(executor.id, effort)
+        if self.skill_matrix is not None:
+            self.task_counts[self.executor_index[executor.id]] += 1
+
+
+class StreamingAllocation:
+    """Онлайн-распределение: задачи обрабатываются в порядке поступления.
+
+    В отличие от allocate_tasks задачи не сортируются по сложности, зато
+    решение по каждой задаче доступно сразу, а в памяти хранятся только
+    исполнители и их загрузка.
+    """
+
+    def __init__(self, allocator: "TaskAllocator", executors: List[ExecutorWithSkills]):
+        self.allocator = allocator
+        self.context = AllocationContext([], executors, keep_allocation=False)
+        self.task_count = 0
+        self.start_time = time.perf_counter()
+
+    def allocate(self, tasks: List[TaskWithSkills]) -> list[tuple[str, str | None]]:
+        results = []
+        for task in tasks:
+            best_executor = self.allocator._find_best_executor(task, self.context.executors, self.context)
+            if best_executor:
+                self.context.assign(task, best_executor, self.allocator._task_effort(task))
+            else:
+                self.context.unassigned.append(task.id)
+            results.append((task.id, best_executor.id if best_executor else None))
+        self.task_count += len(tasks)
+        return results
+
+    def finish(self) -> dict:
+        self.allocator._log_allocation_summary(
+            self.task_count,
+            len(self.context.executors),
+            self.context.unassigned,
+            time.perf_counter() - self.start_time,
+        )
+        return {
+            "tasks": self.task_count,
+            "assigned": self.task_count - len(self.context.unassigned),
+            "unassigned": len(self.context.unassigned),
+        }
 
-logger.addHandler(file_handler)
 
 class TaskAllocator:
-    def __init__(self):
+    def __init__(self, log_sample_rate: int = 0):
         logger.info("Initializing TaskAllocator")
-        self.allocated_tasks = {}
+        # Экземпляр хранит только неизменяемые настройки, состояние распределения - в AllocationContext
         self.normalizer = SkillNormalizer()
+        # 0 - решения по отдельным задачам не логируются, N - логируется каждая N-я задача
+        self.log_sample_rate = log_sample_rate
 
     def calculate_overlap_score(self, task1_start: datetime, task1_end: datetime, 
                               task2_start: datetime, task2_end: datetime) -> float:
@@ -92,8 +173,9 @@ class TaskAllocator:
             executor_soft_skills = self.normalizer.normalize_skills(executor.soft_skills)
             executor_hard_skills = self.normalizer.normalize_skills(executor.hard_skills)
 
-            logger.debug(f"Normalized skills for task {task.id}: soft={task_soft_skills}, hard={task_hard_skills}")
-            logger.debug(f"Normalized skills for executor {executor.id}: soft={executor_soft_skills}, hard={executor_hard_skills}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Normalized skills for task %s: soft=%s, hard=%s", task.id, task_soft_skills, task_hard_skills)
+                logger.debug("Normalized skills for executor %s: soft=%s, hard=%s", executor.id, executor_soft_skills, executor_hard_skills)
 
             # Рассчитываем соответствие soft skills
             soft_score = 0.0
@@ -132,65 +214,139 @@ class TaskAllocator:
             logger.error(f"Error calculating skill match score: {str(e)}\n{traceback.format_exc()}")
             return 0.0
 
-    def allocate_tasks(self, tasks: List[TaskWithSkills], executors: List[ExecutorWithSkills]) -> Dict[str, List[TaskWithSkills]]:
-        logger.info(f"Starting task allocation for {len(tasks)} tasks among {len(executors)} executors")
+    def allocate_tasks(self, tasks: List[TaskWithSkills], executors: List[ExecutorWithSkills] | None,
+                       time_budget_ms: int | None = None,
+                       skill_matrix=None) -> Dict[str, List[TaskWithSkills]]:
+        """skill_matrix - SnapshotSkillMatrix исполнителей из снимка; тогда executors берутся из нее"""
+        if skill_matrix is not None:
+            executors = skill_matrix.executors
+        logger.info("Starting task allocation for %d tasks among %d executors", len(tasks), len(executors))
+        start_time = time.perf_counter()
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         
         try:
-            # Создаем словарь для хранения распределенных задач
-            allocation = {executor.id: [] for executor in executors}
+            context = AllocationContext(tasks, executors, skill_matrix=skill_matrix)
+            if time_budget_ms:
+                context.enable_refinement()
             
             # Сортируем задачи по сложности (количество навыков)
-            sorted_tasks = sorted(
-                tasks,
-                key=lambda x: len(x.soft_skills) + len(x.hard_skills),
+            task_order = sorted(
+                range(len(context.tasks)),
+                key=lambda i: len(context.tasks[i].soft_skills) + len(context.tasks[i].hard_skills),
                 reverse=True
             )
             
-            # Сортируем исполнителей по количеству текущих задач
-            def get_executor_load(executor_id: str) -> int:
-                return len(self.allocated_tasks.get(executor_id, []))
-            
-            for task in sorted_tasks:
-                logger.info(f"Processing task: {task.id}")
-                
-                # Сортируем исполнителей по текущей нагрузке
-                available_executors = sorted(
-                    executors,
-                    key=lambda x: get_executor_load(x.id)
+            for index, task_index in enumerate(task_order):
+                task = context.tasks[task_index]
+                # Решения по отдельным задачам пишем только в DEBUG или для выборки
+                sampled = debug_enabled or (
+                    self.log_sample_rate > 0 and index % self.log_sample_rate == 0
                 )
                 
                 # Находим наиболее подходящего исполнителя
-                best_executor = self._find_best_executor(task, available_executors)
+                best_executor = self._find_best_executor(
+                    task, context.executors, context,
+                    scores_row=None if context.static_scores is None else context.static_scores[task_index],
+                )
                 
                 if best_executor:
-                    allocation[best_executor.id].append(task)
-                    logger.info(f"Task {task.id} allocated to executor {best_executor.id}")
+                    context.assign(task, best_executor, self._task_effort(task), task_index)
+                    if sampled:
+                        logger.info("Task %s allocated to executor %s", task.id, best_executor.id)
                 else:
-                    logger.warning(f"No suitable executor found for task {task.id}")
+                    context.unassigned.append(task.id)
+                    if sampled:
+                        logger.info("No suitable executor found for task %s", task.id)
             
-            self.allocated_tasks = allocation
-            logger.info("Task allocation completed successfully")
-            return allocation
+            if time_budget_ms:
+                self._refine_allocation(context, task_order, start_time + time_budget_ms / 1000)
+            
+            self._log_allocation_summary(
+                len(tasks), len(executors), context.unassigned, time.perf_counter() - start_time
+            )
+            return context.allocation
             
         except Exception as e:
             logger.error(f"Error during task allocation: {str(e)}", exc_info=True)
             raise
 
-    def _find_best_executor(self, task: TaskWithSkills, executors: List[ExecutorWithSkills]) -> ExecutorWithSkills:
+    def _refine_allocation(self, context: AllocationContext, task_order: list[int],
+                           deadline: float) -> None:
+        """Локальный поиск поверх жадного решения до исчерпания бюджета времени"""
+        refiner = LocalSearchRefiner(
+            context.static_scores, LOAD_WEIGHT, MAX_TASKS_PER_EXECUTOR, MIN_FIT_SCORE
+        )
+        assignment, stats = refiner.refine(context.assignment, len(context.executors), deadline)
+        
+        # Пересобираем результат в исходном порядке обработки задач
+        context.allocation = {executor.id: [] for executor in context.executors}
+        context.unassigned = []
+        for i in task_order:
+            if assignment[i] is None:
+                context.unassigned.append(context.tasks[i].id)
+            else:
+                context.allocation[context.executors[assignment[i]].id].append(context.tasks[i])
+        
+        logger.info(
+            "Refinement: iterations=%d moves=%d swaps=%d objective %.4f -> %.4f",
+            stats["iterations"],
+            stats["moves"],
+            stats["swaps"],
+            stats["initial_objective"],
+            stats["final_objective"],
+        )
+
+    def _log_allocation_summary(self, task_count: int, executor_count: int,
+                                unassigned: list[str], elapsed: float) -> None:
+        """Одна итоговая запись вместо построчного лога по каждой паре задача-исполнитель"""
+        unassigned_preview = unassigned[:SUMMARY_UNASSIGNED_LIMIT]
+        if len(unassigned) > SUMMARY_UNASSIGNED_LIMIT:
+            unassigned_preview.append(f"... (+{len(unassigned) - SUMMARY_UNASSIGNED_LIMIT})")
+        
+        logger.info(
+            "Allocation summary: tasks=%d executors=%d assigned=%d unassigned=%d "
+            "pairs_scored=%d elapsed=%.3fs unassigned_ids=%s",
+            task_count,
+            executor_count,
+            task_count - len(unassigned),
+            len(unassigned),
+            task_count * executor_count,
+            elapsed,
+            unassigned_preview,
+        )
+        if unassigned:
+            logger.warning("%d tasks were left without executor", len(unassigned))
+
+    def _find_best_executor(self, task: TaskWithSkills, executors: List[ExecutorWithSkills],
+                            context: AllocationContext,
+                            scores_row: np.ndarray | None = None) -> ExecutorWithSkills:
+        if context.skill_matrix is not None:
+            return self._find_best_executor_vectorized(task, executors, context, scores_row)
         try:
             best_score = -1
             best_executor = None
+            best_load = None
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
             
-            for executor in executors:
-                score = self._calculate_fit_score(task, executor)
-                logger.debug(f"Executor {executor.id} fit score for task {task.id}: {score}")
+            for position, executor in enumerate(executors):
+                static_score = self._calculate_static_score(task, executor)
+                if scores_row is not None:
+                    scores_row[position] = static_score
+                score = static_score + self._calculate_load_score(executor, context) * LOAD_WEIGHT
+                if debug_enabled:
+                    logger.debug("Executor %s fit score for task %s: %.4f", executor.id, task.id, score)
                 
-                if score > best_score:
+                # При равной оценке выбираем менее загруженного исполнителя
+                if score > best_score or (
+                    score == best_score
+                    and context.load_tracker.sort_key(executor.id) < best_load
+                ):
                     best_score = score
                     best_executor = executor
+                    best_load = context.load_tracker.sort_key(executor.id)
             
             # Если лучший результат слишком низкий, не назначаем задачу
-            if best_score < 0.3:  # Минимальный порог соответствия
+            if best_score < MIN_FIT_SCORE:
                 return None
                 
             return best_executor
@@ -199,36 +355,54 @@ class TaskAllocator:
             logger.error(f"Error finding best executor: {str(e)}", exc_info=True)
             raise
 
-    def _calculate_fit_score(self, task: TaskWithSkills, executor: ExecutorWithSkills) -> float:
+    def _find_best_executor_vectorized(self, task: TaskWithSkills, executors, context: AllocationContext,
+                                       scores_row: np.ndarray | None = None):
+        """То же, что _find_best_executor, но оценки считаются массивами по всем исполнителям сразу"""
+        matrix = context.skill_matrix
+        static_scores = (
+            matrix.skill_scores(task) * SKILL_WEIGHT + matrix.experience_scores(task) * EXPERIENCE_WEIGHT
+        )
+        if scores_row is not None:
+            scores_row[:] = static_scores
+        load_scores = np.maximum(0.0, 1.0 - context.task_counts / MAX_TASKS_PER_EXECUTOR)
+        scores = static_scores + load_scores * LOAD_WEIGHT
+        if logger.isEnabledFor(logging.DEBUG):
+            for executor, score in zip(executors, scores.tolist()):
+                logger.debug("Executor %s fit score for task %s: %.4f", executor.id, task.id, score)
+
+        best_score = scores.max() if len(scores) else -1
+        if best_score < MIN_FIT_SCORE:
+            return None
+        # При равной оценке выбираем менее загруженного исполнителя
+        best = min(
+            np.flatnonzero(scores == best_score).tolist(),
+            key=lambda i: context.load_tracker.sort_key(executors[i].id),
+        )
+        return executors[best]
+
+    def _calculate_fit_score(self, task: TaskWithSkills, executor: ExecutorWithSkills,
+                             context: AllocationContext) -> float:
         try:
-            # Базовые веса для разных факторов
-            skill_weight = 0.5
-            load_weight = 0.3
-            experience_weight = 0.2
-            
-            # Оценка по навыкам
-            skill_score = self._calculate_skill_match(task, executor)
-            
             # Оценка по нагрузке
-            load_score = self._calculate_load_score(executor)
-            
-            # Оценка по опыту
-            experience_score = self._calculate_experience_match(task, executor)
+            load_score = self._calculate_load_score(executor, context)
             
             # Итоговая оценка
-            total_score = (
-                skill_score * skill_weight +
-                load_score * load_weight +
-                experience_score * experience_weight
-            )
-            
-            logger.debug(f"Fit score calculation for executor {executor.id} and task {task.id}: {total_score}")
-            return total_score
+            return self._calculate_static_score(task, executor) + load_score * LOAD_WEIGHT
             
         except Exception as e:
             logger.error(f"Error calculating fit score: {str(e)}", exc_info=True)
             raise
 
+    def _calculate_static_score(self, task: TaskWithSkills, executor: ExecutorWithSkills) -> float:
+        """Часть оценки, не зависящая от текущей загрузки: навыки и опыт"""
+        # Оценка по навыкам
+        skill_score = self._calculate_skill_match(task, executor)
+        
+        # Оценка по опыту
+        experience_score = self._calculate_experience_match(task, executor)
+        
+        return skill_score * SKILL_WEIGHT + experience_score * EXPERIENCE_WEIGHT
+
     def _calculate_skill_match(self, task: TaskWithSkills, executor: ExecutorWithSkills) -> float:
         try:
             # Рассчитываем соответствие soft skills
@@ -268,18 +442,22 @@ class TaskAllocator:
             logger.error(f"Error calculating skill match: {str(e)}", exc_info=True)
             raise
 
-    def _calculate_load_score(self, executor: ExecutorWithSkills) -> float:
+    def _calculate_load_score(self, executor: ExecutorWithSkills, context: AllocationContext) -> float:
         try:
-            current_tasks = len(self.allocated_tasks.get(executor.id, []))
-            max_tasks = 5  # Можно сделать настраиваемым параметром
+            current_tasks = context.load_tracker.task_count(executor.id)
             
             # Чем меньше текущих задач, тем выше оценка
-            return max(0.0, 1.0 - (current_tasks / max_tasks))
+            return max(0.0, 1.0 - (current_tasks / MAX_TASKS_PER_EXECUTOR))
             
         except Exception as e:
             logger.error(f"Error calculating load score: {str(e)}", exc_info=True)
             raise
 
+    @staticmethod
+    def _task_effort(task: TaskWithSkills) -> float:
+        # Трудоемкость задачи оцениваем длительностью в днях
+        return max((task.end_date - task.start_date).total_seconds() / 86400, 0.0)
+
     def _calculate_experience_match(self, task: TaskWithSkills, executor: ExecutorWithSkills) -> float:
         try:
             # Рассчитываем средний уровень навыков исполнителя
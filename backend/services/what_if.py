@@ -0,0 +1,107 @@
+import numpy as np
+from src.schemas.requests import TaskWithSkills, ExecutorWithSkills
+from services.task_allocator import TaskAllocator, MAX_TASKS_PER_EXECUTOR
+
+
+class WhatIfEvaluator:
+    """Сравнение распределений при разных весах оценки.
+
+    Компоненты оценки (навыки и опыт) для всех пар задача-исполнитель считаются
+    один раз, после чего жадное распределение TaskAllocator выполняется сразу
+    для всех конфигураций: на каждой задаче оценки считаются матрицей
+    "конфигурации x исполнители".
+    """
+
+    def __init__(self, allocator: TaskAllocator):
+        self.allocator = allocator
+
+    def component_scores(
+        self, tasks: list[TaskWithSkills], executors: list[ExecutorWithSkills]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        skill = np.empty((len(tasks), len(executors)))
+        experience = np.empty((len(tasks), len(executors)))
+        for i, task in enumerate(tasks):
+            for j, executor in enumerate(executors):
+                skill[i, j] = self.allocator._calculate_skill_match(task, executor)
+                experience[i, j] = self.allocator._calculate_experience_match(task, executor)
+        return skill, experience
+
+    def evaluate(
+        self,
+        tasks: list[TaskWithSkills],
+        executors: list[ExecutorWithSkills],
+        configurations: list[dict],
+    ) -> list[dict]:
+        skill, experience = self.component_scores(tasks, executors)
+
+        # Веса конфигураций - столбцы, чтобы умножение шло по строкам матрицы C x E
+        skill_weight = np.array([[c["skill_weight"]] for c in configurations])
+        load_weight = np.array([[c["load_weight"]] for c in configurations])
+        experience_weight = np.array([[c["experience_weight"]] for c in configurations])
+        threshold = np.array([c["threshold"] for c in configurations])
+
+        config_count, executor_count = len(configurations), len(executors)
+        counts = np.zeros((config_count, executor_count))
+        efforts = np.zeros((config_count, executor_count))
+        chosen = np.full((config_count, len(tasks)), -1)
+        fit_scores = np.zeros((config_count, len(tasks)))
+        rows = np.arange(config_count)
+
+        # Тот же порядок задач, что и в TaskAllocator.allocate_tasks
+        task_order = sorted(
+            range(len(tasks)),
+            key=lambda i: len(tasks[i].soft_skills) + len(tasks[i].hard_skills),
+            reverse=True,
+        )
+
+        for i in task_order:
+            static = skill[i] * skill_weight + experience[i] * experience_weight
+            load_score = np.maximum(0.0, 1.0 - counts / MAX_TASKS_PER_EXECUTOR)
+            scores = static + load_score * load_weight
+
+            # При равной оценке - менее загруженный исполнитель, затем первый по порядку
+            best = scores.max(axis=1, keepdims=True)
+            mask = scores == best
+            masked_counts = np.where(mask, counts, np.inf)
+            mask &= masked_counts == masked_counts.min(axis=1, keepdims=True)
+            masked_efforts = np.where(mask, efforts, np.inf)
+            mask &= masked_efforts == masked_efforts.min(axis=1, keepdims=True)
+            best_executor = mask.argmax(axis=1)
+
+            assigned = best[:, 0] >= threshold
+            assigned_rows = rows[assigned]
+            assigned_executors = best_executor[assigned]
+            counts[assigned_rows, assigned_executors] += 1
+            efforts[assigned_rows, assigned_executors] += TaskAllocator._task_effort(tasks[i])
+            chosen[assigned_rows, i] = assigned_executors
+            fit_scores[assigned_rows, i] = best[assigned, 0]
+
+        return [
+            self.__summary(configurations[c], tasks, executors, chosen[c], fit_scores[c], skill, counts[c])
+            for c in range(config_count)
+        ]
+
+    @staticmethod
+    def __summary(configuration, tasks, executors, chosen, fit_scores, skill, counts) -> dict:
+        assigned = chosen >= 0
+        assigned_count = int(assigned.sum())
+        task_indexes = np.flatnonzero(assigned)
+
+        return {
+            "configuration": configuration,
+            "allocation": {
+                tasks[i].id: executors[chosen[i]].id for i in task_indexes
+            },
+            "stats": {
+                "assigned": assigned_count,
+                "unassigned": len(tasks) - assigned_count,
+                "mean_fit_score": float(fit_scores[assigned].mean()) if assigned_count else 0.0,
+                "mean_skill_score": (
+                    float(skill[task_indexes, chosen[task_indexes]].mean())
+                    if assigned_count
+                    else 0.0
+                ),
+                "max_executor_load": int(counts.max()) if len(counts) else 0,
+                "load_stddev": float(counts.std()) if len(counts) else 0.0,
+            },
+        }
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException
+
+logger = logging.getLogger("backend")
+
+# Классы маршрутов
+LLM_ROUTES = "llm"
+ALLOCATION_ROUTES = "allocation"
+
+# Грубая оценка числа токенов по длине текста
+CHARS_PER_TOKEN = 4
+# Системный промпт и разметка чата одного запроса к модели, токены
+PROMPT_OVERHEAD_TOKENS = 600
+
+
+def estimate_tokens(*texts: str) -> int:
+    return sum(len(text) for text in texts) // CHARS_PER_TOKEN + 1
+
+
+def estimate_prompt_tokens(texts: list[str], context: str = "") -> int:
+    """Стоимость анализа: по одному запросу к модели на каждый текст, контекст входит в каждый"""
+    per_request = PROMPT_OVERHEAD_TOKENS + (estimate_tokens(context) if context else 0)
+    return sum(estimate_tokens(text) + per_request for text in texts)
+
+
+def estimate_allocation_cost(task_count: int, executor_count: int) -> int:
+    """Стоимость распределения: число оцениваемых пар задача-исполнитель"""
+    return task_count * max(1, executor_count)
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_rate: float):
+        if refill_rate <= 0:
+            # Без пополнения опустевшая корзина не открылась бы никогда
+            raise ValueError(f"Token bucket refill rate must be positive, got {refill_rate}")
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_take(self, cost: float) -> float:
+        """Списывает стоимость и возвращает 0 или время до возможности ее списать, с"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+        # Запрос дороже емкости проходит при полной корзине и уводит ее в минус
+        required = min(cost, self.capacity)
+        if self.tokens >= required:
+            self.tokens -= cost
+            return 0.0
+        return (required - self.tokens) / self.refill_rate
+
+
+class AdmissionController:
+    """Ограничение нагрузки на дорогие маршруты корзинами токенов.
+
+    Корзина заводится на пару (пользователь, класс маршрутов): все маршруты
+    класса расходуют один бюджет пользователя. Емкость и скорость пополнения
+    задаются для класса в единицах оценочной стоимости: токены промпта для
+    анализа, задачи x исполнители для распределения.
+    """
+
+    def __init__(self, limits: dict[str, tuple[float, float]], max_buckets: int = 10000):
+        # класс маршрута -> (емкость, пополнение в секунду)
+        for route_class, (capacity, refill_rate) in limits.items():
+            if capacity > 0 and refill_rate <= 0:
+                raise ValueError(
+                    f"Admission limit for {route_class} routes needs a positive refill rate, got {refill_rate}"
+                )
+        self.limits = limits
+        self.max_buckets = max_buckets
+        self.__buckets: OrderedDict[tuple[str, str], TokenBucket] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def check(self, route_class: str, route: str, requester: str, cost: float) -> float:
+        capacity, refill_rate = self.limits[route_class]
+        if capacity <= 0:
+            # Ограничение отключено
+            return 0.0
+
+        # route используется только в логах: бюджет общий на класс маршрутов
+        key = (requester, route_class)
+        with self.__lock:
+            bucket = self.__buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(capacity, refill_rate)
+                self.__buckets[key] = bucket
+                while len(self.__buckets) > self.max_buckets:
+                    self.__buckets.popitem(last=False)
+            else:
+                self.__buckets.move_to_end(key)
+            return bucket.try_take(cost)
+
+    def admit(self, route_class: str, route: str, requester: str, cost: float) -> None:
+        retry_after = self.check(route_class, route, requester, cost)
+        if retry_after > 0:
+            logger.warning(
+                f"Rejected {route} for {requester}: cost {cost:.0f}, retry after {retry_after:.1f}s"
+            )
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    async def throttle(self, route_class: str, route: str, requester: str, cost: float) -> None:
+        """Ожидание вместо отказа - для потоков, ответ которых уже начат"""
+        while True:
+            retry_after = self.check(route_class, route, requester, cost)
+            if retry_after <= 0:
+                return
+            await asyncio.sleep(retry_after)
@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from jose import jwt, JWTError
+
+
+class AuthCache:
+    """Кэш пользователей по проверенному токену PocketBase (TTL + LRU).
+
+    Подпись токена здесь не проверяется: PocketBase подписывает токен ключом
+    tokenKey конкретной записи вместе с секретом коллекции, поэтому токен при
+    промахе кэша проверяет сам PocketBase (auth-refresh), а кэшируется результат.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300):
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.__user_tokens: dict[str, set[str]] = {}
+        self.__revoked: dict[str, float] = {}
+
+    def decode(self, token: str) -> dict:
+        """Claims токена без проверки подписи; отсекает истекшие и отозванные токены до запроса к PocketBase"""
+        try:
+            claims = jwt.get_unverified_claims(token)
+        except JWTError as e:
+            raise ValueError(f"Invalid token: {e}")
+
+        expires_at = claims.get("exp")
+        if expires_at is not None and expires_at <= time.time():
+            raise ValueError("Token expired")
+        if token in self.__revoked:
+            raise ValueError("Token revoked")
+        return claims
+
+    def get(self, token: str) -> dict | None:
+        entry = self.__entries.get(token)
+        if entry is None:
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.time():
+            self.invalidate_token(token)
+            return None
+
+        self.__entries.move_to_end(token)
+        return user
+
+    def put(self, token: str, user: dict, claims: dict) -> None:
+        # Запись не переживает сам токен
+        expires_at = time.time() + self.__ttl
+        if claims.get("exp") is not None:
+            expires_at = min(expires_at, claims["exp"])
+
+        self.__entries[token] = (expires_at, user)
+        self.__entries.move_to_end(token)
+        self.__user_tokens.setdefault(user["id"], set()).add(token)
+
+        while len(self.__entries) > self.__max_size:
+            oldest_token, _ = next(iter(self.__entries.items()))
+            self.invalidate_token(oldest_token)
+
+    def invalidate_token(self, token: str) -> None:
+        entry = self.__entries.pop(token, None)
+        if entry is None:
+            return
+
+        user_id = entry[1]["id"]
+        tokens = self.__user_tokens.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self.__user_tokens[user_id]
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Сброс всех токенов пользователя, например после смены роли"""
+        for token in list(self.__user_tokens.get(user_id, ())):
+            self.invalidate_token(token)
+
+    def revoke(self, token: str) -> None:
+        """Выход из системы: токен отклоняется локально до истечения его срока"""
+        now = time.time()
+        self.__revoked = {t: exp for t, exp in self.__revoked.items() if exp > now}
+
+        try:
+            expires_at = jwt.get_unverified_claims(token).get("exp")
+        except JWTError:
+            expires_at = None
+        self.__revoked[token] = expires_at or now + self.__ttl
+        self.invalidate_token(token)
@@ -1,6 +1,16 @@
 from services.llm_interface import LlamaModelInterface
+from services.llm_backends import create_backend, LLAMA_CPP
+from services.inference_tuning import load_settings, InferenceSettings
+from src.cpu_affinity import CpuLayout
 from src.pocketbase import Pocketbase
+from src.auth_cache import AuthCache
+from src.admission import AdmissionController, LLM_ROUTES, ALLOCATION_ROUTES
+from services.executor_store import ExecutorProfileStore
+from services.job_store import JobStore
+from services.job_manager import JobManager
+from services.task_allocator import TaskAllocator
 from pathlib import Path
+import os
 import sys
 
 # Получаем базовую директорию
@@ -15,9 +25,76 @@ LLAMA_MODEL_PATH = str(
     base_dir / "assets" / "models" / "Mistral-7B-Instruct-v0.3.Q4_K_S.gguf"
 )
 POCKETBASE_URL = "http://127.0.0.1:8090"
+# Параметры llama.cpp, подобранные калибровкой (python cli/start.py --calibrate)
+LLAMA_TUNING_PATH = Path(
+    os.getenv("LLAMA_TUNING_PATH", base_dir / "assets" / "tuning" / "inference.json")
+)
+LLAMA_SETTINGS = load_settings(LLAMA_TUNING_PATH, LLAMA_MODEL_PATH) or InferenceSettings()
+# Процессоры инференса (LLAMA_CPUS, LLAMA_NUMA_NODE) и API (API_CPUS), например "0-15"
+CPU_LAYOUT = CpuLayout.from_config(
+    llm_cpus=os.getenv("LLAMA_CPUS"),
+    llm_numa_node=int(os.getenv("LLAMA_NUMA_NODE")) if os.getenv("LLAMA_NUMA_NODE") else None,
+    api_cpus=os.getenv("API_CPUS"),
+    calibrated=LLAMA_SETTINGS.cpu_affinity,
+)
+LLAMA_SETTINGS.cpu_affinity = CPU_LAYOUT.inference
 
-LLAMA_INTERFACE = LlamaModelInterface(model_path=LLAMA_MODEL_PATH)
-PB = Pocketbase(POCKETBASE_URL)
+LLAMA_INTERFACE = LlamaModelInterface(
+    create_backend(
+        # llama_cpp - модель в процессе API, openai - OpenAI-совместимый сервер, stub - без модели
+        os.getenv("LLM_BACKEND", LLAMA_CPP),
+        model_path=LLAMA_MODEL_PATH,
+        # "prompt_lookup" или путь к черновой GGUF-модели с тем же словарем
+        draft_model=os.getenv("LLAMA_DRAFT_MODEL"),
+        draft_tokens=int(os.getenv("LLAMA_DRAFT_TOKENS", 0)) or None,
+        settings=LLAMA_SETTINGS,
+        numa_node=CPU_LAYOUT.numa_node,
+        server_url=os.getenv("LLM_SERVER_URL", "http://127.0.0.1:8080/v1"),
+        server_model=os.getenv("LLM_SERVER_MODEL", "local"),
+        api_key=os.getenv("LLM_SERVER_API_KEY"),
+        slots=int(os.getenv("LLM_SERVER_SLOTS", 1)),
+        timeout=float(os.getenv("LLM_SERVER_TIMEOUT", 300)),
+        stub_delay=float(os.getenv("LLM_STUB_DELAY", 0)),
+    ),
+    # Сходство задач (MinHash по названию и описанию), с которого оценка переиспользуется
+    # в запросах с reuse_similar; 0 - переиспользование на сервере отключено
+    duplicate_threshold=float(os.getenv("TASK_DUPLICATE_THRESHOLD", 0.85)),
+)
+PB = Pocketbase(
+    POCKETBASE_URL,
+    connection_limit=int(os.getenv("POCKETBASE_CONNECTION_LIMIT", 100)),
+    keepalive_timeout=float(os.getenv("POCKETBASE_KEEPALIVE_TIMEOUT", 30)),
+    request_timeout=float(os.getenv("POCKETBASE_REQUEST_TIMEOUT", 30)),
+)
+AUTH_CACHE = AuthCache(
+    max_size=int(os.getenv("AUTH_CACHE_SIZE", 10000)),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", 300)),
+)
+# Емкость корзины и пополнение в секунду; емкость 0 отключает ограничение
+ADMISSION = AdmissionController(
+    {
+        # Оценочные токены промпта
+        LLM_ROUTES: (
+            float(os.getenv("ADMISSION_LLM_CAPACITY", 50000)),
+            float(os.getenv("ADMISSION_LLM_RATE", 200)),
+        ),
+        # Пары задача-исполнитель
+        ALLOCATION_ROUTES: (
+            float(os.getenv("ADMISSION_ALLOCATION_CAPACITY", 5000000)),
+            float(os.getenv("ADMISSION_ALLOCATION_RATE", 100000)),
+        ),
+    }
+)
+EXECUTOR_SNAPSHOT_DIR = base_dir / "assets" / "snapshots" / "executors"
+EXECUTOR_STORE = ExecutorProfileStore(
+    PB, collection_name="executors", snapshot_dir=EXECUTOR_SNAPSHOT_DIR
+)
+# Сколько резюме пакетного анализа обрабатывается одновременно
+EXECUTOR_ANALYSIS_CONCURRENCY = int(os.getenv("EXECUTOR_ANALYSIS_CONCURRENCY", 2))
+JOBS_DB_PATH = Path(os.getenv("JOBS_DB_PATH", base_dir / "assets" / "jobs" / "jobs.db"))
+# Каждая N-я задача распределения пишет решение в allocator.log; 0 - только итоговая запись
+TASK_ALLOCATOR = TaskAllocator(log_sample_rate=int(os.getenv("ALLOCATOR_LOG_SAMPLE_RATE", 0)))
+JOB_MANAGER = JobManager(JobStore(JOBS_DB_PATH), LLAMA_INTERFACE, TASK_ALLOCATOR)
 
 
 class PocketbaseCollections:
@@ -0,0 +1,153 @@
+import os
+import sys
+from pathlib import Path
+
+CPU_SYSFS = Path("/sys/devices/system/cpu")
+NODE_SYSFS = Path("/sys/devices/system/node")
+
+
+def parse_cpu_list(text: str) -> list[int]:
+    """Список процессоров в формате Linux: "0-3,8,10-11" """
+    cpus = set()
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus: list[int]) -> str:
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+def numa_nodes() -> dict[int, list[int]]:
+    """Узел NUMA -> его процессоры; пусто, если топология неизвестна"""
+    nodes = {}
+    for node_dir in NODE_SYSFS.glob("node[0-9]*"):
+        try:
+            nodes[int(node_dir.name[4:])] = parse_cpu_list((node_dir / "cpulist").read_text().strip())
+        except (OSError, ValueError):
+            continue
+    return dict(sorted(nodes.items()))
+
+
+def available_cpus() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_core_cpus(cpus: list[int] | None = None) -> list[int] | None:
+    """По одному логическому процессору на физическое ядро; None, если топология неизвестна"""
+    cpus = available_cpus() if cpus is None else cpus
+    selected, seen = [], set()
+    for cpu in cpus:
+        siblings_path = CPU_SYSFS / f"cpu{cpu}" / "topology" / "thread_siblings_list"
+        try:
+            siblings = tuple(parse_cpu_list(siblings_path.read_text().strip()))
+        except (OSError, ValueError):
+            return None
+        if siblings not in seen:
+            seen.add(siblings)
+            selected.append(cpu)
+    return selected
+
+
+def pin_current_thread(cpus: list[int]) -> bool:
+    """Привязывает текущий поток к процессорам; потоки, созданные им позже, наследуют привязку.
+
+    Недоступные процессоры пропускаются, False - если привязать не удалось.
+    """
+    # Поток может расширить унаследованную привязку, поэтому сверяем с числом процессоров
+    cpus = [cpu for cpu in cpus if cpu < (os.cpu_count() or 1)]
+    if not cpus:
+        return False
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            # В Linux pid 0 - вызывающий поток, а не весь процесс
+            os.sched_setaffinity(0, cpus)
+            return True
+        except OSError:
+            return False
+    if sys.platform == "win32":
+        import ctypes
+
+        mask = sum(1 << cpu for cpu in cpus if cpu < 64)
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentThread.restype = ctypes.c_void_p
+        kernel32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        return bool(kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask))
+    return False
+
+
+class CpuLayout:
+    """Разделение процессоров между инференсом и API.
+
+    Потоки llama.cpp работают на своем наборе процессоров (или узле NUMA),
+    цикл событий API и пулы потоков распределения - на остальных, чтобы
+    генерация и обработка запросов не вытесняли друг друга.
+    """
+
+    def __init__(
+        self,
+        inference: list[int] | None = None,
+        api: list[int] | None = None,
+        numa_node: int | None = None,
+    ):
+        self.inference = inference
+        self.api = api
+        self.numa_node = numa_node
+
+    @classmethod
+    def from_config(
+        cls,
+        llm_cpus: str | None = None,
+        llm_numa_node: int | None = None,
+        api_cpus: str | None = None,
+        calibrated: list[int] | None = None,
+    ) -> "CpuLayout":
+        """Явные настройки важнее калибровки; API по умолчанию получает процессоры, не занятые инференсом"""
+        inference = parse_cpu_list(llm_cpus) if llm_cpus else None
+        if llm_numa_node is not None:
+            node_cpus = numa_nodes().get(llm_numa_node)
+            if node_cpus is None:
+                raise ValueError(f"Unknown NUMA node: {llm_numa_node}")
+            inference = [cpu for cpu in inference if cpu in node_cpus] if inference else node_cpus
+
+        api = parse_cpu_list(api_cpus) if api_cpus else None
+        if inference and api is None:
+            rest = [cpu for cpu in available_cpus() if cpu not in inference]
+            api = rest or None
+
+        return cls(inference or calibrated, api, llm_numa_node)
+
+    def report(self) -> list[str]:
+        nodes = numa_nodes()
+
+        def describe(cpus: list[int] | None) -> str:
+            if not cpus:
+                return "all CPUs (not pinned)"
+            cpu_nodes = sorted(node for node, node_cpus in nodes.items() if set(cpus) & set(node_cpus))
+            text = f"CPUs {format_cpu_list(cpus)} ({len(cpus)})"
+            if len(nodes) > 1:
+                text += f", NUMA node{'s' if len(cpu_nodes) > 1 else ''} {','.join(map(str, cpu_nodes))}"
+            return text
+
+        lines = [
+            f"Host: {len(available_cpus())} CPUs, {max(len(nodes), 1)} NUMA node(s)",
+            f"Inference: {describe(self.inference)}",
+            f"API: {describe(self.api)}",
+        ]
+        if self.inference and self.api and set(self.inference) & set(self.api):
+            lines.append("Warning: inference and API CPU sets overlap")
+        return lines
@@ -1,7 +1,78 @@
+import contextvars
+import json
 import logging
+import os
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
+# Формат логов выбирается переменной окружения LOG_FORMAT: text (по умолчанию) или json
+LOG_FORMAT_ENV = "LOG_FORMAT"
+# request_id - идентификатор HTTP-запроса или "-" вне запроса, по нему фильтрует cli/logs.py --request-id
+TEXT_LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Идентификатор текущего HTTP-запроса, выставляется middleware в main.py
+request_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "request_id", default=None
+)
+
+
+class TextFormatter(logging.Formatter):
+    """Текстовый формат; поле request_id берется из записи или из контекста запроса"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_id = getattr(record, "request_id", None) or request_id_var.get() or "-"
+        return super().format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON-lines: одна запись на строку, поле ts всегда идет первым"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, LOG_DATE_FORMAT),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+
+        request_id = getattr(record, "request_id", None) or request_id_var.get()
+        if request_id:
+            entry["request_id"] = request_id
+
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def create_formatter(
+    fmt: str = TEXT_LOG_FORMAT, datefmt: str | None = LOG_DATE_FORMAT
+) -> logging.Formatter:
+    """Форматтер с учетом LOG_FORMAT; fmt/datefmt используются для текстового формата"""
+    if os.getenv(LOG_FORMAT_ENV, "text").lower() == "json":
+        return JsonFormatter()
+    return TextFormatter(fmt, datefmt=datefmt)
+
+
+# Логгер -> файл в logs/. На каждый файл один RotatingFileHandler: при нескольких
+# обработчиках одного файла ротация одного из них ломает запись остальных
+LOG_FILES = {
+    "backend": "backend.log",
+    "matching_router": "backend.log",
+    "uvicorn": "backend.log",
+    "uvicorn.error": "backend.log",
+    "uvicorn.access": "backend.log",
+    "uvicorn.asgi": "backend.log",
+    "task_allocator": "allocator.log",
+    "normalizer": "allocator.log",
+    "llm_interface": "llm.log",
+}
+
+# Обработчики переживают повторные вызовы setup_logging из разных модулей
+_file_handlers: dict[str, RotatingFileHandler] = {}
+
+
 def setup_logging():
     """Централизованная настройка логирования для всего приложения"""
     # Создаем директорию для логов
@@ -9,90 +80,27 @@ def setup_logging():
     log_dir.mkdir(exist_ok=True)
 
     # Базовый форматтер для всех логов
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
-
-    # Настраиваем логгер для бэкенда
-    backend_logger = logging.getLogger("backend")
-    backend_logger.setLevel(logging.INFO)
-    backend_logger.propagate = False
-    backend_logger.handlers = []
-
-    backend_handler = RotatingFileHandler(
-        log_dir / "backend.log",
-        maxBytes=10 * 1024 * 1024,  # 10MB
-        backupCount=5,
-        encoding="utf-8"
-    )
-    backend_handler.setFormatter(formatter)
-    backend_logger.addHandler(backend_handler)
-
-    # Настраиваем логгер для allocator
-    allocator_logger = logging.getLogger("task_allocator")
-    allocator_logger.setLevel(logging.INFO)
-    allocator_logger.propagate = False
-    allocator_logger.handlers = []
-
-    allocator_handler = RotatingFileHandler(
-        log_dir / "allocator.log",
-        maxBytes=10 * 1024 * 1024,
-        backupCount=5,
-        encoding="utf-8"
-    )
-    allocator_handler.setFormatter(formatter)
-    allocator_logger.addHandler(allocator_handler)
-
-    # Настраиваем логгер для LLM
-    llm_logger = logging.getLogger("llm_interface")
-    llm_logger.setLevel(logging.INFO)
-    llm_logger.propagate = False
-    llm_logger.handlers = []
-
-    llm_handler = RotatingFileHandler(
-        log_dir / "llm.log",
-        maxBytes=10 * 1024 * 1024,
-        backupCount=5,
-        encoding="utf-8"
-    )
-    llm_handler.setFormatter(formatter)
-    llm_logger.addHandler(llm_handler)
-
-    # Настраиваем логгер для matching router
-    matching_logger = logging.getLogger("matching_router")
-    matching_logger.setLevel(logging.INFO)
-    matching_logger.propagate = False
-    matching_logger.handlers = []
-
-    matching_handler = RotatingFileHandler(
-        log_dir / "backend.log",  # Используем тот же файл, что и для бэкенда
-        maxBytes=10 * 1024 * 1024,
-        backupCount=5,
-        encoding="utf-8"
-    )
-    matching_handler.setFormatter(formatter)
-    matching_logger.addHandler(matching_handler)
-
-    # Настраиваем логгеры для uvicorn
-    for logger_name in ["uvicorn", "uvicorn.error", "uvicorn.access", "uvicorn.asgi"]:
-        uvicorn_logger = logging.getLogger(logger_name)
-        uvicorn_logger.setLevel(logging.INFO)
-        uvicorn_logger.propagate = False
-        uvicorn_logger.handlers = []
-
-        uvicorn_handler = RotatingFileHandler(
-            log_dir / "backend.log",
-            maxBytes=10 * 1024 * 1024,
-            backupCount=5,
-            encoding="utf-8"
-        )
-        uvicorn_handler.setFormatter(formatter)
-        uvicorn_logger.addHandler(uvicorn_handler)
+    formatter = create_formatter()
+
+    for logger_name, file_name in LOG_FILES.items():
+        handler = _file_handlers.get(file_name)
+        if handler is None:
+            handler = RotatingFileHandler(
+                log_dir / file_name,
+                maxBytes=10 * 1024 * 1024,  # 10MB
+                backupCount=5,
+                encoding="utf-8"
+            )
+            _file_handlers[file_name] = handler
+        handler.setFormatter(formatter)
+
+        configured_logger = logging.getLogger(logger_name)
+        configured_logger.setLevel(logging.INFO)
+        configured_logger.propagate = False
+        configured_logger.handlers = [handler]
 
     # Отключаем все остальные логгеры
     for name in logging.root.manager.loggerDict:
-        if name not in ["backend", "task_allocator", "llm_interface", "matching_router", 
-                       "uvicorn", "uvicorn.error", "uvicorn.access", "uvicorn.asgi"]:
+        if name not in LOG_FILES:
             logging.getLogger(name).handlers = []
-            logging.getLogger(name).propagate = False 
\ No newline at end of file
+            logging.getLogger(name).propagate = False
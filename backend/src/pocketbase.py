@@ -6,12 +6,58 @@ import aiohttp
 
 
 class Pocketbase:
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 30,
+        request_timeout: float = 30,
+        connect_timeout: float = 5,
+    ):
         self.__base_url = base_url
+        self.__api_url = f"{base_url}/api/collections"
         self.__token = None
         self.__token_update_time = 0
         self.__lock = asyncio.Lock()
 
+        # Общая сессия с пулом keep-alive соединений, создается в lifespan приложения
+        self.__session: aiohttp.ClientSession | None = None
+        self.__connection_limit = connection_limit
+        self.__connection_limit_per_host = connection_limit_per_host
+        self.__keepalive_timeout = keepalive_timeout
+        self.__timeout = aiohttp.ClientTimeout(
+            total=request_timeout, connect=connect_timeout
+        )
+
+    async def start(self) -> None:
+        if self.__session is not None and not self.__session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=self.__connection_limit,
+            limit_per_host=self.__connection_limit_per_host,
+            keepalive_timeout=self.__keepalive_timeout,
+        )
+        self.__session = aiohttp.ClientSession(
+            connector=connector, timeout=self.__timeout
+        )
+
+    async def close(self) -> None:
+        if self.__session is not None and not self.__session.closed:
+            await self.__session.close()
+        self.__session = None
+
+    async def __get_client(
+        self, client: aiohttp.ClientSession | None
+    ) -> aiohttp.ClientSession:
+        if client is not None:
+            return client
+        # Сессия создается лениво, если клиент используется вне lifespan (скрипты, тесты)
+        if self.__session is None or self.__session.closed:
+            await self.start()
+        return self.__session
+
     async def __get_headers(self, client: aiohttp.ClientSession):
         await self.__auth(client)
         return {"Authorization": f"Bearer {self.__token}"}
@@ -34,9 +80,12 @@ class Pocketbase:
                 self.__token = d["token"]
 
     async def fetch_records(
-        self, collection_name: str, client: aiohttp.ClientSession, **api_params
+        self,
+        collection_name: str,
+        client: aiohttp.ClientSession | None = None,
+        **api_params,
     ):
-
+        client = await self.__get_client(client)
         headers = await self.__get_headers(client)
         async with client.get(
             f"{self.__api_url}/{collection_name}/records?" + urlencode(api_params),
@@ -44,13 +93,30 @@ class Pocketbase:
         ) as resp:
             return await resp.json()
 
+    async def fetch_record(
+        self,
+        collection_name: str,
+        record_id: str,
+        client: aiohttp.ClientSession | None = None,
+    ):
+        client = await self.__get_client(client)
+        headers = await self.__get_headers(client)
+        async with client.get(
+            f"{self.__api_url}/{collection_name}/records/{record_id}",
+            headers=headers,
+        ) as resp:
+            if resp.status != 200:
+                raise aiohttp.ClientError(f"Failed to fetch record {record_id}")
+            return await resp.json()
+
     async def update_record(
         self,
         collection_name: str,
         record_id: str,
-        client: aiohttp.ClientSession,
+        client: aiohttp.ClientSession | None = None,
         **api_params,
     ):
+        client = await self.__get_client(client)
         headers = await self.__get_headers(client)
         async with client.patch(
             f"{self.__base_url}/api/collections/{collection_name}/records/{record_id}",
@@ -60,8 +126,12 @@ class Pocketbase:
             return await resp.json()
 
     async def add_record(
-        self, collection_name: str, client: aiohttp.ClientSession, **api_params
+        self,
+        collection_name: str,
+        client: aiohttp.ClientSession | None = None,
+        **api_params,
     ):
+        client = await self.__get_client(client)
         headers = await self.__get_headers(client)
         async with client.post(
             f"{self.__base_url}/api/collections/{collection_name}/records",
@@ -70,13 +140,31 @@ class Pocketbase:
         ) as resp:
             return await resp.json()
 
+    async def create_record(
+        self,
+        collection_name: str,
+        data: dict,
+        client: aiohttp.ClientSession | None = None,
+    ):
+        client = await self.__get_client(client)
+        headers = await self.__get_headers(client)
+        async with client.post(
+            f"{self.__api_url}/{collection_name}/records",
+            json=data,
+            headers=headers,
+        ) as resp:
+            if resp.status != 200:
+                raise aiohttp.ClientError(f"Failed to create record in {collection_name}")
+            return await resp.json()
+
     async def delete_record(
         self,
         collection_name: str,
         record_id: str,
-        client: aiohttp.ClientSession,
+        client: aiohttp.ClientSession | None = None,
         **api_params,
     ):
+        client = await self.__get_client(client)
         headers = await self.__get_headers(client)
         async with client.delete(
             f"{self.__base_url}/api/collections/{collection_name}/records/{record_id}",
@@ -88,11 +176,48 @@ class Pocketbase:
             else:
                 return await resp.json()
 
+    async def authenticate(
+        self,
+        auth_data: dict,
+        client: aiohttp.ClientSession | None = None,
+        collection_name: str = "users",
+    ) -> dict:
+        """Вход пользователя по email и паролю, возвращает token и record"""
+        client = await self.__get_client(client)
+        async with client.post(
+            f"{self.__api_url}/{collection_name}/auth-with-password",
+            json={
+                "identity": auth_data["email"],
+                "password": auth_data["password"],
+            },
+        ) as resp:
+            if resp.status != 200:
+                raise aiohttp.ClientError("Failed to authenticate user")
+            return await resp.json()
+
+    async def verify_auth(
+        self,
+        token: str,
+        client: aiohttp.ClientSession | None = None,
+        collection_name: str = "users",
+    ) -> dict:
+        """Проверка пользовательского токена, возвращает запись пользователя"""
+        client = await self.__get_client(client)
+        async with client.post(
+            f"{self.__api_url}/{collection_name}/auth-refresh",
+            headers={"Authorization": token},
+        ) as resp:
+            if resp.status != 200:
+                raise aiohttp.ClientError("Invalid auth token")
+            d = await resp.json()
+            return d["record"]
+
     async def create_superuser(
-        self, email: str, password: str, client: aiohttp.ClientSession
+        self, email: str, password: str, client: aiohttp.ClientSession | None = None
     ) -> bool:
         """Создание суперпользователя в PocketBase"""
         try:
+            client = await self.__get_client(client)
             async with client.post(
                 f"{self.__base_url}/api/admins",
                 json={
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Annotated, Literal, Union
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -12,6 +13,8 @@ class Task(BaseModel):
 class TasksData(BaseModel):
     project_description: str
     task_list: list[Task]
+    # Переиспользовать оценку почти одинаковых задач вместо повторного анализа (по запросу клиента)
+    reuse_similar: bool = False
 
 
 class ExecutorData(BaseModel):
@@ -20,6 +23,10 @@ class ExecutorData(BaseModel):
     resume: str
 
 
+class ExecutorBatchData(BaseModel):
+    executors: list[ExecutorData] = Field(min_length=1, max_length=1000)
+
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -32,6 +39,10 @@ class UserCreate(BaseModel):
     role: str = "user"  # user или admin
 
 
+class UserRoleUpdate(BaseModel):
+    role: str  # user или admin
+
+
 class SingleTaskData(BaseModel):
     id: str
     title: str
@@ -83,8 +94,110 @@ class ExecutorAnalysisRequest(BaseModel):
 
 class AllocationRequest(BaseModel):
     tasks: list[TaskWithSkills]
-    executors: list[ExecutorWithSkills]
+    executors: list[ExecutorWithSkills] = []
+    # id исполнителей из хранилища профилей (коллекция executors), вместо полного списка навыков
+    executor_ids: list[str] = []
+    # Бюджет времени на улучшение жадного распределения локальным поиском, мс
+    time_budget_ms: int | None = Field(default=None, ge=0, le=60000)
 
 
 class AllocationResponse(BaseModel):
     allocation: dict[str, str]
+
+
+# Записи NDJSON-потока /match/allocate/stream
+class TaskStreamRecord(TaskWithSkills):
+    type: Literal["task"]
+
+
+class ExecutorStreamRecord(ExecutorWithSkills):
+    type: Literal["executor"]
+
+
+class ExecutorIdStreamRecord(BaseModel):
+    type: Literal["executor_id"]
+    id: str
+
+
+AllocationStreamRecord = Annotated[
+    Union[TaskStreamRecord, ExecutorStreamRecord, ExecutorIdStreamRecord],
+    Field(discriminator="type"),
+]
+
+
+class ExecutorRecommendationRequest(BaseModel):
+    task: TaskWithSkills
+    # Пустой список - поиск по всем сохраненным профилям (коллекция executors)
+    executors: list[ExecutorWithSkills] = []
+    k: int = Field(default=5, ge=1, le=100)
+
+
+class TaskRecommendationRequest(BaseModel):
+    executor: ExecutorWithSkills
+    tasks: list[TaskWithSkills]
+    k: int = Field(default=5, ge=1, le=100)
+
+
+class Recommendation(BaseModel):
+    id: str
+    score: float
+    skill_score: float
+    experience_score: float
+
+
+class RecommendationResponse(BaseModel):
+    recommendations: list[Recommendation]
+
+
+class WeightConfiguration(BaseModel):
+    skill_weight: float = Field(default=0.5, ge=0)
+    load_weight: float = Field(default=0.3, ge=0)
+    experience_weight: float = Field(default=0.2, ge=0)
+    threshold: float = Field(default=0.3, ge=0)
+
+
+class WhatIfRequest(BaseModel):
+    tasks: list[TaskWithSkills]
+    executors: list[ExecutorWithSkills]
+    configurations: list[WeightConfiguration] = Field(min_length=1, max_length=100)
+
+
+class WhatIfStats(BaseModel):
+    assigned: int
+    unassigned: int
+    mean_fit_score: float
+    mean_skill_score: float
+    max_executor_load: int
+    load_stddev: float
+
+
+class WhatIfResult(BaseModel):
+    configuration: WeightConfiguration
+    allocation: dict[str, str]
+    stats: WhatIfStats
+
+
+class WhatIfResponse(BaseModel):
+    results: list[WhatIfResult]
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str  # allocation или analysis
+    status: str  # queued, running, completed или failed
+    total: int
+    completed: int
+    error: str | None = None
+    created_at: float
+    updated_at: float
+
+
+class JobListResponse(BaseModel):
+    jobs: list[JobResponse]
+
+
+class JobResultsResponse(BaseModel):
+    job: JobResponse
+    # Результаты анализа задач в порядке task_list (для завершенной части)
+    items: list[dict] = []
+    allocation: dict[str, str] | None = None
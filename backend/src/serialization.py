@@ -0,0 +1,128 @@
+import json
+from datetime import date, datetime
+from typing import Any, TypeVar
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ValidationError
+from pydantic.json_schema import models_json_schema
+
+# orjson и msgpack необязательны: без них используется стандартный json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Модели тел, которые разбираются parse_body: FastAPI не видит их в сигнатуре и не добавляет в схему OpenAPI
+_BODY_MODELS: dict[str, type[BaseModel]] = {}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Компактный JSON в UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+def dumps_line(content: Any) -> bytes:
+    """Строка NDJSON"""
+    return dumps(content) + b"\n"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse с сериализацией через orjson, если он установлен"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_default, use_bin_type=True)
+
+
+def accepts_msgpack(request: Request) -> bool:
+    return msgpack is not None and MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def negotiate_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """msgpack, если клиент его запросил в Accept, иначе JSON"""
+    if accepts_msgpack(request):
+        return MsgpackResponse(content, status_code=status_code)
+    return FastJSONResponse(content, status_code=status_code)
+
+
+async def parse_body(request: Request, model: type[ModelT]) -> ModelT:
+    """Разбор тела запроса сразу в модель.
+
+    JSON валидируется через model_validate_json без промежуточных словарей,
+    тело в msgpack распаковывается и валидируется как обычные данные.
+    Ошибки возвращаются в том же формате 422, что и у FastAPI.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", JSON_MEDIA_TYPE)
+
+    try:
+        if MSGPACK_MEDIA_TYPE in content_type:
+            if msgpack is None:
+                raise HTTPException(status_code=415, detail="msgpack is not supported by the server")
+            return model.model_validate(msgpack.unpackb(body, raw=False))
+        return model.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False), body=body)
+    except ValueError as e:
+        # Некорректный msgpack
+        raise RequestValidationError(
+            [{"type": "invalid_body", "loc": ("body",), "msg": str(e) or type(e).__name__}], body=body
+        )
+
+
+def body_openapi(model: type[BaseModel]) -> dict:
+    """openapi_extra маршрута с телом, разбираемым parse_body: схема модели для JSON и msgpack"""
+    _BODY_MODELS[model.__name__] = model
+    schema = {"$ref": f"#/components/schemas/{model.__name__}"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON_MEDIA_TYPE: {"schema": schema},
+                MSGPACK_MEDIA_TYPE: {"schema": schema},
+            },
+        }
+    }
+
+
+def add_body_schemas(openapi_schema: dict) -> dict:
+    """Добавляет в components схемы моделей из body_openapi и вложенных в них моделей"""
+    if not _BODY_MODELS:
+        return openapi_schema
+    _, definitions = models_json_schema(
+        [(model, "validation") for model in _BODY_MODELS.values()],
+        ref_template="#/components/schemas/{model}",
+    )
+    schemas = openapi_schema.setdefault("components", {}).setdefault("schemas", {})
+    for name, schema in definitions.get("$defs", {}).items():
+        schemas.setdefault(name, schema)
+    return openapi_schema